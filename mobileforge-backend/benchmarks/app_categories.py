@@ -0,0 +1,127 @@
+"""
+Category detection cost with hundreds of categories and long descriptions.
+
+Builds --categories synthetic categories (weighted one- and two-word
+keywords plus synonyms, as in src/app_categories.json) and descriptions of
+each --sizes-kb that mix filler words with keywords, then times:
+
+    per keyword   one substring count per keyword per category, the shape of
+                  the old generate_app_content loop scaled to many categories
+    compiled      services.app_categories.CategoryMatcher.rank, one pass of
+                  one trie-shaped regex
+
+Rankings from the matcher must equal a reference that counts every keyword
+separately with a whole-word regex.
+
+    python benchmarks/app_categories.py --categories 500 --sizes-kb 1 10 100
+"""
+
+import argparse
+import random
+import re
+import string
+import sys
+import time
+
+import llm_app  # noqa: F401  (sets up sys.path for the src imports below)
+from services.app_categories import AppCategory, CategoryMatcher
+
+
+def words(rng: random.Random, count: int, taken: set) -> list:
+    result = []
+    while len(result) < count:
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+        if word not in taken:
+            taken.add(word)
+            result.append(word)
+    return result
+
+
+def build(categories: int, rng: random.Random):
+    taken = set()
+    data = []
+    for index in range(categories):
+        keywords = words(rng, 6, taken) + [' '.join(words(rng, 2, taken)) for _ in range(2)]
+        weighted = {keyword: rng.randint(1, 3) for keyword in keywords}
+        synonyms = {keyword: words(rng, 2, taken) for keyword in keywords[:2]}
+        data.append({'id': f'category{index}', 'keywords': weighted, 'synonyms': synonyms, 'actions': []})
+    data.append({'id': 'default', 'keywords': {}, 'actions': []})
+    filler = words(rng, 2000, taken)
+    return data, filler
+
+
+def description(rng: random.Random, size: int, filler: list, keywords: list) -> str:
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(keywords) if rng.random() < 0.05 else rng.choice(filler)
+        parts.append(word.upper() if rng.random() < 0.1 else word)
+        length += len(word) + 1
+    return ' '.join(parts)[:size].rsplit(' ', 1)[0]
+
+
+def per_keyword(categories: list, text: str) -> list:
+    text = text.lower()
+    scores = {}
+    for category in categories:
+        for keyword, weight in category.keywords.items():
+            if keyword in text:
+                scores[category.id] = scores.get(category.id, 0.0) + weight * text.count(keyword)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def reference(categories: list, text: str) -> list:
+    text = text.lower()
+    order = {category.id: index for index, category in enumerate(categories)}
+    scores = {}
+    for category in categories:
+        for keyword, weight in category.keywords.items():
+            pattern = r'(?<!\w)' + r'\s+'.join(map(re.escape, keyword.split())) + r'(?!\w)'
+            found = len(re.findall(pattern, text))
+            if found:
+                scores[category.id] = scores.get(category.id, 0.0) + weight * found
+    return sorted(scores.items(), key=lambda item: (-item[1], order[item[0]]))
+
+
+def timed(fn, *args, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn(*args)
+    return (time.perf_counter() - started) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--categories', type=int, default=500)
+    parser.add_argument('--sizes-kb', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    data, filler = build(args.categories, rng)
+    categories = [AppCategory(item) for item in data]
+    keywords = [keyword for category in categories for keyword in category.keywords]
+    started = time.perf_counter()
+    matcher = CategoryMatcher(categories)
+    print(f'{args.categories} categories, {len(keywords)} keywords and synonyms; '
+          f'compiled in {(time.perf_counter() - started) * 1000:.1f}ms')
+
+    ok = True
+    print(f"{'size':>7} {'per keyword':>12} {'compiled':>10} {'MB/s':>7} {'matches':>8}")
+    for size_kb in args.sizes_kb:
+        text = description(rng, size_kb * 1024, filler, keywords)
+        naive = timed(per_keyword, categories, text, rounds=args.rounds)
+        compiled = timed(matcher.rank, text, rounds=args.rounds)
+        ranked = matcher.rank(text)
+        print(f'{size_kb:>5}KB {naive * 1000:>10.2f}ms {compiled * 1000:>8.2f}ms '
+              f'{len(text) / compiled / 2**20:>7.1f} {len(ranked):>8}')
+        if ranked != reference(categories, text):
+            print(f'  {size_kb}KB: ranking differs from the per-keyword reference')
+            ok = False
+
+    print('rankings match' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Concurrent writers and lookups against the generated-app store.
+
+Starts --replicas processes that share one database and one blob directory
+(as the backend replicas do) and has each generate --apps apps through
+/api/codegen/generate from --threads threads. Then checks every app landed
+exactly once with a distinct id, and times a lookup by id (counting SQL
+statements, which should be one primary-key read), an owner listing page and
+a download.
+
+    python benchmarks/app_store.py --replicas 2 --apps 500 --threads 8
+    DATABASE_URL=postgresql://... python benchmarks/app_store.py
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+
+def replica(index: int, apps: int, threads: int, queue):
+    import llm_app
+    client = llm_app.app.test_client()
+    ids = []
+    errors = []
+    lock = threading.Lock()
+
+    def work(worker: int):
+        for i in range(worker, apps, threads):
+            response = client.post('/api/codegen/generate', headers={'X-User-Id': f'user{i % 10}'}, json={
+                'framework': 'react-native', 'app_name': f'App{i}', 'description': f'Replica {index} app {i}'
+            })
+            with lock:
+                if response.status_code == 200:
+                    ids.append(response.get_json()['id'])
+                else:
+                    errors.append(response.get_json().get('error'))
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=work, args=(w,)) for w in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    queue.put((ids, errors, time.perf_counter() - started))
+
+
+def timed(fn, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--replicas', type=int, default=2)
+    parser.add_argument('--apps', type=int, default=500, help='apps generated per replica')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--lookups', type=int, default=500)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='mobileforge-store-')
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(root, 'app.db')}")
+    os.environ['GENERATED_FILES_DIR'] = os.path.join(root, 'generated')
+
+    # Create the schema once, as a deploy would, then fork the replicas
+    import llm_app
+    from src.models.user import db
+    with llm_app.app.app_context():
+        db.engine.dispose()
+
+    queue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=replica, args=(i, args.apps, args.threads, queue))
+                 for i in range(args.replicas)]
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    ids = [app_id for result in results for app_id in result[0]]
+    errors = [error for result in results for error in result[1]]
+    slowest = max(result[2] for result in results)
+    print(f'{args.replicas} replicas x {args.apps} apps: {len(ids)} stored, {len(set(ids))} distinct ids, '
+          f'{len(errors)} errors, {len(ids) / slowest:.0f} apps/s')
+    for error in sorted(set(errors))[:5]:
+        print(f'  error: {error}')
+
+    from sqlalchemy import event
+    client = llm_app.app.test_client()
+    with llm_app.app.app_context():
+        total = db.session.execute(db.text('select count(*) from generated_app')).scalar()
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+
+    rng = random.Random(1)
+    sample = [rng.choice(ids) for _ in range(args.lookups)]
+    picks = iter(sample * 2)
+    by_id = timed(lambda: client.get(f'/api/codegen/apps/{next(picks)}'), args.lookups)
+    per_lookup = len(statements) / args.lookups
+    listing = timed(lambda: client.get('/api/codegen/apps?owner=user3&limit=20'), 100)
+    download = timed(lambda: client.get(f'/api/codegen/download/{next(picks)}').get_data(), 100)
+    print(f'rows in database: {total}')
+    print(f'lookup by id {by_id * 1000:.2f}ms ({per_lookup:.1f} SQL statements), '
+          f'owner page {listing * 1000:.2f}ms, download {download * 1000:.2f}ms')
+
+    ok = not errors and len(set(ids)) == len(ids) == total == args.replicas * args.apps and per_lookup == 1
+    print('PASS' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
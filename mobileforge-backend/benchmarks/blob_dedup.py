@@ -0,0 +1,96 @@
+"""
+Dedup ratio and lookup cost of the content-addressed generated-file store.
+
+Generates apps with distinct names and descriptions across all frameworks,
+stores them in a BlobStore under a temporary directory and reports logical vs
+stored bytes, files written per app, store throughput, and the time of a
+manifest + blob lookup at each store size (it should stay flat). Then opens
+the directory again as a restarted process would and reports startup time and
+memory (no manifest is read) and the first report(), which must match the
+live store's counts after some apps are regenerated and deleted.
+
+    python benchmarks/blob_dedup.py --apps 100 1000 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import llm_app  # noqa: F401  (sets up sys.path for the src imports below)
+from routes.codegen import app_generator
+from services.blob_store import BlobStore
+
+FEATURES = ['habit tracker', 'recipe planner', 'fitness coach', 'social feed', 'shop', 'task board',
+            'budget tracker', 'language tutor', 'photo journal', 'event planner']
+
+
+def lookup_time(store: BlobStore, app_ids: list, rounds: int = 2000) -> float:
+    rng = random.Random(1)
+    picks = [rng.choice(app_ids) for _ in range(rounds)]
+    started = time.perf_counter()
+    for app_id in picks:
+        manifest = store.manifest(app_id)
+        store.get_blob(next(iter(manifest.values())))
+    return (time.perf_counter() - started) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--apps', type=int, nargs='+', default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    frameworks = list(app_generator.templates)
+    print(f"{'apps':>6} {'logical':>10} {'stored':>10} {'ratio':>7} {'blobs':>7} {'apps/s':>8} {'lookup':>9}")
+    with tempfile.TemporaryDirectory() as root:
+        store = BlobStore(root)
+        app_ids = []
+        for target in sorted(args.apps):
+            started = time.perf_counter()
+            added = 0
+            while len(app_ids) < target:
+                i = len(app_ids)
+                app = app_generator.generate_app(
+                    frameworks[i % len(frameworks)], f'App{i}',
+                    f'A {FEATURES[i % len(FEATURES)]} for team {i}'
+                )
+                app_id = f'app_{i}'
+                store.put_app(app_id, app['files'])
+                app_ids.append(app_id)
+                added += 1
+            rate = added / (time.perf_counter() - started)
+            report = store.report()
+            print(f"{target:>6} {report['logical_bytes'] / 2**20:>8.2f}MB {report['stored_bytes'] / 2**20:>8.2f}MB "
+                  f"{report['dedup_ratio']:>6.2f}x {report['blobs']:>7} {rate:>8.0f} "
+                  f"{lookup_time(store, app_ids) * 1e6:>7.1f}us")
+
+        for i in range(0, len(app_ids), 7):
+            store.put_app(app_ids[i], app_generator.generate_app(frameworks[0], f'Renamed{i}', 'A new idea')['files'])
+        for app_id in app_ids[3::11]:
+            store.delete_app(app_id)
+
+        on_disk = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(os.path.join(root, 'blobs'))
+                      for f in files)
+        tracemalloc.start()
+        started = time.perf_counter()
+        restarted = BlobStore(root)
+        startup = time.perf_counter() - started
+        startup_memory = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        reloaded = restarted.report()
+        first_report = time.perf_counter() - started
+        tracemalloc.stop()
+        print(f"blob files on disk {on_disk / 2**20:.2f}MB; restart {startup * 1000:.2f}ms, "
+              f"{startup_memory / 1024:.1f}KB; first report {first_report * 1000:.0f}ms: "
+              f"{reloaded['apps']} apps, ratio {reloaded['dedup_ratio']}x")
+        ok = reloaded == store.report()
+
+    print('reports match' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Concurrent SSE stream load test for /api/llm/chat.
+
+Starts one gunicorn worker process per mode, opens increasing numbers of
+simultaneous chat streams and reports the largest level at which every stream
+received its first token within the deadline.
+
+    python benchmarks/chat_concurrency.py
+    python benchmarks/chat_concurrency.py --modes gevent --levels 500,1000,2000
+
+Modes:
+    threaded  gthread worker, one OS thread per open stream (previous model)
+    gevent    gevent worker from gunicorn.conf.py (cooperative streams)
+"""
+
+import argparse
+import http.client
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WORKER_ARGS = {
+    'threaded': ['-k', 'gthread', '--threads', '8'],
+    'gevent': ['-k', 'gevent', '--worker-connections', '4000'],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode: str, port: int) -> subprocess.Popen:
+    cmd = [
+        sys.executable, '-m', 'gunicorn',
+        '--chdir', BENCH_DIR,
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', '1',
+        '--timeout', '300',
+        '--log-level', 'warning',
+        *WORKER_ARGS[mode],
+        'llm_app:app',
+    ]
+    # Run from the benchmarks dir so gunicorn does not pick up ../gunicorn.conf.py
+    # Disable provider rate limits; this measures the server, not the buckets
+    env = dict(os.environ, GPT4_REQUESTS_PER_MINUTE='0', GPT4_TOKENS_PER_MINUTE='0')
+    proc = subprocess.Popen(cmd, cwd=BENCH_DIR, env=env)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/llm/providers')
+            conn.getresponse().read()
+            conn.close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def open_stream(port: int, start: threading.Event, results: list, index: int, timeout: float):
+    # Every stream must reach the provider, not the response cache
+    body = json.dumps({'message': f'load test {index}', 'provider': 'gpt4', 'cache': 'bypass'})
+    start.wait()
+    sent = time.perf_counter()
+    first_token = None
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        conn.request('POST', '/api/llm/chat', body, {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        for line in response:
+            if first_token is None and line.startswith(b'data: ') and b'"content"' in line:
+                first_token = time.perf_counter() - sent
+        conn.close()
+        results[index] = (first_token, time.perf_counter() - sent, None)
+    except Exception as e:
+        results[index] = (first_token, time.perf_counter() - sent, e)
+
+
+def run_level(port: int, streams: int, deadline: float) -> dict:
+    start = threading.Event()
+    results = [None] * streams
+    threads = [
+        threading.Thread(target=open_stream, args=(port, start, results, i, deadline * 30), daemon=True)
+        for i in range(streams)
+    ]
+    for thread in threads:
+        thread.start()
+    start.set()
+    for thread in threads:
+        thread.join()
+
+    ttfts = sorted(r[0] for r in results if r[0] is not None)
+    held = sum(1 for r in results if r[0] is not None and r[0] <= deadline and r[2] is None)
+    return {
+        'streams': streams,
+        'held': held,
+        'errors': sum(1 for r in results if r[2] is not None),
+        'p50_ttft': ttfts[len(ttfts) // 2] if ttfts else None,
+        'max_ttft': ttfts[-1] if ttfts else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='threaded,gevent')
+    parser.add_argument('--levels', default='8,16,50,100,200,400,800')
+    parser.add_argument('--deadline', type=float, default=2.0,
+                        help='seconds allowed until the first token of each stream')
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    levels = [int(level) for level in args.levels.split(',')]
+    summary = {}
+    for mode in args.modes.split(','):
+        port = free_port()
+        proc = start_server(mode, port)
+        summary[mode] = 0
+        try:
+            print(f'\n== {mode} ==')
+            print(f"{'streams':>8} {'held':>6} {'errors':>7} {'p50 ttft':>9} {'max ttft':>9}")
+            for level in levels:
+                row = run_level(port, level, args.deadline)
+                print(f"{row['streams']:>8} {row['held']:>6} {row['errors']:>7} "
+                      f"{row['p50_ttft'] or 0:>8.3f}s {row['max_ttft'] or 0:>8.3f}s")
+                if row['held'] < level:
+                    break
+                summary[mode] = level
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    print('\nmax concurrent streams per process (first token within '
+          f'{args.deadline:.1f}s):')
+    for mode, level in summary.items():
+        print(f'  {mode:<9} {level}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Offline load test of /api/llm/chat against the provider stand-in.
+
+Starts provider_standin.py in-process, a gevent gunicorn worker pointed at it
+through <PROVIDER_ID>_BASE_URL, then opens N concurrent chat SSE streams and
+reports TTFT and completion-time percentiles plus the server's CPU and memory.
+No real provider is called and no API credits are used.
+
+    python benchmarks/chat_load.py --streams 200
+    python benchmarks/chat_load.py --streams 500 --provider claude --ttft-ms 500 --tokens-per-sec 30
+    python benchmarks/chat_load.py --streams 200 --max-p95-ttft 1.0   # exit 1 on regression
+
+--provider all spreads streams round-robin over every provider, covering both
+the OpenAI-compatible and Anthropic streaming formats.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+from chat_concurrency import BENCH_DIR, free_port
+from provider_standin import StandinServer, add_timing_arguments, config_from_args
+
+import llm_app  # noqa: F401  (sets up sys.path for the src imports below)
+from routes.llm import LLM_PROVIDERS
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def start_backend(port: int, standin_url: str, worker_connections: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    for provider_id, config in LLM_PROVIDERS.items():
+        prefix = provider_id.upper()
+        env[f'{prefix}_BASE_URL'] = standin_url
+        env[config['api_key_env']] = 'standin'
+        # Measure streaming, not the rate limiter
+        env[f'{prefix}_REQUESTS_PER_MINUTE'] = '0'
+        env[f'{prefix}_TOKENS_PER_MINUTE'] = '0'
+    cmd = [
+        sys.executable, '-m', 'gunicorn',
+        '--chdir', BENCH_DIR,
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', '1',
+        '-k', 'gevent',
+        '--worker-connections', str(worker_connections),
+        '--timeout', '300',
+        '--log-level', 'warning',
+        'llm_app:app',
+    ]
+    # Run from the benchmarks dir so gunicorn does not pick up ../gunicorn.conf.py
+    proc = subprocess.Popen(cmd, cwd=BENCH_DIR, env=env)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/llm/providers')
+            conn.getresponse().read()
+            conn.close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError('backend did not start')
+
+
+def process_tree(pid: int) -> list:
+    pids = [pid]
+    for parent in pids:
+        try:
+            with open(f'/proc/{parent}/task/{parent}/children') as f:
+                pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def sample_usage(pid: int):
+    """(cpu seconds, rss bytes) summed over the gunicorn master and workers"""
+    cpu = rss = 0
+    for proc_id in process_tree(pid):
+        try:
+            with open(f'/proc/{proc_id}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+            rss += int(fields[21]) * PAGE_SIZE
+        except (OSError, IndexError):
+            pass
+    return cpu, rss
+
+
+class UsageSampler(threading.Thread):
+    def __init__(self, pid: int, interval: float = 0.2):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.peak_rss = 0
+        self.peak_cpu_percent = 0.0
+
+    def run(self):
+        last_cpu, _ = sample_usage(self.pid)
+        last = time.perf_counter()
+        while not self.stopped.wait(self.interval):
+            cpu, rss = sample_usage(self.pid)
+            now = time.perf_counter()
+            self.peak_rss = max(self.peak_rss, rss)
+            self.peak_cpu_percent = max(self.peak_cpu_percent, (cpu - last_cpu) / (now - last) * 100)
+            last_cpu, last = cpu, now
+
+
+def open_stream(port: int, provider: str, start: threading.Event, results: list, index: int, timeout: float):
+    body = json.dumps({'message': f'load test {index}', 'provider': provider, 'cache': 'bypass'})
+    start.wait()
+    sent = time.perf_counter()
+    first_token = done = None
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        conn.request('POST', '/api/llm/chat', body, {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        for line in response:
+            if not line.startswith(b'data: '):
+                continue
+            if first_token is None and b'"content"' in line:
+                first_token = time.perf_counter() - sent
+            if b'"error"' in line:
+                raise RuntimeError(json.loads(line[6:])['error'])
+            if b'"done":true' in line:
+                done = time.perf_counter() - sent
+        conn.close()
+        results[index] = (first_token, done, None if done else RuntimeError('stream ended without done'))
+    except Exception as e:
+        results[index] = (first_token, done, e)
+
+
+def percentile(values: list, q: float):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--streams', type=int, default=200)
+    parser.add_argument('--provider', default='gpt4', help="provider id, 'auto' or 'all'")
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--max-p95-ttft', type=float, help='fail if p95 TTFT (seconds) exceeds this')
+    parser.add_argument('--max-p95-completion', type=float, help='fail if p95 completion (seconds) exceeds this')
+    add_timing_arguments(parser)
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    standin = StandinServer(0, config_from_args(args)).start()
+    port = free_port()
+    proc = start_backend(port, standin.base_url, max(1000, args.streams * 2))
+    providers = list(LLM_PROVIDERS) if args.provider == 'all' else [args.provider]
+
+    try:
+        sampler = UsageSampler(proc.pid)
+        start = threading.Event()
+        results = [None] * args.streams
+        threads = [
+            threading.Thread(target=open_stream, daemon=True,
+                             args=(port, providers[i % len(providers)], start, results, i, args.timeout))
+            for i in range(args.streams)
+        ]
+        for thread in threads:
+            thread.start()
+        cpu_before, _ = sample_usage(proc.pid)
+        sampler.start()
+        started = time.perf_counter()
+        start.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        cpu_after, rss_after = sample_usage(proc.pid)
+        sampler.stopped.set()
+    finally:
+        proc.terminate()
+        proc.wait()
+        standin.shutdown()
+
+    ttfts = sorted(r[0] for r in results if r[0] is not None)
+    completions = sorted(r[1] for r in results if r[1] is not None)
+    errors = [r[2] for r in results if r[2] is not None]
+
+    config = standin.config
+    print(f'{args.streams} streams to {args.provider}; stand-in ttft {config.ttft * 1000:.0f} ms, '
+          f'{config.tokens} tokens at {config.tokens_per_sec:g}/s')
+    print(f"{'':>12} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for name, values in (('ttft', ttfts), ('completion', completions)):
+        row = [percentile(values, q) for q in (0.5, 0.95, 0.99)] + [values[-1] if values else None]
+        print(f'{name:>12} ' + ' '.join(f'{v:>7.3f}s' if v is not None else f"{'-':>8}" for v in row))
+    print(f'errors: {len(errors)}' + (f' (first: {errors[0]})' if errors else ''))
+    print(f'server cpu: {cpu_after - cpu_before:.2f}s over {elapsed:.2f}s '
+          f'(avg {(cpu_after - cpu_before) / elapsed * 100:.0f}%, peak {sampler.peak_cpu_percent:.0f}%)')
+    print(f'server rss: peak {max(sampler.peak_rss, rss_after) / 2**20:.1f} MiB')
+
+    failed = bool(errors)
+    for label, limit, values in (('p95 ttft', args.max_p95_ttft, ttfts),
+                                 ('p95 completion', args.max_p95_completion, completions)):
+        value = percentile(values, 0.95)
+        if limit is not None and (value is None or value > limit):
+            print(f'REGRESSION: {label} {value} exceeds {limit}s')
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Context-window build benchmark for stored conversations.
+
+Writes a conversation of N turns to a temporary store, then times building
+the provider context under a token budget: cold (log loaded from disk),
+warm, and steady state (append one exchange, rebuild) as a live chat does.
+
+    python benchmarks/conversation_context.py
+    python benchmarks/conversation_context.py --turns 1000 --budget 4096
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from services.conversation_store import ConversationStore
+
+USER_TURN = 'Can you add a screen that lists my recent workouts with duration and calories burned? '
+ASSISTANT_TURN = ('Sure. I will add a WorkoutHistory screen backed by a FlatList, with a row component '
+                  'showing the date, duration and calories, and wire it into the stack navigator. ') * 3
+
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of fn in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turns', type=int, default=1000)
+    parser.add_argument('--budget', type=int, default=4096)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ConversationStore(directory)
+        conversation = store.get('bench')
+        for i in range(args.turns // 2):
+            conversation.append('user', f'{i}: {USER_TURN}')
+            conversation.append('assistant', ASSISTANT_TURN, provider='gpt4')
+            # Build as the live chat path would, so the summary advances incrementally
+            store.build_context(conversation, args.budget)
+
+        log_bytes = os.path.getsize(conversation.path)
+
+        def cold():
+            fresh = ConversationStore(directory)
+            fresh.build_context(fresh.get('bench'), args.budget)
+
+        cold_ms = timed(cold, max(args.repeat // 10, 3))
+        warm_ms = timed(lambda: store.build_context(conversation, args.budget), args.repeat)
+
+        def steady():
+            conversation.append('user', USER_TURN)
+            store.build_context(conversation, args.budget)
+            conversation.append('assistant', ASSISTANT_TURN, provider='gpt4')
+
+        steady_ms = timed(steady, args.repeat)
+
+        messages = store.build_context(conversation, args.budget)
+        context_chars = sum(len(m['content']) for m in messages)
+        full_chars = sum(len(t['content']) for t in conversation.turns)
+
+    print(f'{args.turns} turns, budget {args.budget} tokens, log {log_bytes / 1024:.0f} KiB on disk')
+    print(f'context: {len(messages)} messages, {context_chars} chars '
+          f'({context_chars / full_chars:.1%} of full history)')
+    print(f'build context, cold (load log from disk): {cold_ms:8.3f} ms')
+    print(f'build context, warm:                      {warm_ms:8.3f} ms')
+    print(f'append turn + build context:              {steady_ms:8.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Check that abandoned chat streams abort their upstream provider request.
+
+Opens N chats against the provider stand-in, reads a few events from each and
+then drops the connection. Reports how quickly the producers stopped, how
+many upstream streams the stand-in saw aborted, and the estimated tokens
+saved. Exits non-zero if any upstream stream ran to completion.
+
+    python benchmarks/disconnect_cancel.py --streams 20 --grace 0.5
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+from provider_standin import StandinServer, StandinConfig
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--streams', type=int, default=20)
+    parser.add_argument('--grace', type=float, default=0.5)
+    parser.add_argument('--read-events', type=int, default=3)
+    parser.add_argument('--tokens', type=int, default=300)
+    args = parser.parse_args()
+
+    standin = StandinServer(0, StandinConfig(ttft=0.1, tokens_per_sec=50, tokens=args.tokens)).start()
+    os.environ['GPT4_BASE_URL'] = standin.base_url
+    os.environ['OPENAI_API_KEY'] = 'standin'
+    os.environ['LLM_STREAM_CANCEL_GRACE'] = str(args.grace)
+    import llm_app
+    from routes import llm
+
+    client = llm_app.app.test_client()
+    # One completed chat gives the expected reply length for the savings estimate
+    client.post('/api/llm/chat', json={'message': 'warm up', 'provider': 'gpt4', 'cache': 'bypass'}).get_data()
+
+    def abandon(index):
+        response = client.post('/api/llm/chat', json={
+            'message': f'abandon {index}', 'provider': 'gpt4', 'cache': 'bypass', 'flush_interval_ms': 0
+        }, buffered=False)
+        events = iter(response.response)
+        for _ in range(args.read_events):
+            next(events)
+        response.close()
+
+    threads = [threading.Thread(target=abandon, args=(i,)) for i in range(args.streams)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    disconnected = time.perf_counter()
+
+    while llm.stream_registry.stats()['active'] and time.perf_counter() - disconnected < 30:
+        time.sleep(0.02)
+    stopped = time.perf_counter()
+    time.sleep(0.2)
+
+    saved = llm.llm_metrics.summary()['llm_cancelled_tokens_saved'].get('gpt4', {})
+    streams = llm.stream_registry.stats()
+    full_stream = args.tokens / standin.config.tokens_per_sec
+    print(f'{args.streams} streams dropped after {args.read_events} events '
+          f'({disconnected - started:.2f}s); full reply takes ~{full_stream:.1f}s')
+    print(f'producers stopped {stopped - disconnected:.2f}s after the last disconnect (grace {args.grace:g}s)')
+    print(f'registry cancelled: {streams["cancelled"]}, stand-in aborted: {standin.streams["aborted"]}, '
+          f'completed: {standin.streams["completed"] - 1}')
+    print(f'estimated tokens saved: {saved.get("avg", 0) * saved.get("count", 0):.0f} '
+          f'over {saved.get("count", 0)} streams')
+    standin.shutdown()
+
+    ok = standin.streams['completed'] == 1 and streams['cancelled'] == args.streams
+    print('PASS' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
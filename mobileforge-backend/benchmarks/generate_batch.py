@@ -0,0 +1,74 @@
+"""
+Throughput of /api/llm/generate-app/batch versus its concurrency limit.
+
+Without provider API keys generation is instant, so each generation is given
+a fixed simulated provider latency. Every run uses fresh descriptions and
+cache: "bypass" so neither the cache nor single-flight hides the work. One
+item per batch is invalid to show per-item errors do not fail the batch.
+
+    python benchmarks/generate_batch.py --items 32 --latency-ms 200 --concurrency 1 2 4 8 16
+"""
+
+import argparse
+import json
+import time
+import uuid
+
+import llm_app
+from routes import llm
+
+
+def run(client, items: int, concurrency: int) -> dict:
+    tag = uuid.uuid4().hex[:8]
+    payload = {
+        'items': [{'description': f'Batch {tag} app number {i}'} for i in range(items - 1)]
+                 + [{'description': ''}],
+        'cache': 'bypass',
+        'concurrency': concurrency,
+    }
+    started = time.perf_counter()
+    first = None
+    records = []
+    response = client.post('/api/llm/generate-app/batch', json=payload)
+    for line in response.response:
+        if first is None:
+            first = time.perf_counter() - started
+        records.append(json.loads(line))
+    elapsed = time.perf_counter() - started
+    summary = records[-1]
+    return {
+        'concurrency': concurrency,
+        'elapsed': elapsed,
+        'first': first,
+        'apps_per_sec': summary['succeeded'] / elapsed,
+        'succeeded': summary['succeeded'],
+        'failed': summary['failed'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=32)
+    parser.add_argument('--latency-ms', type=float, default=200)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    build = llm.build_generated_app
+
+    def slow_build(description, framework, provider):
+        time.sleep(args.latency_ms / 1000)
+        return build(description, framework, provider)
+
+    llm.build_generated_app = slow_build
+    client = llm_app.app.test_client()
+
+    print(f'{args.items} items ({args.items - 1} valid), {args.latency_ms:.0f} ms simulated latency')
+    print(f"{'concurrency':>11} {'wall s':>8} {'first s':>8} {'apps/s':>8} {'ok':>4} {'err':>4}")
+    for concurrency in args.concurrency:
+        result = run(client, args.items, concurrency)
+        print(f"{result['concurrency']:>11} {result['elapsed']:>8.2f} {result['first']:>8.2f} "
+              f"{result['apps_per_sec']:>8.1f} {result['succeeded']:>4} {result['failed']:>4}")
+
+
+if __name__ == '__main__':
+    main()
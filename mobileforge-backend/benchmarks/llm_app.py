@@ -0,0 +1,33 @@
+"""
+Minimal WSGI app for benchmarks.
+
+Registers only the blueprints the benchmarks exercise so they can run without
+the Kubernetes/Git configuration that src/main.py needs at import time.
+"""
+
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'src'))
+
+from flask import Flask
+from src.models.user import db
+from routes.llm import llm_bp
+from routes.codegen import codegen_bp
+
+app = Flask(__name__)
+app.register_blueprint(llm_bp, url_prefix='/api/llm')
+app.register_blueprint(codegen_bp, url_prefix='/api/codegen')
+
+# A throwaway SQLite file unless DATABASE_URL points somewhere else
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+    'DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='mobileforge-bench-'), 'app.db')}"
+)
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
+db.init_app(app)
+with app.app_context():
+    db.create_all()
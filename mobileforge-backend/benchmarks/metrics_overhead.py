@@ -0,0 +1,53 @@
+"""
+Per-token cost of the /chat stream instrumentation.
+
+Iterates the same token list through a plain relay generator and through
+LLMMetrics.observe_stream and reports the added nanoseconds per token.
+
+    python benchmarks/metrics_overhead.py --tokens 1000 --streams 2000
+"""
+
+import argparse
+import time
+
+import llm_app  # noqa: F401  (sets up sys.path for the src imports below)
+from services.conversation_store import tokens_for_chars
+from services.llm_metrics import LLMMetrics
+
+
+def relay(tokens):
+    for token in tokens:
+        yield token
+
+
+def timed(streams: int, run) -> float:
+    started = time.perf_counter()
+    for _ in range(streams):
+        for _ in run():
+            pass
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tokens', type=int, default=1000)
+    parser.add_argument('--streams', type=int, default=2000)
+    args = parser.parse_args()
+
+    tokens = [f'word{i} ' for i in range(args.tokens)]
+    metrics = LLMMetrics()
+
+    baseline = timed(args.streams, lambda: relay(tokens))
+    instrumented = timed(args.streams, lambda: metrics.observe_stream(
+        relay(tokens), time.monotonic(), lambda: 'gpt4', tokens_for_chars, args.tokens))
+
+    total = args.tokens * args.streams
+    print(f'{args.streams} streams x {args.tokens} tokens')
+    print(f'plain relay:  {baseline / total * 1e9:7.1f} ns/token')
+    print(f'instrumented: {instrumented / total * 1e9:7.1f} ns/token')
+    print(f'overhead:     {(instrumented - baseline) / total * 1e9:7.1f} ns/token')
+    print(metrics.summary()['llm_inter_token_gap_seconds'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Wall time of one app in several frameworks: separate calls vs frameworks: [...].
+
+Runs /api/codegen/generate against a temporary database and blob directory
+(as the backend does on disk) and reports the median of --rounds for:
+
+    single <fw>      one call per framework, alone
+    sequential       three separate calls, one per framework
+    frameworks       one call with frameworks: [all three]
+    streamed         the same with stream: true, plus time to the first part
+
+plus the share of a generation spent building the app model, which the
+multi-framework call does once. Every app of the multi-framework call must
+have the same files as the matching single-framework call.
+
+    python benchmarks/multi_framework.py --rounds 50 --description-kb 4
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+root = tempfile.mkdtemp(prefix='mobileforge-multi-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(root, 'app.db')}")
+os.environ['GENERATED_FILES_DIR'] = os.path.join(root, 'generated')
+
+import llm_app  # noqa: E402  (sets up sys.path and the database)
+from routes.codegen import app_generator  # noqa: E402
+
+FEATURES = ('A fitness tracker with workouts, running plans, a social feed for friends, an online store '
+            'for gear and a to-do list for training tasks. ')
+
+
+def median_ms(fn, rounds: int) -> float:
+    times = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--description-kb', type=int, default=4)
+    args = parser.parse_args()
+
+    client = llm_app.app.test_client()
+    frameworks = list(app_generator.templates)
+    fields = {'app_name': 'Trainer', 'description': (FEATURES * (args.description_kb * 1024 // len(FEATURES) + 1))}
+
+    def single(framework):
+        return client.post('/api/codegen/generate', json=dict(fields, framework=framework)).get_json()
+
+    def multi(stream=False):
+        return client.post('/api/codegen/generate', json=dict(fields, frameworks=frameworks, stream=stream))
+
+    first_part = []
+
+    def streamed():
+        started = time.perf_counter()
+        response = multi(stream=True)
+        lines = response.response
+        for index, line in enumerate(lines):
+            if index == 0:
+                first_part.append(time.perf_counter() - started)
+        response.close()
+
+    rows = [(f'single {framework}', lambda f=framework: single(f)) for framework in frameworks]
+    rows.append(('sequential', lambda: [single(framework) for framework in frameworks]))
+    rows.append(('frameworks', lambda: multi().get_json()))
+    rows.append(('streamed', streamed))
+    for name, fn in rows:
+        fn()
+        print(f'{name:>22} {median_ms(fn, args.rounds):>8.2f}ms')
+    print(f"{'first streamed part':>22} {statistics.median(first_part) * 1000:>8.2f}ms")
+
+    model_ms = median_ms(lambda: app_generator.build_model(fields['app_name'], fields['description']), args.rounds)
+    model = app_generator.build_model(fields['app_name'], fields['description'])
+    render_ms = median_ms(lambda: [app_generator.render_app(model, f) for f in frameworks], args.rounds)
+    print(f'build model {model_ms:.3f}ms once, render {len(frameworks)} frameworks {render_ms:.3f}ms')
+
+    ok = True
+    apps = multi().get_json()['apps']
+    for generated_app in apps:
+        if generated_app['files'] != single(generated_app['framework'])['files']:
+            print(f"{generated_app['framework']}: files differ from a single-framework generation")
+            ok = False
+    lines = [json.loads(line) for line in multi(stream=True).get_data(as_text=True).splitlines()]
+    if not lines[-1].get('done') or lines[-1]['succeeded'] != len(frameworks):
+        print('stream did not finish with every framework')
+        ok = False
+
+    print('outputs match' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
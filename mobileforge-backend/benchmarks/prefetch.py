@@ -0,0 +1,100 @@
+"""
+Submit latency of /api/llm/generate-app with and without prefetch.
+
+Simulates users typing an app description against the provider stand-in.
+With --mode prefetch the UI posts the partial description to
+/api/llm/generate-app/prefetch after every --prefetch-every words (as a
+debounced input handler would) and the final submit carries the same session
+token. Reports submit latency percentiles, how submits were served
+(X-Prefetch HIT / INFLIGHT / MISS), prefetches cancelled as stale, and the
+upstream provider calls made per submitted app.
+
+Stale prefetches are cancelled for free while they wait out the settle delay
+(PREFETCH_SETTLE_MS); one that already reached the provider still costs an
+upstream call, so the saving is bounded by the pause before submit.
+
+    python benchmarks/prefetch.py --users 10 --words 8 --word-ms 200 --think-ms 1500
+"""
+
+import argparse
+import os
+import threading
+import time
+from collections import Counter
+
+from provider_standin import StandinServer, add_timing_arguments, config_from_args
+
+WORDS = ['a', 'habit', 'tracker', 'with', 'daily', 'streaks', 'reminders', 'and', 'weekly', 'charts',
+         'for', 'runners', 'who', 'train', 'for', 'marathons']
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def run(client, mode, users, words, word_delay, think, prefetch_every):
+    latencies = []
+    served = Counter()
+    lock = threading.Lock()
+
+    def user(index):
+        token = f'{mode}-{index}'
+        text = [f'{mode}{index}'] + [WORDS[i % len(WORDS)] for i in range(words)]
+        for typed in range(1, len(text) + 1):
+            time.sleep(word_delay)
+            if mode == 'prefetch' and (typed % prefetch_every == 0 or typed == len(text)):
+                client.post('/api/llm/generate-app/prefetch', headers={'X-Session-Token': token},
+                            json={'description': ' '.join(text[:typed]), 'cache': 'bypass'})
+        time.sleep(think)
+        started = time.perf_counter()
+        response = client.post('/api/llm/generate-app', headers={'X-Session-Token': token},
+                               json={'description': ' '.join(text), 'cache': 'bypass'})
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            served[response.headers.get('X-Prefetch', 'ERROR') if response.status_code == 200 else 'ERROR'] += 1
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, served
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--words', type=int, default=8)
+    parser.add_argument('--word-ms', type=float, default=200, help='typing delay per word')
+    parser.add_argument('--think-ms', type=float, default=1500, help='pause between the last word and submit')
+    parser.add_argument('--prefetch-every', type=int, default=4, help='words between prefetch calls')
+    add_timing_arguments(parser)
+    args = parser.parse_args()
+
+    standin = StandinServer(0, config_from_args(args)).start()
+    os.environ['GPT4_BASE_URL'] = standin.base_url
+    os.environ['OPENAI_API_KEY'] = 'standin'
+    import llm_app
+    from routes import llm
+
+    client = llm_app.app.test_client()
+    print(f"{'mode':>9} {'p50':>8} {'p95':>8} {'upstream/app':>13}  served")
+    for mode in ('none', 'prefetch'):
+        before = standin.streams['responses']
+        latencies, served = run(client, mode, args.users, args.words, args.word_ms / 1000,
+                                args.think_ms / 1000, args.prefetch_every)
+        time.sleep(args.tokens / args.tokens_per_sec + 0.5)
+        upstream = (standin.streams['responses'] - before) / args.users
+        print(f'{mode:>9} {percentile(latencies, 0.5) * 1000:>6.0f}ms {percentile(latencies, 0.95) * 1000:>6.0f}ms '
+              f'{upstream:>13.2f}  {dict(served)}')
+
+    stats = llm.app_prefetches.stats()
+    print(f"prefetches started {stats['started']}, cancelled as stale {stats['cancelled']}, "
+          f"evicted {stats['evicted']}, left in registry {stats['slots']}")
+    standin.shutdown()
+
+
+if __name__ == '__main__':
+    main()
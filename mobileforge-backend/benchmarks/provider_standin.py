@@ -0,0 +1,210 @@
+"""
+Local stand-in for the LLM provider APIs.
+
+Speaks the two wire formats used by LLM_PROVIDERS entries, streamed and
+non-streamed, with configurable latency, time to first token and token rate:
+
+    POST .../chat/completions   OpenAI-compatible (grok4, gpt4, deepseek)
+    POST .../messages           Anthropic messages (claude)
+
+Point the backend at it with <PROVIDER_ID>_BASE_URL and any API key:
+
+    python benchmarks/provider_standin.py --port 8090 --ttft-ms 300 --tokens-per-sec 50
+    GPT4_BASE_URL=http://127.0.0.1:8090/v1 OPENAI_API_KEY=standin gunicorn -c gunicorn.conf.py
+
+Responses are chunked and keep-alive so the backend's connection pools are
+exercised the same way as against the real APIs. Everything runs offline.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Compact separators, as the real APIs send
+_dumps = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+WORDS = ('the app screen shows a list of items with a button to add new ones and a '
+         'settings page for the user profile navigation state storage sync offline '
+         'component layout style theme').split()
+
+
+class StandinConfig:
+    """Timing of stand-in responses; all delays are in seconds"""
+
+    def __init__(self, latency: float = 0.05, ttft: float = 0.3, tokens_per_sec: float = 50.0,
+                 tokens: int = 100, jitter: float = 0.1):
+        self.latency = latency
+        self.ttft = ttft
+        self.tokens_per_sec = tokens_per_sec
+        self.tokens = tokens
+        self.jitter = jitter
+
+    def delay(self, seconds: float) -> float:
+        return max(0.0, seconds * (1 + random.uniform(-self.jitter, self.jitter)))
+
+
+def openai_events(model: str, tokens):
+    chunk_id = 'chatcmpl-' + uuid.uuid4().hex[:24]
+    created = int(time.time())
+
+    def chunk(delta, finish_reason=None):
+        return 'data: ' + _dumps({
+            'id': chunk_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+            'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+        }) + '\n\n'
+
+    yield chunk({'role': 'assistant', 'content': ''})
+    for token in tokens:
+        yield chunk({'content': token})
+    yield chunk({}, 'stop')
+    yield 'data: [DONE]\n\n'
+
+
+def anthropic_events(model: str, tokens):
+    def event(name, data):
+        return f'event: {name}\ndata: {_dumps(data)}\n\n'
+
+    yield event('message_start', {'type': 'message_start', 'message': {
+        'id': 'msg_' + uuid.uuid4().hex[:24], 'type': 'message', 'role': 'assistant', 'model': model,
+        'content': [], 'stop_reason': None, 'usage': {'input_tokens': 10, 'output_tokens': 1},
+    }})
+    yield event('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                        'content_block': {'type': 'text', 'text': ''}})
+    yield event('ping', {'type': 'ping'})
+    count = 0
+    for token in tokens:
+        count += 1
+        yield event('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                            'delta': {'type': 'text_delta', 'text': token}})
+    yield event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+    yield event('message_delta', {'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'},
+                                  'usage': {'output_tokens': count}})
+    yield event('message_stop', {'type': 'message_stop'})
+
+
+def make_handler(config: StandinConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _tokens(self):
+            """Reply words, paced by TTFT and the token rate"""
+            time.sleep(config.delay(config.ttft))
+            gap = 1.0 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+            for i in range(config.tokens):
+                if i:
+                    time.sleep(config.delay(gap))
+                yield WORDS[i % len(WORDS)] + ' '
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            self.wfile.flush()
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if self.path.endswith('/chat/completions'):
+                api = 'openai'
+            elif self.path.endswith('/messages'):
+                api = 'anthropic'
+            else:
+                self.send_error(404)
+                return
+            model = body.get('model', 'standin')
+            time.sleep(config.delay(config.latency))
+
+            if not body.get('stream'):
+                text = ''.join(self._tokens())
+                if api == 'anthropic':
+                    payload = {'type': 'message', 'role': 'assistant', 'model': model,
+                               'content': [{'type': 'text', 'text': text}], 'stop_reason': 'end_turn'}
+                else:
+                    payload = {'object': 'chat.completion', 'model': model, 'choices': [
+                        {'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}
+                    ]}
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                self.server.count('responses')
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            events = anthropic_events if api == 'anthropic' else openai_events
+            try:
+                for event in events(model, self._tokens()):
+                    self._write_chunk(event.encode())
+                self.wfile.write(b'0\r\n\r\n')
+                self.wfile.flush()
+                self.server.count('completed')
+            except (BrokenPipeError, ConnectionResetError):
+                # The backend cancelled the stream
+                self.close_connection = True
+                self.server.count('aborted')
+
+    return Handler
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, port: int, config: StandinConfig):
+        super().__init__(('127.0.0.1', port), make_handler(config))
+        self.config = config
+        # Streamed replies by outcome, plus non-streaming replies
+        self.streams = {'completed': 0, 'aborted': 0, 'responses': 0}
+        self._lock = threading.Lock()
+
+    def count(self, outcome: str):
+        with self._lock:
+            self.streams[outcome] += 1
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/v1'
+
+    def start(self) -> 'StandinServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def add_timing_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--latency-ms', type=float, default=50, help='delay before response headers')
+    parser.add_argument('--ttft-ms', type=float, default=300, help='delay before the first token')
+    parser.add_argument('--tokens-per-sec', type=float, default=50)
+    parser.add_argument('--tokens', type=int, default=100, help='tokens per reply')
+    parser.add_argument('--jitter', type=float, default=0.1, help='relative random variation of delays')
+
+
+def config_from_args(args) -> StandinConfig:
+    return StandinConfig(latency=args.latency_ms / 1000, ttft=args.ttft_ms / 1000,
+                         tokens_per_sec=args.tokens_per_sec, tokens=args.tokens, jitter=args.jitter)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8090)
+    add_timing_arguments(parser)
+    args = parser.parse_args()
+
+    server = StandinServer(args.port, config_from_args(args))
+    print(f'provider stand-in on {server.base_url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
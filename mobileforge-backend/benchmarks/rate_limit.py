@@ -0,0 +1,81 @@
+"""
+Burst check for the per-provider rate limiter on /api/llm/chat.
+
+Sends a burst of concurrent chats to one provider with a small request limit
+and reports how many were admitted at once, admitted after queueing, or
+rejected with 429, plus how quickly rejections returned. Exits non-zero if a
+rejection was slow, lacked Retry-After, or the queue bound was exceeded.
+
+    python benchmarks/rate_limit.py --burst 200 --rpm 120 --max-queue-time 5
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--burst', type=int, default=200)
+    parser.add_argument('--rpm', type=int, default=120)
+    parser.add_argument('--max-queue-time', type=float, default=5.0)
+    args = parser.parse_args()
+
+    os.environ['GPT4_REQUESTS_PER_MINUTE'] = str(args.rpm)
+    os.environ.pop('OPENAI_API_KEY', None)
+    import llm_app
+    from routes import llm
+
+    limiter = llm.rate_limiters.get('gpt4')
+    limiter.max_queue_time = args.max_queue_time
+    client = llm_app.app.test_client()
+
+    start = threading.Event()
+    results = [None] * args.burst
+
+    def send(index):
+        start.wait()
+        began = time.perf_counter()
+        response = client.post('/api/llm/chat', json={
+            'message': f'burst {index}', 'provider': 'gpt4', 'cache': 'bypass'
+        }, buffered=False)
+        results[index] = (response.status_code, time.perf_counter() - began,
+                          response.headers.get('Retry-After'))
+        response.close()
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(args.burst)]
+    for thread in threads:
+        thread.start()
+    start.set()
+    for thread in threads:
+        thread.join()
+
+    admitted = [elapsed for status, elapsed, _ in results if status == 200]
+    immediate = [elapsed for elapsed in admitted if elapsed < 0.25]
+    rejected = [(elapsed, retry) for status, elapsed, retry in results if status == 429]
+    stats = limiter.stats()
+
+    print(f'burst {args.burst} at {args.rpm} rpm, max_queue {limiter.max_queue}, '
+          f'max_queue_time {args.max_queue_time:g}s')
+    print(f'admitted immediately: {len(immediate)}')
+    print(f'admitted after queueing: {len(admitted) - len(immediate)} '
+          f'(max wait {stats["wait_max_ms"]:.0f} ms)')
+    print(f'rejected 429: {len(rejected)} (full {stats["rejected_full"]}, '
+          f'wait too long {stats["rejected_wait"]}, timed out {stats["timeouts"]})')
+    if rejected:
+        slowest = max(elapsed for elapsed, _ in rejected)
+        retry_values = sorted({int(retry) for _, retry in rejected if retry})
+        print(f'slowest fast-path 429: {slowest * 1000:.1f} ms, Retry-After values: {retry_values[:5]}...')
+
+    # Requests that queued and then timed out are legitimately slow rejections
+    fast = stats['timeouts'] > 0 or all(elapsed < 0.25 for elapsed, _ in rejected)
+    ok = (fast and all(retry for _, retry in rejected)
+          and stats['wait_max_ms'] <= args.max_queue_time * 1000 + 250)
+    print('PASS' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
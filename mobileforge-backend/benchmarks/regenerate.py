@@ -0,0 +1,78 @@
+"""
+Incremental regeneration against a full generation, per framework.
+
+For each framework, generates an app, then changes one field at a time
+(app name, description, package name) and reports:
+
+    render     time to produce the files: MobileAppGenerator.generate_app
+               for a full generation, regenerate_files for the edit
+    files      files rendered
+    bytes      body size of /api/codegen/generate vs /api/codegen/regenerate
+
+Every patch is applied to the previous files and must equal a full
+generation with the new fields.
+
+    python benchmarks/regenerate.py --rounds 20000
+"""
+
+import argparse
+import sys
+import time
+
+import llm_app
+from routes.codegen import app_generator
+
+EDITS = [('app_name', 'Habit Hero'), ('description', 'A calm habit tracker with streaks and reminders'),
+         ('package_name', 'com.example.habits')]
+
+
+def per_call(fn, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=20000)
+    args = parser.parse_args()
+
+    client = llm_app.app.test_client()
+    base_fields = {'app_name': 'Habit App', 'description': 'A habit tracker'}
+    ok = True
+    print(f"{'framework':>13} {'change':>13} {'render':>9} {'files':>6} {'bytes':>8}")
+    for framework in app_generator.templates:
+        base = client.post('/api/codegen/generate', json=dict(base_fields, framework=framework))
+        base_app = base.get_json()
+        full_time = per_call(lambda: app_generator.generate_app(framework, **base_fields), args.rounds)
+        print(f"{framework:>13} {'full':>13} {full_time * 1e6:>7.1f}us {len(base_app['files']):>6} "
+              f"{len(base.get_data()):>8}")
+
+        version = base_app['template_version']
+        previous = app_generator.template_values(base_fields['app_name'], base_fields['description'])
+        for field, value in EDITS:
+            fields = dict(base_fields, **{field: value})
+            values = app_generator.template_values(fields['app_name'], fields['description'],
+                                                   fields.get('package_name'))
+            edit_time = per_call(lambda: app_generator.regenerate_files(framework, version, previous, values),
+                                 args.rounds)
+            patch = client.post('/api/codegen/regenerate', json={'app_id': base_app['id'], field: value})
+            result = patch.get_json()
+            print(f"{'':>13} {field:>13} {edit_time * 1e6:>7.1f}us {len(result['rendered']):>6} "
+                  f"{len(patch.get_data()):>8}")
+
+            files = {path: text for path, text in base_app['files'].items() if path not in result['removed']}
+            files.update(result['files'])
+            expected = app_generator.generate_app(framework, fields['app_name'], fields['description'],
+                                                  fields.get('package_name'))['files']
+            if files != expected:
+                print(f'  {framework} {field}: patched files differ from a full generation')
+                ok = False
+
+    print('patches match' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
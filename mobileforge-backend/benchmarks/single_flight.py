@@ -0,0 +1,100 @@
+"""
+Single-flight coalescing check.
+
+Fires N concurrent identical calls at SingleFlight and at
+/api/codegen/generate and reports how many times the underlying work ran.
+Exits non-zero if identical calls were not coalesced or if an error was not
+delivered to every waiter.
+
+    python benchmarks/single_flight.py --callers 50
+"""
+
+import argparse
+import threading
+import time
+
+import llm_app  # noqa: F401  (sets up sys.path for the src imports below)
+from routes import codegen
+from services.single_flight import SingleFlight
+
+
+def fire(callers: int, call) -> list:
+    start = threading.Event()
+    results = [None] * callers
+
+    def run(index):
+        start.wait()
+        try:
+            results[index] = call()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    start.set()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def check_service(callers: int) -> bool:
+    flights = SingleFlight()
+    executions = []
+
+    def work():
+        executions.append(1)
+        time.sleep(0.2)
+        return {'value': 42}
+
+    started = time.perf_counter()
+    results = fire(callers, lambda: flights.do('same-key', work))
+    elapsed = time.perf_counter() - started
+    shared = sum(1 for result, was_shared in results if was_shared)
+    print(f'service: {callers} callers, {len(executions)} execution(s), '
+          f'{shared} shared results, {elapsed:.2f}s wall')
+
+    def failing():
+        time.sleep(0.2)
+        raise RuntimeError('provider down')
+
+    errors = fire(callers, lambda: flights.do('failing-key', failing))
+    propagated = sum(1 for e in errors if isinstance(e, RuntimeError))
+    print(f'service: error delivered to {propagated}/{callers} callers')
+    return len(executions) == 1 and propagated == callers
+
+
+def check_endpoint(callers: int) -> bool:
+    executions = []
+    generate_app = codegen.app_generator.generate_app
+
+    def counted_generate_app(**kwargs):
+        executions.append(1)
+        time.sleep(0.2)
+        return generate_app(**kwargs)
+
+    codegen.app_generator.generate_app = counted_generate_app
+    try:
+        client = llm_app.app.test_client()
+        body = {'framework': 'react-native', 'app_name': 'Bench App', 'description': 'fitness tracker'}
+        responses = fire(callers, lambda: client.post('/api/codegen/generate', json=body))
+    finally:
+        codegen.app_generator.generate_app = generate_app
+
+    ok = sum(1 for r in responses if r.status_code == 200)
+    print(f'/api/codegen/generate: {callers} callers, {ok} OK, {len(executions)} generation(s)')
+    return len(executions) == 1 and ok == callers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--callers', type=int, default=20)
+    args = parser.parse_args()
+
+    passed = check_service(args.callers) and check_endpoint(args.callers)
+    print('PASS' if passed else 'FAIL')
+    raise SystemExit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+SSE framing benchmark for LLM token streams.
+
+Replays a synthetic token stream at several provider token rates through the
+legacy one-event-per-token framing and through SSEFramer at a few flush
+windows. Stream time is simulated, so the run is fast and deterministic.
+
+Then, in real time, sends bursts of tokens separated by --stall-ms pauses
+(a provider that stops mid-answer) and reports how long tokens wait in the
+framer's buffer with token-driven and timed flushing. Timed flushing must
+hold no token much longer than the flush window.
+
+    python benchmarks/sse_framing.py
+    python benchmarks/sse_framing.py --tokens 5000 --rates 20,80,200
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from services.sse import SSEFramer
+
+WORDS = ('Based on your request I recommend React Native with TypeScript for '
+         'cross-platform compatibility and Redux Toolkit for state').split()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def token_stream(count: int, gap: float, clock: FakeClock):
+    for i in range(count):
+        clock.now += gap
+        yield WORDS[i % len(WORDS)] + ' '
+
+
+def stalling_stream(bursts: int, stall: float, produced: list):
+    for _ in range(bursts):
+        for _ in range(5):
+            time.sleep(0.002)
+            produced.append(time.perf_counter())
+            yield 't '
+        time.sleep(stall)
+
+
+def hold_times(timed: bool, interval: int, bursts: int, stall: float) -> list:
+    """Seconds each token spent between the provider and its SSE event"""
+    produced = []
+    holds = []
+    for event in SSEFramer(interval).frame(stalling_stream(bursts, stall, produced), timed=timed):
+        sent = time.perf_counter()
+        count = len(json.loads(event[len('data: '):])['content']) // 2
+        holds.extend(sent - produced[i] for i in range(len(holds), len(holds) + count))
+    return holds
+
+
+def legacy_frame(tokens):
+    for token in tokens:
+        yield f"data: {json.dumps({'content': token, 'done': False})}\n\n"
+    yield f"data: {json.dumps({'content': '', 'done': True})}\n\n"
+
+
+def measure(label: str, frame, count: int, gap: float) -> dict:
+    clock = FakeClock()
+    started = time.perf_counter()
+    events = 0
+    wire_bytes = 0
+    for event in frame(token_stream(count, gap, clock), clock):
+        events += 1
+        wire_bytes += len(event.encode())
+    cpu = time.perf_counter() - started
+    return {
+        'label': label,
+        'events': events,
+        'events_per_sec': events / clock.now,
+        'bytes': wire_bytes,
+        'framing_us_per_token': cpu / count * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tokens', type=int, default=2000)
+    parser.add_argument('--rates', default='20,60,150',
+                        help='provider tokens/sec to simulate')
+    parser.add_argument('--intervals', default='30,100',
+                        help='flush windows in ms')
+    parser.add_argument('--stall-ms', type=int, default=500)
+    parser.add_argument('--bursts', type=int, default=4)
+    args = parser.parse_args()
+
+    for rate in (float(r) for r in args.rates.split(',')):
+        gap = 1.0 / rate
+        rows = [measure('per-token (legacy)', lambda tokens, clock: legacy_frame(tokens), args.tokens, gap)]
+        for interval in (int(i) for i in args.intervals.split(',')):
+            rows.append(measure(
+                f'coalesced {interval}ms',
+                lambda tokens, clock, interval=interval: SSEFramer(interval, clock=clock).frame(tokens),
+                args.tokens, gap,
+            ))
+
+        baseline = rows[0]['bytes']
+        print(f'\n{args.tokens} tokens at {rate:.0f} tokens/s')
+        print(f"{'framing':<20} {'events':>7} {'events/s':>9} {'wire bytes':>11} {'vs legacy':>10} {'us/token':>9}")
+        for row in rows:
+            print(f"{row['label']:<20} {row['events']:>7} {row['events_per_sec']:>9.1f} "
+                  f"{row['bytes']:>11} {row['bytes'] / baseline:>9.0%} {row['framing_us_per_token']:>9.2f}")
+
+    ok = True
+    print(f'\nbursts of 5 tokens with {args.stall_ms}ms provider pauses')
+    print(f"{'framing':<26} {'max hold':>9}")
+    for interval in (int(i) for i in args.intervals.split(',')):
+        for timed in (False, True):
+            worst = max(hold_times(timed, interval, args.bursts, args.stall_ms / 1000))
+            print(f"{f'coalesced {interval}ms' + (' timed' if timed else ''):<26} {worst * 1000:>7.1f}ms")
+            if timed and worst > interval / 1000 + 0.05:
+                ok = False
+    print('PASS' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Parse throughput of the incremental SSE parser against line splitting.
+
+Builds OpenAI-compatible and Anthropic streams with the provider stand-in's
+event generators (tokens include escapes and non-ASCII text), cuts them into
+random-sized chunks so events straddle chunk boundaries, and parses them with
+
+    baseline   decode to str, split lines, json.loads every data line
+    parser     services.sse_parser.StreamParser on the raw bytes
+
+Both must produce identical text; the parser is also checked with 1-byte
+chunks and with non-compact JSON. Reports MB/s for each.
+
+    python benchmarks/sse_parse.py --tokens 20000 --rounds 5
+"""
+
+import argparse
+import codecs
+import json
+import random
+import sys
+import time
+
+from provider_standin import anthropic_events, openai_events
+
+import llm_app  # noqa: F401  (sets up sys.path for the src imports below)
+from services.sse_parser import StreamParser, extract_delta
+
+TOKENS = ['Hello', ' world', ',', ' the', ' "quoted"', ' naïve', ' café', '\n', ' back\\slash', ' 🚀',
+          ' const', ' App', ' =', ' ()', ' =>', ' {', ' return', ' <View', ' />', ' }']
+
+
+def build_stream(api: str, tokens: int) -> bytes:
+    words = (TOKENS[i % len(TOKENS)] for i in range(tokens))
+    events = anthropic_events('model', words) if api == 'anthropic' else openai_events('model', words)
+    return ''.join(events).encode()
+
+
+def spaced(data: bytes) -> bytes:
+    """The same stream re-encoded with json.dumps' default (non-compact) separators"""
+    lines = []
+    for line in data.split(b'\n'):
+        if line.startswith(b'data: {'):
+            line = b'data: ' + json.dumps(json.loads(line[6:])).encode()
+        lines.append(line)
+    return b'\n'.join(lines)
+
+
+def chunk(data: bytes, seed: int, low: int = 1, high: int = 4096) -> list:
+    rng = random.Random(seed)
+    chunks = []
+    pos = 0
+    while pos < len(data):
+        size = rng.randint(low, high)
+        chunks.append(data[pos:pos + size])
+        pos += size
+    return chunks
+
+
+def baseline(api: str, chunks: list) -> str:
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    pending = ''
+    out = []
+    for piece in chunks:
+        pending += decoder.decode(piece)
+        lines = pending.split('\n')
+        pending = lines.pop()
+        for line in lines:
+            if not line.startswith('data: '):
+                continue
+            data = line[6:]
+            if data == '[DONE]':
+                return ''.join(out)
+            delta = extract_delta(api, json.loads(data))
+            if delta:
+                out.append(delta)
+    return ''.join(out)
+
+
+def incremental(api: str, chunks: list) -> str:
+    parser = StreamParser(api)
+    out = []
+    for piece in chunks:
+        out.extend(parser.feed(piece))
+        if parser.done:
+            break
+    return ''.join(out)
+
+
+def throughput(fn, api: str, chunks: list, size: int, rounds: int) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn(api, chunks)
+        best = min(best, time.perf_counter() - started)
+    return size / best / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tokens', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    ok = True
+    print(f"{'api':>10} {'size':>9} {'baseline':>10} {'parser':>10} {'speedup':>8}")
+    for api in ('openai', 'anthropic'):
+        data = build_stream(api, args.tokens)
+        chunks = chunk(data, seed=1)
+        expected = ''.join(TOKENS[i % len(TOKENS)] for i in range(args.tokens))
+        for name, fn, pieces in (('baseline', baseline, chunks), ('parser', incremental, chunks),
+                                 ('parser non-compact', incremental, chunk(spaced(data), 4)),
+                                 ('parser 1-byte', incremental, chunk(data[:20000], 2, 1, 1))):
+            text = fn(api, pieces)
+            want = expected if name != 'parser 1-byte' else baseline(api, chunk(data[:20000], 3))
+            if text != want:
+                print(f'{api} {name}: output mismatch')
+                ok = False
+        base = throughput(baseline, api, chunks, len(data), args.rounds)
+        fast = throughput(incremental, api, chunks, len(data), args.rounds)
+        print(f'{api:>10} {len(data) / 2**20:>7.1f}MB {base:>7.1f}MB/s {fast:>7.1f}MB/s {fast / base:>7.1f}x')
+
+    print('outputs match' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
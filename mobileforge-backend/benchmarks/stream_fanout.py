@@ -0,0 +1,95 @@
+"""
+Fan-out cost of one chat stream broadcast to many subscribers.
+
+A synthetic producer appends framed events to a StreamRegistry stream at a
+fixed rate while N subscribers tail it (half join late and catch up from the
+buffer). One extra subscriber reads slowly. Reports the lag of the fast
+subscribers behind the producer, CPU per delivered event and the memory held
+by the buffer and subscribers, for each subscriber count.
+
+    python benchmarks/stream_fanout.py --subscribers 1 10 100 1000
+"""
+
+import argparse
+import threading
+import time
+import tracemalloc
+
+import llm_app  # noqa: F401  (sets up sys.path for the src imports below)
+from services.sse import sse_event
+from services.stream_registry import StreamRegistry
+
+
+def run(subscribers: int, events: int, interval: float, slow_delay: float) -> dict:
+    registry = StreamRegistry()
+    produced_at = {}
+
+    def make_events(stream_id):
+        for i in range(events):
+            time.sleep(interval)
+            produced_at[i] = time.perf_counter()
+            yield sse_event({'content': f'token {i} ', 'done': False})
+        yield sse_event({'content': '', 'done': True})
+
+    tracemalloc.start()
+    cpu_started = time.process_time()
+    stream = registry.create(make_events)
+    lags = []
+    delivered = [0]
+    lock = threading.Lock()
+
+    def subscribe(slow: bool, join_delay: float):
+        time.sleep(join_delay)
+        count = 0
+        last_lag = 0.0
+        for _ in registry.subscribe(stream.stream_id):
+            count += 1
+            if slow:
+                time.sleep(slow_delay)
+        if not slow:
+            last_lag = time.perf_counter() - produced_at[events - 1]
+        with lock:
+            delivered[0] += count
+            if not slow:
+                lags.append(last_lag)
+
+    threads = [threading.Thread(target=subscribe, args=(False, 0 if i % 2 else events * interval / 2))
+               for i in range(subscribers)]
+    slow = threading.Thread(target=subscribe, args=(True, 0))
+    for thread in threads + [slow]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    fast_done = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    cpu = time.process_time() - cpu_started
+    tracemalloc.stop()
+    slow.join()
+    lags.sort()
+    return {
+        'subscribers': subscribers,
+        'p50_lag_ms': lags[len(lags) // 2] * 1000,
+        'max_lag_ms': lags[-1] * 1000,
+        'cpu_us_per_event': cpu / max(delivered[0], 1) * 1e6,
+        'peak_kib': peak / 1024,
+        'slow_behind_s': time.perf_counter() - fast_done,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--events', type=int, default=100)
+    parser.add_argument('--interval-ms', type=float, default=10)
+    parser.add_argument('--slow-delay-ms', type=float, default=30)
+    args = parser.parse_args()
+
+    print(f"{'subscribers':>11} {'p50 lag':>9} {'max lag':>9} {'cpu/event':>10} {'peak mem':>9} {'slow +s':>8}")
+    for subscribers in args.subscribers:
+        row = run(subscribers, args.events, args.interval_ms / 1000, args.slow_delay_ms / 1000)
+        print(f"{row['subscribers']:>11} {row['p50_lag_ms']:>7.1f}ms {row['max_lag_ms']:>7.1f}ms "
+              f"{row['cpu_us_per_event']:>8.1f}us {row['peak_kib']:>6.0f}KiB {row['slow_behind_s']:>7.2f}s")
+
+
+if __name__ == '__main__':
+    main()
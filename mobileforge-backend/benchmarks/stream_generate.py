@@ -0,0 +1,116 @@
+"""
+Time to first file and server memory of streamed vs buffered /generate.
+
+Serves a copy of the React Native pack padded with --files extra templates
+of --file-kb each (with placeholders, so they are rendered), from a
+temporary template, database and blob directory, and compares:
+
+    buffered   POST /api/codegen/generate, one JSON document
+    streamed   the same with stream: true, NDJSON read record by record
+
+reporting when App.js is available to the client, total time, and the
+tracemalloc peak while the server produces the response (the compiled pack
+is loaded beforehand; the client keeps only hashes of the streamed files).
+The streamed files must equal the buffered ones.
+
+    python benchmarks/stream_generate.py --files 200 --file-kb 128
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+root = tempfile.mkdtemp(prefix='mobileforge-stream-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(root, 'app.db')}")
+os.environ['GENERATED_FILES_DIR'] = os.path.join(root, 'generated')
+os.environ['TEMPLATE_PACKS_DIR'] = os.path.join(root, 'packs')
+PACKS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'template_packs')
+
+
+def build_pack(files: int, file_kb: int):
+    target = os.path.join(root, 'packs', 'react-native', '1.0.0')
+    shutil.copytree(os.path.join(PACKS_DIR, 'react-native', '1.0.0'), target)
+    line = 'export const item{index} = { name: "{{APP_NAME}}", about: "{{APP_DESCRIPTION}}" };\n'
+    for index in range(files):
+        path = os.path.join(target, 'files', 'src', 'data', f'module{index:04d}.js')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(''.join(line.replace('{index}', str(i)) for i in range(file_kb * 1024 // len(line))))
+
+
+def buffered(client, body):
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.post('/api/codegen/generate', json=body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    data = response.get_json()
+    elapsed = time.perf_counter() - started
+    return {path: content_hash(text) for path, text in data['files'].items()}, elapsed, elapsed, peak
+
+
+def streamed(client, body):
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.post('/api/codegen/generate', json=dict(body, stream=True), buffered=False)
+    files = {}
+    first = None
+    pending = b''
+    for chunk in response.response:
+        pending += chunk if isinstance(chunk, bytes) else chunk.encode('utf-8')
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            record = json.loads(line)
+            if record['type'] == 'file':
+                # A UI would render the file and let it go
+                files[record['path']] = content_hash(record['content'])
+                if record['path'] == 'App.js' and first is None:
+                    first = time.perf_counter() - started
+            elif record['type'] == 'error':
+                raise RuntimeError(record['error'])
+    response.close()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return files, first, time.perf_counter() - started, peak
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--file-kb', type=int, default=128)
+    args = parser.parse_args()
+
+    build_pack(args.files, args.file_kb)
+    import llm_app
+    from routes.codegen import app_generator
+    app_generator.load_pack('react-native')
+    client = llm_app.app.test_client()
+    body = {'framework': 'react-native', 'app_name': 'StreamApp', 'description': 'A fitness tracker'}
+
+    print(f'{args.files + 4} files, {args.files * args.file_kb / 1024:.1f}MB')
+    print(f"{'mode':>9} {'App.js':>9} {'total':>9} {'peak mem':>10}")
+    results = {}
+    for name, fn in (('buffered', buffered), ('streamed', streamed)):
+        fn(client, body)
+        files, first, total, peak = fn(client, body)
+        results[name] = files
+        print(f'{name:>9} {first * 1000:>7.1f}ms {total * 1000:>7.1f}ms {peak / 2**20:>8.1f}MB')
+
+    ok = results['buffered'] == results['streamed']
+    print('outputs match' if ok else 'FAIL')
+    shutil.rmtree(root, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Startup, lazy loading and hot reload of template packs.
+
+Copies src/template_packs into a temporary directory, adds a large asset and
+two binary files (which must be skipped) to one pack, and reports:
+
+    index      time and memory to build the metadata index (what
+               /api/codegen/frameworks needs), with no pack loaded
+    first use  time and memory to load and compile one framework's pack,
+               showing that the large asset is mapped rather than read
+    render     steady-state generate_app time from the loaded pack
+    reload     time from writing a new pack version, and from editing a
+               template in place, until the watcher serves it
+
+    python benchmarks/template_packs.py --asset-mb 8 --watch-interval 0.2
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import llm_app  # noqa: F401  (sets up sys.path for the src imports below)
+from routes.codegen import MobileAppGenerator, app_generator
+from services.template_packs import TemplatePackStore
+
+PACKS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'template_packs')
+
+
+def measured(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, allocated
+
+
+def wait_for(check, timeout: float = 10.0) -> float:
+    started = time.perf_counter()
+    while not check():
+        if time.perf_counter() - started > timeout:
+            return float('inf')
+        time.sleep(0.005)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--asset-mb', type=int, default=8)
+    parser.add_argument('--watch-interval', type=float, default=0.2)
+    parser.add_argument('--rounds', type=int, default=5000)
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as root:
+        packs_root = os.path.join(root, 'packs')
+        shutil.copytree(PACKS_DIR, packs_root)
+        asset = os.path.join(packs_root, 'pwa', '1.0.0', 'files', 'public', 'data.json')
+        with open(asset, 'w', encoding='utf-8') as f:
+            f.write('[' + ','.join(['"{{APP_NAME}} record"'] * (args.asset_mb * 1024 * 1024 // 20)) + ']')
+        binary = {'public/icon.png': b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 4,
+                  'public/font.woff2': b'wOF2' + bytes(range(128, 256)) * 4096}
+        for path, data in binary.items():
+            with open(os.path.join(packs_root, 'pwa', '1.0.0', 'files', *path.split('/')), 'wb') as f:
+                f.write(data)
+
+        store, elapsed, allocated = measured(lambda: TemplatePackStore(packs_root, args.watch_interval))
+        generator = MobileAppGenerator(store, app_generator.categories)
+        print(f'index: {len(store.frameworks())} frameworks in {elapsed * 1000:.2f}ms, '
+              f'{allocated / 1024:.1f}KB, loaded {store.stats()["loaded"]}')
+
+        for framework in store.frameworks():
+            pack, elapsed, allocated = measured(lambda: generator.load_pack(framework))
+            print(f'first use {framework}: {elapsed * 1000:.2f}ms, {allocated / 1024:.1f}KB, '
+                  f'{len(pack.compiled)} compiled, {len(pack.assets)} mapped')
+
+        for framework in store.frameworks():
+            started = time.perf_counter()
+            for _ in range(args.rounds):
+                generator.generate_app(framework, 'PackApp', 'A habit tracker')
+            print(f'render {framework}: {(time.perf_counter() - started) / args.rounds * 1e6:.1f}us')
+        files = generator.generate_app('pwa', 'PackApp', 'A habit tracker')['files']
+        if '{{APP_NAME}}' not in files['public/data.json'] or os.path.getsize(asset) != len(files['public/data.json']):
+            print('large asset was not copied verbatim')
+            ok = False
+        skipped = store.stats()['skipped'].get('pwa@1.0.0', {})
+        print(f'skipped binary files: {sorted(skipped)}')
+        if sorted(skipped) != sorted(binary) or set(binary) & set(files):
+            print('binary files were not skipped')
+            ok = False
+
+        # New version next to the old one
+        new_version = os.path.join(packs_root, 'react-native', '1.1.0')
+        shutil.copytree(os.path.join(packs_root, 'react-native', '1.0.0'), new_version)
+        with open(os.path.join(new_version, 'files', 'App.js'), 'a', encoding='utf-8') as f:
+            f.write('\n// pack 1.1.0\n')
+        latency = wait_for(lambda: generator.generate_app('react-native', 'A', 'b')['template_version'] == '1.1.0')
+        print(f'new version served after {latency * 1000:.0f}ms')
+
+        # In-place edit of a loaded pack
+        with open(os.path.join(new_version, 'files', 'App.js'), 'a', encoding='utf-8') as f:
+            f.write('// edited\n')
+        latency = wait_for(lambda: generator.generate_app('react-native', 'A', 'b')['files']['App.js']
+                           .endswith('// edited\n'))
+        print(f'edited template served after {latency * 1000:.0f}ms')
+        ok = ok and latency != float('inf') and store.versions('react-native') == ['1.0.0', '1.1.0']
+        print(f"reloads {store.stats()['reloads']}, loads {store.stats()['loads']}")
+
+    print('PASS' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Render cost of MobileAppGenerator templates: chained replaces vs compiled.
+
+    replace    the previous renderer: five str.replace passes per file and a
+               json.dumps of the dependencies per file
+    compiled   services.template_renderer: one join over precompiled
+               segments, values escaped once per file type
+
+For each framework reports renders/sec of the whole file set and, from
+tracemalloc, the bytes kept by the rendered files and the peak bytes
+allocated during one render (intermediate strings included). Outputs
+must be identical for a plain description (escaping leaves it unchanged);
+a description with quotes, ampersands and braces is checked to still parse
+as JSON / XML in the rendered files.
+
+    python benchmarks/template_render.py --rounds 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import xml.dom.minidom
+
+import llm_app  # noqa: F401  (sets up sys.path for the src imports below)
+from routes.codegen import app_generator
+from services.template_renderer import render_files
+
+PLAIN = ('A habit tracker with daily streaks, reminders and weekly charts for runners '
+         'who train for marathons (beta)')
+SOURCES = {}
+TRICKY = 'Tom & Jerry\'s "best" <chat> app {v2} costs $5\\month\nline two'
+
+
+def sources(framework: str) -> dict:
+    """Raw template files of a framework's pack, read once"""
+    if framework not in SOURCES:
+        files_root = os.path.join(app_generator.templates[framework].path, 'files')
+        SOURCES[framework] = {}
+        for path, _, _ in app_generator.templates[framework].files:
+            with open(os.path.join(files_root, path), 'r', encoding='utf-8', newline='') as f:
+                SOURCES[framework][path] = f.read()
+    return SOURCES[framework]
+
+
+def legacy(framework: str, values: dict) -> dict:
+    pack = app_generator.templates[framework]
+    files = {}
+    for path, content in sources(framework).items():
+        content = content.replace('{{APP_NAME}}', values['APP_NAME'])
+        content = content.replace('{{APP_DESCRIPTION}}', values['APP_DESCRIPTION'])
+        content = content.replace('{{APP_PACKAGE_NAME}}', values['APP_PACKAGE_NAME'])
+        content = content.replace('{{MAIN_CONTENT}}', values['MAIN_CONTENT'])
+        content = content.replace('{{DEPENDENCIES}}', json.dumps(pack.dependencies, indent=2))
+        files[path] = content
+    return files
+
+
+def compiled(framework: str, values: dict) -> dict:
+    return render_files(app_generator.load_pack(framework).compiled, values)
+
+
+def values_for(description: str) -> dict:
+    return {
+        'APP_NAME': 'HabitApp',
+        'APP_DESCRIPTION': description,
+        'APP_PACKAGE_NAME': 'habitapp',
+        'MAIN_CONTENT': app_generator.generate_app_content('default', description),
+    }
+
+
+def rate(fn, framework: str, values: dict, rounds: int) -> float:
+    best = float('inf')
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            fn(framework, values)
+        best = min(best, time.perf_counter() - started)
+    return rounds / best
+
+
+def allocations(fn, framework: str, values: dict):
+    """(bytes kept by the result, peak bytes allocated) for one render, from tracemalloc"""
+    fn(framework, values)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    result = fn(framework, values)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current - base, peak - base
+
+
+def check_escaping(framework: str) -> list:
+    errors = []
+    for path, content in compiled(framework, values_for(TRICKY)).items():
+        try:
+            if path.endswith('.json'):
+                json.loads(content)
+            elif path.endswith(('.xml', '.plist')):
+                xml.dom.minidom.parseString(content)
+        except Exception as e:
+            errors.append(f'{framework} {path}: {e}')
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    ok = True
+    values = values_for(PLAIN)
+    print(f"{'framework':>13} {'renderer':>9} {'renders/s':>10} {'result':>9} {'peak':>9}")
+    for framework in app_generator.templates:
+        if legacy(framework, values) != compiled(framework, values):
+            print(f'{framework}: compiled output differs from the replace renderer')
+            ok = False
+        for problem in check_escaping(framework):
+            print(problem)
+            ok = False
+        for name, fn in (('replace', legacy), ('compiled', compiled)):
+            kept, peak = allocations(fn, framework, values)
+            print(f'{framework:>13} {name:>9} {rate(fn, framework, values, args.rounds):>10.0f} '
+                  f'{kept / 1024:>6.1f}KiB {peak / 1024:>6.1f}KiB')
+
+    print('outputs match' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Memory and throughput of the streamed ZIP download against zipfile + BytesIO.
+
+Builds projects of increasing size in a temporary BlobStore (generated
+boilerplate plus large asset-like files past the entry cache limit) and for
+each one reports:
+
+    buffered   zipfile.ZipFile writing into io.BytesIO (the usual approach)
+    streamed   services.zip_stream.ZipPlan without an entry cache, with a
+               cold cache, and with the cache warm
+
+with the tracemalloc peak while producing the archive (the cold run's peak
+includes what it leaves in the cache) and MB/s. The streamed
+archive is checked with zipfile.testzip, every file is compared with the
+store, and random byte ranges must equal the same slice of the full archive.
+
+    python benchmarks/zip_download.py --sizes-mb 1 16 64
+"""
+
+import argparse
+import io
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+import llm_app  # noqa: F401  (sets up sys.path for the src imports below)
+from routes.codegen import app_generator
+from services.blob_store import BlobStore
+from services.zip_stream import EntryCache, ZipPlan
+
+ASSET_BYTES = 4 * 1024 * 1024
+
+
+def build_project(store: BlobStore, app_id: str, size_mb: int) -> dict:
+    files = dict(app_generator.generate_app('react-native', 'BenchApp', f'Project of {size_mb}MB')['files'])
+    rng = random.Random(size_mb)
+    remaining = size_mb * 1024 * 1024
+    index = 0
+    while remaining > 0:
+        size = min(remaining, ASSET_BYTES)
+        # Half-compressible text, like bundled JS or JSON fixtures
+        words = [f'token{rng.randrange(5000)}' for _ in range(size // 20)]
+        files[f'assets/data{index}.txt'] = ' '.join(words)[:size]
+        remaining -= size
+        index += 1
+    store.put_app(app_id, files)
+    return files
+
+
+def buffered(store: BlobStore, app_id: str) -> int:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for path, text in store.get_files(app_id).items():
+            archive.writestr(path, text)
+    return len(buffer.getvalue())
+
+
+def streamed(store: BlobStore, app_id: str, cache: EntryCache) -> int:
+    plan = ZipPlan(list(store.manifest(app_id).items()), store.open_blob, cache)
+    return sum(len(chunk) for chunk in plan.iter_bytes())
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn(*args)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def check(store: BlobStore, app_id: str, files: dict, cache: EntryCache) -> list:
+    plan = ZipPlan(list(store.manifest(app_id).items()), store.open_blob, cache)
+    data = b''.join(plan.iter_bytes())
+    problems = []
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    if archive.testzip() is not None:
+        problems.append('testzip failed')
+    for path, text in files.items():
+        if archive.read(path).decode('utf-8') != text:
+            problems.append(f'{path} differs')
+    rng = random.Random(7)
+    for _ in range(20):
+        start = rng.randrange(plan.size)
+        stop = rng.randrange(start, plan.size) + 1
+        if b''.join(plan.iter_bytes(start, stop)) != data[start:stop]:
+            problems.append(f'range {start}-{stop} differs')
+    again = ZipPlan(list(store.manifest(app_id).items()), store.open_blob, EntryCache())
+    if b''.join(again.iter_bytes()) != data:
+        problems.append('archive is not deterministic')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes-mb', type=int, nargs='+', default=[1, 16, 64])
+    args = parser.parse_args()
+
+    ok = True
+    print(f"{'project':>8} {'mode':>17} {'archive':>9} {'MB/s':>7} {'peak mem':>10}")
+    with tempfile.TemporaryDirectory() as root:
+        store = BlobStore(root)
+        for size_mb in args.sizes_mb:
+            app_id = f'bench_{size_mb}'
+            files = build_project(store, app_id, size_mb)
+            cache = EntryCache()
+            rows = [('buffered', buffered, (store, app_id)),
+                    ('streamed no cache', streamed, (store, app_id, EntryCache(0))),
+                    ('streamed cold', streamed, (store, app_id, cache)),
+                    ('streamed cached', streamed, (store, app_id, cache))]
+            for name, fn, fn_args in rows:
+                size, elapsed, peak = measure(fn, *fn_args)
+                print(f'{size_mb:>6}MB {name:>17} {size / 2**20:>7.1f}MB {size_mb / elapsed:>7.1f} '
+                      f'{peak / 2**20:>8.2f}MB')
+            for problem in check(store, app_id, files, cache):
+                print(f'{size_mb}MB: {problem}')
+                ok = False
+
+    print('archives valid' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
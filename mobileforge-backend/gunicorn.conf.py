@@ -0,0 +1,34 @@
+"""
+Gunicorn configuration for the MobileForge backend.
+
+Uses gevent workers so that long-lived SSE streams (/api/llm/chat) yield the
+worker while they wait on the provider instead of pinning an OS thread each.
+A single worker process can hold ``worker_connections`` open streams.
+"""
+
+import os
+
+chdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+wsgi_app = 'main:app'
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', '1'))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+# Streams can legitimately stay open for minutes; the timeout only governs
+# worker heartbeats for async workers.
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 75
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # psycopg2 waits on its socket in C, which would block every stream in a
+    # gevent worker for the length of each query; make it yield instead
+    if worker_class == 'gevent' and os.getenv('DATABASE_URL', '').startswith('postgresql'):
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
@@ -34,8 +34,15 @@ app.register_blueprint(elbia_bp, url_prefix='/api/domains')
 app.register_blueprint(git_bp, url_prefix='/api/git')
 
 # uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# Replicas must share one database (e.g. DATABASE_URL=postgresql://...); the
+# SQLite default suits a single instance
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+    'DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    # Wait for other writers' locks instead of failing with "database is locked"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
 db.init_app(app)
 with app.app_context():
     db.create_all()
@@ -0,0 +1,52 @@
+import json
+import time
+import uuid
+
+from src.models.user import db
+
+class GeneratedApp(db.Model):
+    """A generated app; its files live in the blob store, referenced by manifest"""
+    __tablename__ = 'generated_app'
+    __table_args__ = (
+        db.Index('ix_generated_app_owner_created', 'owner', 'created_at'),
+    )
+
+    # app_<uuid4 hex>: unique without coordinating between replicas
+    id = db.Column(db.String(40), primary_key=True, default=lambda: new_app_id())
+    owner = db.Column(db.String(80), nullable=False, default='anonymous')
+    created_at = db.Column(db.Float, nullable=False, index=True, default=time.time)
+    framework = db.Column(db.String(40), nullable=False)
+    app_name = db.Column(db.String(120), nullable=False)
+    package_name = db.Column(db.String(120), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    # {"<path>": "<sha256>", ...}
+    manifest_json = db.Column(db.Text, nullable=False)
+    # dependencies, build_commands and deployment_info
+    details_json = db.Column(db.Text, nullable=False)
+
+    def __repr__(self):
+        return f'<GeneratedApp {self.id}>'
+
+    @property
+    def manifest(self):
+        return json.loads(self.manifest_json)
+
+    def to_dict(self, files=None):
+        data = {
+            'id': self.id,
+            'owner': self.owner,
+            'created_at': self.created_at,
+            'framework': self.framework,
+            'app_name': self.app_name,
+            'package_name': self.package_name,
+            'description': self.description,
+            'manifest': self.manifest,
+            'status': 'generated'
+        }
+        data.update(json.loads(self.details_json))
+        if files is not None:
+            data['files'] = files
+        return data
+
+def new_app_id():
+    return f'app_{uuid.uuid4().hex}'
@@ -1,633 +1,709 @@
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 import json
 import time
 import os
-import tempfile
-import zipfile
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+from src.models.user import db
+from src.models.generated_app import GeneratedApp, new_app_id
+from services.single_flight import DEFAULT_MAX_WAIT, SingleFlight, SingleFlightTimeout, request_key
+from services.app_categories import CategoryMatcher, load_categories
+from services.template_packs import DEFAULT_WATCH_INTERVAL, LoadedPack, PackInfo, TemplatePackStore
+from services.blob_store import BlobStore
+from services.zip_stream import DEFAULT_CACHE_BYTES, EntryCache, ZipPlan, archive_etag
+from services import prefetch
+from services.prefetch import PrefetchCancelled, PrefetchRegistry, session_token
 
 codegen_bp = Blueprint('codegen', __name__)
 
 # Mobile app templates and code generators
 class MobileAppGenerator:
-    def __init__(self):
-        self.templates = {
-            'react-native': {
-                'name': 'React Native',
-                'description': 'Cross-platform mobile app with React Native',
-                'files': self._get_react_native_template(),
-                'dependencies': {
-                    'react': '^18.2.0',
-                    'react-native': '^0.72.0',
-                    '@react-navigation/native': '^6.1.0',
-                    '@react-navigation/stack': '^6.3.0',
-                    'react-native-vector-icons': '^10.0.0'
-                }
-            },
-            'flutter': {
-                'name': 'Flutter',
-                'description': 'Cross-platform mobile app with Flutter',
-                'files': self._get_flutter_template(),
-                'dependencies': {
-                    'flutter': 'sdk: flutter',
-                    'cupertino_icons': '^1.0.2',
-                    'http': '^0.13.5',
-                    'provider': '^6.0.5'
-                }
-            },
-            'pwa': {
-                'name': 'Progressive Web App',
-                'description': 'Web-based mobile app with PWA features',
-                'files': self._get_pwa_template(),
-                'dependencies': {
-                    'react': '^18.2.0',
-                    'react-dom': '^18.2.0',
-                    'workbox-webpack-plugin': '^6.5.4',
-                    '@types/react': '^18.0.0'
-                }
-            }
-        }
+    def __init__(self, packs: TemplatePackStore, categories: CategoryMatcher):
+        # Framework templates, loaded and compiled on first use of each
+        self.packs = packs
+        # App categories, detected from the description in one pass
+        self.categories = categories
     
-    def _get_react_native_template(self) -> Dict[str, str]:
-        return {
-            'App.js': '''import React from 'react';
-import {
-  SafeAreaView,
-  ScrollView,
-  StatusBar,
-  StyleSheet,
-  Text,
-  View,
-  TouchableOpacity,
-} from 'react-native';
-
-function App() {
-  return (
-    <SafeAreaView style={styles.container}>
-      <StatusBar barStyle="dark-content" />
-      <ScrollView contentInsetAdjustmentBehavior="automatic">
-        <View style={styles.header}>
-          <Text style={styles.title}>{{APP_NAME}}</Text>
-          <Text style={styles.subtitle}>{{APP_DESCRIPTION}}</Text>
-        </View>
-        
-        <View style={styles.content}>
-          {{MAIN_CONTENT}}
-        </View>
-      </ScrollView>
-    </SafeAreaView>
-  );
-}
-
-const styles = StyleSheet.create({
-  container: {
-    flex: 1,
-    backgroundColor: '#f8f9fa',
-  },
-  header: {
-    padding: 20,
-    alignItems: 'center',
-    backgroundColor: '#007bff',
-  },
-  title: {
-    fontSize: 24,
-    fontWeight: 'bold',
-    color: '#ffffff',
-    marginBottom: 8,
-  },
-  subtitle: {
-    fontSize: 16,
-    color: '#e3f2fd',
-    textAlign: 'center',
-  },
-  content: {
-    padding: 20,
-  },
-});
-
-export default App;''',
-            
-            'package.json': '''{
-  "name": "{{APP_PACKAGE_NAME}}",
-  "version": "1.0.0",
-  "private": true,
-  "scripts": {
-    "android": "react-native run-android",
-    "ios": "react-native run-ios",
-    "start": "react-native start",
-    "test": "jest",
-    "lint": "eslint ."
-  },
-  "dependencies": {{DEPENDENCIES}},
-  "devDependencies": {
-    "@babel/core": "^7.20.0",
-    "@babel/preset-env": "^7.20.0",
-    "@babel/runtime": "^7.20.0",
-    "babel-jest": "^29.2.1",
-    "eslint": "^8.19.0",
-    "jest": "^29.2.1",
-    "metro-react-native-babel-preset": "0.73.9"
-  },
-  "jest": {
-    "preset": "react-native"
-  }
-}''',
-            
-            'android/app/src/main/AndroidManifest.xml': '''<manifest xmlns:android="http://schemas.android.com/apk/res/android">
-    <uses-permission android:name="android.permission.INTERNET" />
-    <uses-permission android:name="android.permission.CAMERA" />
-    <uses-permission android:name="android.permission.WRITE_EXTERNAL_STORAGE"/>
-    
-    <application
-      android:name=".MainApplication"
-      android:label="@string/app_name"
-      android:icon="@mipmap/ic_launcher"
-      android:roundIcon="@mipmap/ic_launcher_round"
-      android:allowBackup="false"
-      android:theme="@style/AppTheme">
-      <activity
-        android:name=".MainActivity"
-        android:label="@string/app_name"
-        android:configChanges="keyboard|keyboardHidden|orientation|screenLayout|screenSize|smallestScreenSize|uiMode"
-        android:launchMode="singleTask"
-        android:windowSoftInputMode="adjustResize"
-        android:exported="true">
-        <intent-filter>
-            <action android:name="android.intent.action.MAIN" />
-            <category android:name="android.intent.category.LAUNCHER" />
-        </intent-filter>
-      </activity>
-    </application>
-</manifest>''',
-            
-            'ios/Info.plist': '''<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
-<plist version="1.0">
-<dict>
-    <key>CFBundleDevelopmentRegion</key>
-    <string>en</string>
-    <key>CFBundleDisplayName</key>
-    <string>{{APP_NAME}}</string>
-    <key>CFBundleExecutable</key>
-    <string>$(EXECUTABLE_NAME)</string>
-    <key>CFBundleIdentifier</key>
-    <string>$(PRODUCT_BUNDLE_IDENTIFIER)</string>
-    <key>CFBundleInfoDictionaryVersion</key>
-    <string>6.0</string>
-    <key>CFBundleName</key>
-    <string>$(PRODUCT_NAME)</string>
-    <key>CFBundlePackageType</key>
-    <string>APPL</string>
-    <key>CFBundleShortVersionString</key>
-    <string>1.0</string>
-    <key>CFBundleVersion</key>
-    <string>1</string>
-    <key>LSRequiresIPhoneOS</key>
-    <true/>
-    <key>NSAppTransportSecurity</key>
-    <dict>
-        <key>NSExceptionDomains</key>
-        <dict>
-            <key>localhost</key>
-            <dict>
-                <key>NSExceptionAllowsInsecureHTTPLoads</key>
-                <true/>
-            </dict>
-        </dict>
-    </dict>
-    <key>UIRequiredDeviceCapabilities</key>
-    <array>
-        <string>armv7</string>
-    </array>
-    <key>UISupportedInterfaceOrientations</key>
-    <array>
-        <string>UIInterfaceOrientationPortrait</string>
-        <string>UIInterfaceOrientationLandscapeLeft</string>
-        <string>UIInterfaceOrientationLandscapeRight</string>
-    </array>
-</dict>
-</plist>'''
-        }
+    @property
+    def templates(self) -> Dict[str, PackInfo]:
+        """Newest template pack of every framework; reads no template files"""
+        return self.packs.frameworks()
     
-    def _get_flutter_template(self) -> Dict[str, str]:
-        return {
-            'lib/main.dart': '''import 'package:flutter/material.dart';
-
-void main() {
-  runApp(MyApp());
-}
-
-class MyApp extends StatelessWidget {
-  @override
-  Widget build(BuildContext context) {
-    return MaterialApp(
-      title: '{{APP_NAME}}',
-      theme: ThemeData(
-        primarySwatch: Colors.blue,
-        visualDensity: VisualDensity.adaptivePlatformDensity,
-      ),
-      home: MyHomePage(title: '{{APP_NAME}}'),
-    );
-  }
-}
-
-class MyHomePage extends StatefulWidget {
-  MyHomePage({Key? key, required this.title}) : super(key: key);
-  final String title;
-
-  @override
-  _MyHomePageState createState() => _MyHomePageState();
-}
-
-class _MyHomePageState extends State<MyHomePage> {
-  @override
-  Widget build(BuildContext context) {
-    return Scaffold(
-      appBar: AppBar(
-        title: Text(widget.title),
-        backgroundColor: Colors.blue,
-      ),
-      body: Center(
-        child: Column(
-          mainAxisAlignment: MainAxisAlignment.center,
-          children: <Widget>[
-            Text(
-              '{{APP_DESCRIPTION}}',
-              style: Theme.of(context).textTheme.headlineSmall,
-              textAlign: TextAlign.center,
-            ),
-            SizedBox(height: 20),
-            {{MAIN_CONTENT}}
-          ],
-        ),
-      ),
-    );
-  }
-}''',
-            
-            'pubspec.yaml': '''name: {{APP_PACKAGE_NAME}}
-description: {{APP_DESCRIPTION}}
-version: 1.0.0+1
-
-environment:
-  sdk: ">=2.17.0 <4.0.0"
-
-dependencies:
-  flutter:
-    sdk: flutter
-  {{DEPENDENCIES}}
-
-dev_dependencies:
-  flutter_test:
-    sdk: flutter
-  flutter_lints: ^2.0.0
-
-flutter:
-  uses-material-design: true''',
-            
-            'android/app/src/main/AndroidManifest.xml': '''<manifest xmlns:android="http://schemas.android.com/apk/res/android">
-    <uses-permission android:name="android.permission.INTERNET" />
-    
-    <application
-        android:label="{{APP_NAME}}"
-        android:name="${applicationName}"
-        android:icon="@mipmap/ic_launcher">
-        <activity
-            android:name=".MainActivity"
-            android:exported="true"
-            android:launchMode="singleTop"
-            android:theme="@style/LaunchTheme"
-            android:configChanges="orientation|keyboardHidden|keyboard|screenSize|smallestScreenSize|locale|layoutDirection|fontScale|screenLayout|density|uiMode"
-            android:hardwareAccelerated="true"
-            android:windowSoftInputMode="adjustResize">
-            <meta-data
-              android:name="io.flutter.embedding.android.NormalTheme"
-              android:resource="@style/NormalTheme"
-              />
-            <intent-filter android:autoVerify="true">
-                <action android:name="android.intent.action.MAIN"/>
-                <category android:name="android.intent.category.LAUNCHER"/>
-            </intent-filter>
-        </activity>
-    </application>
-</manifest>'''
-        }
+    def detect_framework(self, description: str, default: str = 'react-native') -> str:
+        """Pick the framework a description asks for, or default when it names none"""
+        text = description.lower()
+        for framework, pack in self.templates.items():
+            if any(alias in text for alias in pack.aliases):
+                return framework
+        return default
     
-    def _get_pwa_template(self) -> Dict[str, str]:
-        return {
-            'src/App.js': '''import React from 'react';
-import './App.css';
-
-function App() {
-  return (
-    <div className="App">
-      <header className="App-header">
-        <h1>{{APP_NAME}}</h1>
-        <p>{{APP_DESCRIPTION}}</p>
-      </header>
-      <main className="App-main">
-        {{MAIN_CONTENT}}
-      </main>
-    </div>
-  );
-}
-
-export default App;''',
-            
-            'src/App.css': '''.App {
-  text-align: center;
-  min-height: 100vh;
-  display: flex;
-  flex-direction: column;
-}
-
-.App-header {
-  background-color: #282c34;
-  padding: 20px;
-  color: white;
-}
-
-.App-main {
-  flex: 1;
-  padding: 20px;
-  background-color: #f5f5f5;
-}
-
-.App h1 {
-  margin: 0 0 10px 0;
-  font-size: 2.5rem;
-}
-
-.App p {
-  margin: 0;
-  font-size: 1.2rem;
-  opacity: 0.8;
-}''',
-            
-            'public/manifest.json': '''{
-  "short_name": "{{APP_NAME}}",
-  "name": "{{APP_NAME}} - {{APP_DESCRIPTION}}",
-  "icons": [
-    {
-      "src": "favicon.ico",
-      "sizes": "64x64 32x32 24x24 16x16",
-      "type": "image/x-icon"
-    }
-  ],
-  "start_url": ".",
-  "display": "standalone",
-  "theme_color": "#000000",
-  "background_color": "#ffffff"
-}''',
-            
-            'package.json': '''{
-  "name": "{{APP_PACKAGE_NAME}}",
-  "version": "1.0.0",
-  "private": true,
-  "dependencies": {{DEPENDENCIES}},
-  "scripts": {
-    "start": "react-scripts start",
-    "build": "react-scripts build",
-    "test": "react-scripts test",
-    "eject": "react-scripts eject"
-  },
-  "eslintConfig": {
-    "extends": [
-      "react-app",
-      "react-app/jest"
-    ]
-  },
-  "browserslist": {
-    "production": [
-      ">0.2%",
-      "not dead",
-      "not op_mini all"
-    ],
-    "development": [
-      "last 1 chrome version",
-      "last 1 firefox version",
-      "last 1 safari version"
-    ]
-  }
-}'''
-        }
+    def detect_app_type(self, description: str) -> str:
+        """Best matching app category for a description"""
+        return self.categories.detect(description)
     
     def generate_app_content(self, app_type: str, description: str) -> str:
         """Generate specific content based on app type and description"""
-        content_generators = {
-            'fitness': self._generate_fitness_content,
-            'social': self._generate_social_content,
-            'ecommerce': self._generate_ecommerce_content,
-            'productivity': self._generate_productivity_content,
-            'default': self._generate_default_content
-        }
-        
-        # Detect app type from description
-        detected_type = 'default'
-        for app_type_key in content_generators.keys():
-            if app_type_key in description.lower():
-                detected_type = app_type_key
-                break
-        
-        return content_generators[detected_type](description)
-    
-    def _generate_fitness_content(self, description: str) -> str:
-        return '''<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>Start Workout</Text>
-</TouchableOpacity>
-<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>Track Progress</Text>
-</TouchableOpacity>
-<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>View Statistics</Text>
-</TouchableOpacity>'''
-    
-    def _generate_social_content(self, description: str) -> str:
-        return '''<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>Create Post</Text>
-</TouchableOpacity>
-<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>View Feed</Text>
-</TouchableOpacity>
-<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>Messages</Text>
-</TouchableOpacity>'''
-    
-    def _generate_ecommerce_content(self, description: str) -> str:
-        return '''<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>Browse Products</Text>
-</TouchableOpacity>
-<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>Shopping Cart</Text>
-</TouchableOpacity>
-<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>My Orders</Text>
-</TouchableOpacity>'''
-    
-    def _generate_productivity_content(self, description: str) -> str:
-        return '''<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>Add Task</Text>
-</TouchableOpacity>
-<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>View Projects</Text>
-</TouchableOpacity>
-<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>Time Tracker</Text>
-</TouchableOpacity>'''
-    
-    def _generate_default_content(self, description: str) -> str:
-        return '''<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>Get Started</Text>
-</TouchableOpacity>
-<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>Explore Features</Text>
-</TouchableOpacity>
-<TouchableOpacity style={styles.button}>
-  <Text style={styles.buttonText}>Settings</Text>
-</TouchableOpacity>'''
+        return '\n'.join(
+            '<TouchableOpacity style={styles.button}>\n'
+            f'  <Text style={{styles.buttonText}}>{action}</Text>\n'
+            '</TouchableOpacity>'
+            for action in self.categories.get(app_type).actions
+        )
     
-    def generate_app(self, framework: str, app_name: str, description: str, package_name: str = None) -> Dict[str, Any]:
-        """Generate a complete mobile app with all files"""
-        if framework not in self.templates:
-            raise ValueError(f"Unsupported framework: {framework}")
-        
-        template = self.templates[framework]
-        
+    def default_package_name(self, app_name: str) -> str:
+        return app_name.lower().replace(' ', '').replace('-', '')
+    
+    def template_values(self, app_name: str, description: str, package_name: str = None,
+                        app_type: str = None) -> Dict[str, str]:
+        """Placeholder values for a set of app fields"""
         # Generate package name if not provided
         if not package_name:
-            package_name = app_name.lower().replace(' ', '').replace('-', '')
-        
-        # Generate main content based on description
-        main_content = self.generate_app_content('default', description)
-        
-        # Process template files
-        generated_files = {}
-        for file_path, file_content in template['files'].items():
-            processed_content = file_content.replace('{{APP_NAME}}', app_name)
-            processed_content = processed_content.replace('{{APP_DESCRIPTION}}', description)
-            processed_content = processed_content.replace('{{APP_PACKAGE_NAME}}', package_name)
-            processed_content = processed_content.replace('{{MAIN_CONTENT}}', main_content)
-            processed_content = processed_content.replace('{{DEPENDENCIES}}', json.dumps(template['dependencies'], indent=2))
-            
-            generated_files[file_path] = processed_content
+            package_name = self.default_package_name(app_name)
+        if app_type is None:
+            app_type = self.detect_app_type(description)
         
         return {
-            'framework': framework,
-            'app_name': app_name,
-            'description': description,
-            'package_name': package_name,
-            'files': generated_files,
-            'dependencies': template['dependencies'],
-            'build_commands': self._get_build_commands(framework),
-            'deployment_info': self._get_deployment_info(framework)
+            'APP_NAME': app_name,
+            'APP_DESCRIPTION': description,
+            'APP_PACKAGE_NAME': package_name,
+            # Generate main content based on description
+            'MAIN_CONTENT': self.generate_app_content(app_type, description)
         }
     
-    def _get_build_commands(self, framework: str) -> List[str]:
-        commands = {
-            'react-native': [
-                'npm install',
-                'npx react-native run-android',
-                'npx react-native run-ios'
-            ],
-            'flutter': [
-                'flutter pub get',
-                'flutter build apk',
-                'flutter build ios'
-            ],
-            'pwa': [
-                'npm install',
-                'npm run build',
-                'npm run start'
-            ]
+    def load_pack(self, framework: str, version: str = None) -> LoadedPack:
+        try:
+            return self.packs.load(framework, version)
+        except KeyError:
+            if version is None:
+                raise ValueError(f"Unsupported framework: {framework}") from None
+            raise ValueError(f"Unknown {framework} template version: {version}") from None
+    
+    def affected_files(self, pack: LoadedPack, previous: Dict[str, str], values: Dict[str, str]) -> List[str]:
+        """Files whose output can differ between two sets of placeholder values"""
+        changed = {name for name, value in values.items() if previous.get(name) != value}
+        return [path for path, names in pack.file_dependencies.items() if names & changed]
+    
+    def regenerate_files(self, framework: str, version: str, previous: Dict[str, str],
+                         values: Dict[str, str]) -> Dict[str, str]:
+        """Render, with the pack version an app was made from, only the files
+        that use a placeholder whose value changed"""
+        pack = self.load_pack(framework, version)
+        return pack.render(values, self.affected_files(pack, previous, values))
+    
+    def build_model(self, app_name: str, description: str, package_name: str = None) -> 'AppModel':
+        """Parse the description once into a framework-independent app"""
+        app_type = self.detect_app_type(description)
+        values = self.template_values(app_name, description, package_name, app_type)
+        screens = [{'name': 'Home', 'actions': list(self.categories.get(app_type).actions)}]
+        return AppModel(app_name, description, values['APP_PACKAGE_NAME'], app_type, screens, values)
+    
+    def app_details(self, model: 'AppModel', pack: LoadedPack) -> Dict[str, Any]:
+        """Everything about a generated app except its files"""
+        return {
+            'framework': pack.info.framework,
+            'app_name': model.app_name,
+            'description': model.description,
+            'package_name': model.package_name,
+            'app_type': model.app_type,
+            'template_version': pack.info.version,
+            'dependencies': pack.info.dependencies,
+            'build_commands': pack.info.build_commands,
+            'deployment_info': pack.info.deployment_info
         }
-        return commands.get(framework, [])
-    
-    def _get_deployment_info(self, framework: str) -> Dict[str, Any]:
-        deployment_info = {
-            'react-native': {
-                'platforms': ['Android', 'iOS'],
-                'stores': ['Google Play Store', 'Apple App Store'],
-                'build_outputs': ['app-release.apk', 'app.ipa']
-            },
-            'flutter': {
-                'platforms': ['Android', 'iOS', 'Web'],
-                'stores': ['Google Play Store', 'Apple App Store', 'Web'],
-                'build_outputs': ['app-release.apk', 'Runner.app', 'web/']
-            },
-            'pwa': {
-                'platforms': ['Web', 'Mobile Web'],
-                'stores': ['Web', 'PWA Stores'],
-                'build_outputs': ['build/']
-            }
+    
+    def render_app(self, model: 'AppModel', framework: str) -> Dict[str, Any]:
+        """Render an app model with one framework's template pack"""
+        pack = self.load_pack(framework)
+        
+        # Render template files in one pass, escaping values per file type
+        return dict(self.app_details(model, pack), files=pack.render(model.values))
+    
+    def generate_app(self, framework: str, app_name: str, description: str, package_name: str = None) -> Dict[str, Any]:
+        """Generate a complete mobile app with all files"""
+        self.load_pack(framework)
+        return self.render_app(self.build_model(app_name, description, package_name), framework)
+
+class AppModel:
+    """An app as parsed from its description, before any framework is applied"""
+    
+    def __init__(self, app_name: str, description: str, package_name: str, app_type: str,
+                 screens: List[Dict[str, Any]], values: Dict[str, str]):
+        self.app_name = app_name
+        self.description = description
+        self.package_name = package_name
+        self.app_type = app_type
+        self.screens = screens
+        # Placeholder values shared by every framework's templates
+        self.values = values
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'app_name': self.app_name,
+            'description': self.description,
+            'package_name': self.package_name,
+            'app_type': self.app_type,
+            'screens': self.screens
         }
-        return deployment_info.get(framework, {})
+
+# Template packs: src/template_packs/<framework>/<version>/, reloaded on change
+template_packs = TemplatePackStore(
+    os.getenv('TEMPLATE_PACKS_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                 'template_packs')),
+    watch_interval=float(os.getenv('TEMPLATE_PACKS_WATCH_INTERVAL', DEFAULT_WATCH_INTERVAL))
+)
 
 # Initialize the generator
-app_generator = MobileAppGenerator()
+app_generator = MobileAppGenerator(template_packs, load_categories(os.getenv(
+    'APP_CATEGORIES_FILE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app_categories.json')
+)))
+
+# Frameworks of one multi-framework /generate request render in parallel here
+render_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv('CODEGEN_RENDER_WORKERS', 8)),
+    thread_name_prefix='codegen-render'
+)
+
+# Concurrent identical /generate requests share one generation
+generation_flights = SingleFlight(max_wait=float(os.getenv('SINGLE_FLIGHT_MAX_WAIT', DEFAULT_MAX_WAIT)))
+
+DATA_DIR = os.getenv(
+    'MOBILEFORGE_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database')
+)
+
+# Generated files stored once per distinct content, with a path -> hash manifest per app
+blob_store = BlobStore(os.getenv('GENERATED_FILES_DIR', os.path.join(DATA_DIR, 'generated')))
+
+# Compressed ZIP entries by blob hash; boilerplate shared across apps is deflated once
+zip_entries = EntryCache(int(os.getenv('DOWNLOAD_CACHE_BYTES', DEFAULT_CACHE_BYTES)))
+
+# Generations started from partial descriptions, claimed by the final /generate
+app_prefetches = PrefetchRegistry(
+    workers=int(os.getenv('PREFETCH_WORKERS', prefetch.DEFAULT_WORKERS)),
+    max_per_session=int(os.getenv('PREFETCH_MAX_PER_SESSION', prefetch.DEFAULT_MAX_PER_SESSION)),
+    ttl=float(os.getenv('PREFETCH_TTL', prefetch.DEFAULT_TTL))
+)
+
+def prefetch_key(framework: str, app_name: str, description: str, package_name: str = None) -> str:
+    """Key shared by a prefetch and the /generate request it anticipates"""
+    return request_key('generate', framework, app_name, description, package_name)
+
+APP_LIST_MAX_LIMIT = 100
+# Size of the GeneratedApp columns app_name and package_name are stored in
+APP_NAME_MAX_CHARS = 120
+
+def request_owner(data: Dict[str, Any]) -> str:
+    """Owner of a generated app: the X-User-Id header or owner field"""
+    owner = request.headers.get('X-User-Id') or data.get('owner')
+    return owner if isinstance(owner, str) and 0 < len(owner) <= 80 else 'anonymous'
+
+def app_field_error(data: Dict[str, Any]) -> Optional[str]:
+    """Why the app fields of a request body cannot be used or stored, if they cannot"""
+    for field in ('app_name', 'description', 'package_name'):
+        if data.get(field) is not None and not isinstance(data[field], str):
+            return f'{field} must be a string'
+    for field in ('app_name', 'package_name'):
+        value = data.get(field)
+        if isinstance(value, str) and len(value) > APP_NAME_MAX_CHARS:
+            return f'{field} must be at most {APP_NAME_MAX_CHARS} characters'
+    return None
+
+def store_generated_app(generated_app: Dict[str, Any], owner: str) -> Dict[str, Any]:
+    """Copy of a generated app with its id and metadata, its files put in the blob store"""
+    # The generated result may be shared with other waiters
+    generated_app = dict(generated_app)
+    generated_app['id'] = new_app_id()
+    generated_app['created_at'] = time.time()
+    generated_app['status'] = 'generated'
+    generated_app['owner'] = owner
+    generated_app['manifest'] = blob_store.put_app(generated_app['id'], generated_app['files'])
+    return generated_app
+
+def save_generated_app(generated_app: Dict[str, Any], commit: bool = True):
+    """Record a generated app whose files are already in the blob store"""
+    db.session.add(GeneratedApp(
+        id=generated_app['id'],
+        owner=generated_app['owner'],
+        created_at=generated_app['created_at'],
+        framework=generated_app['framework'],
+        app_name=generated_app['app_name'],
+        package_name=generated_app['package_name'],
+        description=generated_app['description'],
+        manifest_json=json.dumps(generated_app['manifest'], separators=(',', ':')),
+        details_json=json.dumps({
+            name: generated_app[name]
+            for name in ('template_version', 'dependencies', 'build_commands', 'deployment_info')
+        }, separators=(',', ':'))
+    ))
+    if commit:
+        db.session.commit()
+
+def default_app_name(description: str) -> str:
+    return description.split()[0].capitalize()[:APP_NAME_MAX_CHARS - 3] + 'App'
 
 @codegen_bp.route('/frameworks', methods=['GET'])
 def get_frameworks():
-    """Get available mobile app frameworks"""
+    """Get available mobile app frameworks, from pack metadata only"""
     frameworks = []
-    for framework_id, template in app_generator.templates.items():
-        frameworks.append({
-            'id': framework_id,
-            'name': template['name'],
-            'description': template['description'],
-            'platforms': app_generator._get_deployment_info(framework_id).get('platforms', [])
-        })
+    for framework_id, pack in app_generator.templates.items():
+        frameworks.append(dict(pack.to_dict(), versions=template_packs.versions(framework_id)))
     
     return jsonify({'frameworks': frameworks})
 
+@codegen_bp.route('/template-packs', methods=['GET'])
+def template_pack_status():
+    """Packs on disk, which are compiled in this process, and any that failed to parse"""
+    return jsonify(template_packs.stats())
+
+def wants_stream(data: Dict[str, Any]) -> bool:
+    return data.get('stream') is True or 'application/x-ndjson' in request.headers.get('Accept', '')
+
+def generate_frameworks(data: Dict[str, Any]):
+    """One app model rendered for several frameworks in parallel
+    
+    Answers with {"model", "apps": [...]}, or with stream=true as NDJSON:
+    one {"framework", "ok", "app" | "error"} line per framework as it
+    finishes, then a {"done": true, ...} line.
+    """
+    frameworks = data['frameworks']
+    if not isinstance(frameworks, list) or not frameworks or not all(isinstance(f, str) for f in frameworks):
+        return jsonify({'error': 'frameworks must be a non-empty list of framework ids'}), 400
+    frameworks = list(dict.fromkeys(frameworks))
+    for framework in frameworks:
+        if framework not in app_generator.templates:
+            return jsonify({'error': f"Unsupported framework: {framework}"}), 400
+    
+    started = time.monotonic()
+    try:
+        model = app_generator.build_model(data['app_name'], data['description'], data.get('package_name'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Generation failed: {str(e)}'}), 500
+    owner = request_owner(data)
+    
+    def render(framework: str) -> Dict[str, Any]:
+        return store_generated_app(app_generator.render_app(model, framework), owner)
+    
+    futures = {render_pool.submit(render, framework): framework for framework in frameworks}
+    
+    if not wants_stream(data):
+        # Wait for every framework, so none is still storing files when a
+        # failure removes what the others stored
+        apps = {}
+        error = None
+        for future in futures:
+            try:
+                apps[futures[future]] = future.result()
+            except Exception as e:
+                error = error or e
+        try:
+            if error is not None:
+                raise error
+            for generated_app in apps.values():
+                save_generated_app(generated_app, commit=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for generated_app in apps.values():
+                blob_store.delete_app(generated_app['id'])
+            return jsonify({'error': f'Generation failed: {str(e)}'}), 500
+        return jsonify({'model': model.to_dict(), 'apps': [apps[framework] for framework in frameworks]})
+    
+    @stream_with_context
+    def parts():
+        failed = 0
+        for future in as_completed(futures):
+            framework = futures[future]
+            generated_app = None
+            try:
+                generated_app = future.result()
+                save_generated_app(generated_app)
+            except Exception as e:
+                db.session.rollback()
+                if generated_app is not None:
+                    blob_store.delete_app(generated_app['id'])
+                failed += 1
+                yield json.dumps({'framework': framework, 'ok': False,
+                                  'error': f'Generation failed: {str(e)}'}) + '\n'
+            else:
+                yield json.dumps({'framework': framework, 'ok': True, 'app': generated_app}) + '\n'
+        yield json.dumps({
+            'done': True,
+            'model': model.to_dict(),
+            'frameworks': frameworks,
+            'succeeded': len(frameworks) - failed,
+            'failed': failed,
+            'elapsed': round(time.monotonic() - started, 3)
+        }) + '\n'
+    
+    return Response(parts(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def stream_generated_app(details: Dict[str, Any], files: Iterator[Tuple[str, str]], owner: str) -> Response:
+    """NDJSON: an "app" record, a "file" record per file as soon as it is
+    rendered and stored, then a "done" trailer with the manifest, build
+    commands and deployment info. Only the file being sent is held in memory.
+    """
+    generated_app = dict(details, id=new_app_id(), owner=owner)
+    
+    @stream_with_context
+    def records():
+        yield json.dumps(dict(
+            {name: generated_app[name] for name in ('id', 'framework', 'app_name', 'description', 'package_name',
+                                                    'app_type', 'template_version')},
+            type='app'
+        )) + '\n'
+        manifest = {}
+        try:
+            for path, content in files:
+                manifest[path] = blob_store.put_blob(content.encode('utf-8'))
+                yield json.dumps({'type': 'file', 'path': path, 'hash': manifest[path], 'content': content}) + '\n'
+            generated_app['created_at'] = time.time()
+            generated_app['status'] = 'generated'
+            generated_app['manifest'] = blob_store.put_app(generated_app['id'], {}, unchanged=manifest)
+            save_generated_app(generated_app)
+        except Exception as e:
+            db.session.rollback()
+            yield json.dumps({'type': 'error', 'error': f'Generation failed: {str(e)}'}) + '\n'
+            return
+        yield json.dumps(dict(
+            {name: generated_app[name] for name in ('id', 'created_at', 'status', 'manifest', 'dependencies',
+                                                    'build_commands', 'deployment_info')},
+            type='done',
+            files=len(manifest)
+        )) + '\n'
+    
+    return Response(records(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @codegen_bp.route('/generate', methods=['POST'])
 def generate_mobile_app():
-    """Generate a complete mobile app"""
+    """Generate a complete mobile app
+    
+    With frameworks: [...] instead of framework, the app is parsed once and
+    rendered for each of them (see generate_frameworks). With stream: true
+    (or Accept: application/x-ndjson) files are sent one by one as NDJSON
+    while they render (see stream_generated_app).
+    """
     data = request.get_json()
     
     if not data:
         return jsonify({'error': 'No data provided'}), 400
     
-    required_fields = ['framework', 'app_name', 'description']
+    required_fields = ['app_name', 'description'] + ([] if 'frameworks' in data else ['framework'])
     for field in required_fields:
         if field not in data:
             return jsonify({'error': f'Missing required field: {field}'}), 400
+    field_error = app_field_error(data)
+    if field_error:
+        return jsonify({'error': field_error}), 400
+    if 'frameworks' in data:
+        return generate_frameworks(data)
     
-    try:
-        generated_app = app_generator.generate_app(
-            framework=data['framework'],
-            app_name=data['app_name'],
-            description=data['description'],
-            package_name=data.get('package_name')
+    token = session_token(request.headers.get('X-Session-Token'), data)
+    prefetched = None
+    if token:
+        prefetched = app_prefetches.claim(
+            token,
+            prefetch_key(data['framework'], data['app_name'], data['description'], data.get('package_name')),
+            timeout=generation_flights.max_wait
         )
+    
+    if wants_stream(data):
+        try:
+            if prefetched is not None:
+                generated_app, prefetch_status = prefetched
+                details = {name: value for name, value in generated_app.items() if name != 'files'}
+                files = iter(generated_app['files'].items())
+            else:
+                prefetch_status = 'MISS'
+                pack = app_generator.load_pack(data['framework'])
+                model = app_generator.build_model(data['app_name'], data['description'], data.get('package_name'))
+                details = app_generator.app_details(model, pack)
+                files = pack.iter_render(model.values)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': f'Generation failed: {str(e)}'}), 500
+        response = stream_generated_app(details, files, request_owner(data))
+        response.headers['X-Prefetch'] = prefetch_status
+        return response
+    
+    try:
+        if prefetched is not None:
+            generated_app, prefetch_status = prefetched
+        else:
+            prefetch_status = 'MISS'
+            generated_app, _ = generation_flights.do(
+                request_key('generate', {k: v for k, v in data.items() if k != 'session_token'}),
+                lambda: app_generator.generate_app(
+                    framework=data['framework'],
+                    app_name=data['app_name'],
+                    description=data['description'],
+                    package_name=data.get('package_name')
+                )
+            )
         
-        # Add metadata
-        generated_app['id'] = f"app_{int(time.time())}"
-        generated_app['created_at'] = time.time()
-        generated_app['status'] = 'generated'
+        # Add metadata and store the files
+        generated_app = store_generated_app(generated_app, request_owner(data))
+        save_generated_app(generated_app)
         
-        return jsonify(generated_app)
+        response = jsonify(generated_app)
+        response.headers['X-Prefetch'] = prefetch_status
+        return response
         
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
+    except SingleFlightTimeout as e:
+        return jsonify({'error': str(e)}), 504
     except Exception as e:
         return jsonify({'error': f'Generation failed: {str(e)}'}), 500
 
-@codegen_bp.route('/download/<app_id>', methods=['GET'])
-def download_app_code(app_id):
-    """Download generated app code as ZIP file"""
-    # In a real implementation, you would retrieve the app data from database
-    # For now, return a mock response
+@codegen_bp.route('/regenerate', methods=['POST'])
+def regenerate_mobile_app():
+    """Regenerate a stored app after editing its name, description or package
+    
+    Body: app_id of the previous version plus the changed fields, and
+    optionally the manifest the client holds (defaults to the previous
+    version's). Only files that use a changed placeholder are re-rendered;
+    the response carries the new manifest and the contents of just the files
+    whose hash differs from the client's manifest. Files are rendered with
+    the template pack version the previous app was made from; if that version
+    is no longer installed, every file is rendered with the current one.
+    """
+    data = request.get_json()
+    if not data or not data.get('app_id'):
+        return jsonify({'error': 'Missing required field: app_id'}), 400
+    
+    base = db.session.get(GeneratedApp, data['app_id'])
+    if base is None:
+        return jsonify({'error': 'App not found'}), 404
+    if data.get('framework', base.framework) != base.framework:
+        return jsonify({'error': 'Changing the framework needs a full generation'}), 400
+    known = data.get('manifest', base.manifest)
+    if not isinstance(known, dict):
+        return jsonify({'error': 'manifest must map paths to hashes'}), 400
+    field_error = app_field_error(data)
+    if field_error:
+        return jsonify({'error': field_error}), 400
+    
+    app_name = data.get('app_name', base.app_name)
+    description = data.get('description', base.description)
+    package_name = data.get('package_name')
+    if package_name is None and base.package_name != app_generator.default_package_name(base.app_name):
+        # An explicit package name survives a rename; a derived one follows it
+        package_name = base.package_name
+    
+    try:
+        values = app_generator.template_values(app_name, description, package_name)
+        previous = app_generator.template_values(base.app_name, base.description, base.package_name)
+        generated_app = base.to_dict()
+        version = generated_app.get('template_version')
+        if version in template_packs.versions(base.framework):
+            rendered = app_generator.regenerate_files(base.framework, version, previous, values)
+            unchanged = {path: digest for path, digest in base.manifest.items() if path not in rendered}
+        else:
+            generated_app.update(app_generator.generate_app(base.framework, app_name, description, package_name))
+            rendered = generated_app.pop('files')
+            unchanged = {}
+        generated_app.update(
+            id=new_app_id(),
+            created_at=time.time(),
+            app_name=app_name,
+            description=description,
+            package_name=values['APP_PACKAGE_NAME']
+        )
+        manifest = blob_store.put_app(generated_app['id'], rendered, unchanged=unchanged)
+        generated_app['manifest'] = manifest
+        save_generated_app(generated_app)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Regeneration failed: {str(e)}'}), 500
+    
+    changed = [path for path, digest in manifest.items() if known.get(path) != digest]
     return jsonify({
-        'download_url': f'/api/codegen/files/{app_id}.zip',
-        'expires_at': time.time() + 3600  # 1 hour
+        'id': generated_app['id'],
+        'base_id': base.id,
+        'created_at': generated_app['created_at'],
+        'status': 'generated',
+        'framework': base.framework,
+        'app_name': app_name,
+        'description': description,
+        'package_name': generated_app['package_name'],
+        'template_version': generated_app['template_version'],
+        'rendered': sorted(rendered),
+        'manifest': manifest,
+        'files': {
+            path: rendered[path] if path in rendered else blob_store.get_blob(manifest[path]).decode('utf-8')
+            for path in changed
+        },
+        'removed': sorted(path for path in known if path not in manifest)
     })
 
+@codegen_bp.route('/prefetch', methods=['POST'])
+def prefetch_mobile_app():
+    """Start generating from a partial description before the user submits
+    
+    Body: description plus optional framework, app_name and package_name;
+    the session token comes from X-Session-Token or session_token. Without a
+    framework one is detected from the description. Submitting /generate with
+    the same token and fields reuses the result.
+    """
+    data = request.get_json()
+    token = session_token(request.headers.get('X-Session-Token'), data)
+    if not token:
+        return jsonify({'error': 'Missing session token'}), 400
+    description = (data or {}).get('description')
+    if not isinstance(description, str) or not description.strip():
+        return jsonify({'error': 'Missing app description'}), 400
+    field_error = app_field_error(data)
+    if field_error:
+        return jsonify({'error': field_error}), 400
+    
+    framework = data.get('framework') or app_generator.detect_framework(description)
+    if framework not in app_generator.templates:
+        return jsonify({'error': f"Unsupported framework: {framework}"}), 400
+    app_name = data.get('app_name') or default_app_name(description)
+    package_name = data.get('package_name')
+    
+    def generate(cancelled):
+        if cancelled.is_set():
+            raise PrefetchCancelled('Prefetch superseded')
+        return app_generator.generate_app(framework, app_name, description, package_name)
+    
+    entry, reused = app_prefetches.start(
+        token, prefetch_key(framework, app_name, description, package_name), generate
+    )
+    return jsonify({
+        'framework': framework,
+        'app_name': app_name,
+        'status': entry.status,
+        'reused': reused
+    }), 202
+
+@codegen_bp.route('/prefetch', methods=['DELETE'])
+def cancel_prefetch():
+    """Cancel every prefetch of the session (e.g. when the input is cleared)"""
+    token = session_token(request.headers.get('X-Session-Token'), request.get_json(silent=True))
+    if not token:
+        return jsonify({'error': 'Missing session token'}), 400
+    return jsonify({'cancelled': app_prefetches.cancel(token)})
+
+@codegen_bp.route('/apps', methods=['GET'])
+def list_generated_apps():
+    """Generated apps, newest first, optionally for one owner
+    
+    Pages with ?before=<created_at of the last app seen>&limit=<n>.
+    """
+    try:
+        limit = int(request.args.get('limit', 20))
+        before = float(request.args['before']) if 'before' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'limit and before must be numbers'}), 400
+    if not 1 <= limit <= APP_LIST_MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {APP_LIST_MAX_LIMIT}'}), 400
+    
+    query = GeneratedApp.query
+    if request.args.get('owner'):
+        query = query.filter(GeneratedApp.owner == request.args['owner'])
+    if before is not None:
+        query = query.filter(GeneratedApp.created_at < before)
+    apps = query.order_by(GeneratedApp.created_at.desc()).limit(limit).all()
+    return jsonify({
+        'apps': [app.to_dict() for app in apps],
+        'next_before': apps[-1].created_at if apps and len(apps) == limit else None
+    })
+
+@codegen_bp.route('/apps/<app_id>', methods=['GET'])
+def get_generated_app(app_id):
+    """A generated app's metadata and manifest; ?files=1 includes file contents"""
+    generated_app = db.session.get(GeneratedApp, app_id)
+    if generated_app is None:
+        return jsonify({'error': 'App not found'}), 404
+    files = None
+    if request.args.get('files') in ('1', 'true'):
+        files = {path: blob_store.get_blob(digest).decode('utf-8')
+                 for path, digest in generated_app.manifest.items()}
+    return jsonify(generated_app.to_dict(files))
+
+@codegen_bp.route('/apps/<app_id>/manifest', methods=['GET'])
+def get_app_manifest(app_id):
+    """Path -> content hash of every file of a generated app"""
+    generated_app = db.session.get(GeneratedApp, app_id)
+    if generated_app is None:
+        return jsonify({'error': 'App not found'}), 404
+    return jsonify({'app_id': app_id, 'manifest': generated_app.manifest})
+
+@codegen_bp.route('/blobs/<digest>', methods=['GET'])
+def get_blob(digest):
+    """Contents of one stored file by hash; immutable, so cacheable forever"""
+    data = blob_store.get_blob(digest)
+    if data is None:
+        return jsonify({'error': 'Blob not found'}), 404
+    return Response(data, mimetype='text/plain; charset=utf-8', headers={
+        'ETag': f'"{digest}"',
+        'Cache-Control': 'public, max-age=31536000, immutable'
+    })
+
+@codegen_bp.route('/storage', methods=['GET'])
+def storage_report():
+    """Stored vs logical bytes of generated files and the resulting dedup ratio"""
+    return jsonify(dict(blob_store.report(), zip_entries=zip_entries.stats()))
+
+@codegen_bp.route('/download/<app_id>', methods=['GET'])
+def download_app_code(app_id):
+    """Stream the generated app as a ZIP file, with Range support for resuming
+    
+    The archive is deterministic for a given manifest, so its length and ETag
+    are known before the first byte and any byte range can be regenerated.
+    """
+    generated_app = db.session.get(GeneratedApp, app_id)
+    if generated_app is None:
+        return jsonify({'error': 'App not found'}), 404
+    files = list(generated_app.manifest.items())
+    etag = archive_etag(files)
+    
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'ETag': f'"{etag}"',
+        'Content-Disposition': f'attachment; filename="{app_id}.zip"'
+    }
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+    
+    # Only a body needs the layout, which compresses blobs missing from the cache
+    plan = ZipPlan(files, blob_store.open_blob, zip_entries)
+    start, stop, status = 0, plan.size, 200
+    # A date If-Range cannot be validated (no Last-Modified is sent): serve it all
+    if request.range is not None and ('If-Range' not in request.headers or request.if_range.etag == etag):
+        byte_range = request.range.range_for_length(plan.size)
+        if byte_range is None:
+            if len(request.range.ranges) == 1:
+                headers['Content-Range'] = f'bytes */{plan.size}'
+                return Response(status=416, headers=headers)
+        else:
+            start, stop = byte_range
+            status = 206
+            headers['Content-Range'] = f'bytes {start}-{stop - 1}/{plan.size}'
+    headers['Content-Length'] = str(stop - start)
+    
+    return Response(plan.iter_bytes(start, stop), status=status, mimetype='application/zip', headers=headers)
+
 @codegen_bp.route('/preview/<app_id>', methods=['GET'])
 def preview_app(app_id):
     """Get app preview information"""
+    generated_app = db.session.get(GeneratedApp, app_id)
+    if generated_app is None:
+        return jsonify({'error': 'App not found'}), 404
+    
     # Mock preview data
     preview_data = {
         'app_id': app_id,
+        'app_name': generated_app.app_name,
+        'framework': generated_app.framework,
         'screenshots': [
             f'/api/static/previews/{app_id}_mobile.png',
             f'/api/static/previews/{app_id}_tablet.png'
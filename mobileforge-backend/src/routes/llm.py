@@ -1,8 +1,27 @@
 from flask import Blueprint, request, jsonify, Response
 import json
+import threading
 import time
 import os
-from typing import Generator
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Generator, Iterator, List, Optional
+from services.sse import SSEFramer, framer_settings, sse_event
+from services.provider_pool import ProviderPools
+from services.response_cache import (
+    CACHE_MODES, DEFAULT_MAX_ENTRIES, DEFAULT_TTL, ResponseCache, cache_key, normalize_text
+)
+from services.provider_router import DEFAULT_ALPHA, MAX_HEDGE_DELAY, MIN_HEDGE_DELAY, ProviderRouter
+from services.single_flight import DEFAULT_MAX_WAIT, SingleFlight, SingleFlightTimeout, request_key
+from services.stream_registry import (
+    DEFAULT_CANCEL_GRACE, DEFAULT_MAX_STREAM_BYTES, DEFAULT_RETENTION, StreamGone, StreamRegistry, parse_event_id
+)
+from services.conversation_store import DEFAULT_CONTEXT_BUDGET, ConversationStore, estimate_tokens, tokens_for_chars
+from services.rate_limiter import RateLimited, RateLimiters
+from services.llm_metrics import LLMMetrics
+from services import prefetch
+from services.prefetch import PrefetchCancelled, PrefetchRegistry, session_token
+from services import llm_client
 
 llm_bp = Blueprint('llm', __name__)
 
@@ -13,33 +32,185 @@ LLM_PROVIDERS = {
         'description': 'Advanced reasoning for complex apps',
         'api_key_env': 'XAI_API_KEY',
         'base_url': 'https://api.x.ai/v1',
-        'model': 'grok-4'
+        'model': 'grok-4',
+        'api': 'openai',
+        'max_connections': 256,
+        'sse_flush_interval_ms': 30,
+        'sse_max_event_bytes': 1024,
+        'rate_limit': {
+            'requests_per_minute': 600,
+            'tokens_per_minute': 1000000,
+            'max_queue': 64,
+            'max_queue_time': 10
+        }
     },
     'claude': {
         'name': 'Claude-3.5',
         'description': 'Creative UI/UX design',
         'api_key_env': 'ANTHROPIC_API_KEY',
         'base_url': 'https://api.anthropic.com/v1',
-        'model': 'claude-3-5-sonnet-20241022'
+        'model': 'claude-3-5-sonnet-20241022',
+        'api': 'anthropic',
+        'max_connections': 256,
+        'sse_flush_interval_ms': 30,
+        'sse_max_event_bytes': 1024,
+        'rate_limit': {
+            'requests_per_minute': 1000,
+            'tokens_per_minute': 400000,
+            'max_queue': 64,
+            'max_queue_time': 10
+        }
     },
     'gpt4': {
         'name': 'GPT-4',
         'description': 'Reliable code generation',
         'api_key_env': 'OPENAI_API_KEY',
         'base_url': 'https://api.openai.com/v1',
-        'model': 'gpt-4'
+        'model': 'gpt-4',
+        'api': 'openai',
+        'max_connections': 512,
+        'sse_flush_interval_ms': 30,
+        'sse_max_event_bytes': 1024,
+        'rate_limit': {
+            'requests_per_minute': 500,
+            'tokens_per_minute': 300000,
+            'max_queue': 64,
+            'max_queue_time': 10
+        }
     },
     'deepseek': {
         'name': 'DeepSeek-V3',
         'description': 'Specialized mobile development',
         'api_key_env': 'DEEPSEEK_API_KEY',
         'base_url': 'https://api.deepseek.com/v1',
-        'model': 'deepseek-chat'
+        'model': 'deepseek-chat',
+        'api': 'openai',
+        'max_connections': 256,
+        'sse_flush_interval_ms': 30,
+        'sse_max_event_bytes': 1024,
+        'rate_limit': {
+            'requests_per_minute': 600,
+            'tokens_per_minute': 1000000,
+            'max_queue': 64,
+            'max_queue_time': 10
+        }
     }
 }
 
+# Keep-alive connection pools shared by /chat and /generate-app
+provider_pools = ProviderPools(LLM_PROVIDERS)
+
+# Per-provider request/token buckets from each provider's rate_limit
+rate_limiters = RateLimiters(LLM_PROVIDERS)
+
+# Queue time, TTFT, token gaps and throughput histograms by provider
+llm_metrics = LLMMetrics()
+
+# Cached chat transcripts and generated apps; set LLM_CACHE_DIR to persist across restarts
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+    ttl=float(os.getenv('LLM_CACHE_TTL', DEFAULT_TTL)),
+    disk_dir=os.getenv('LLM_CACHE_DIR')
+)
+
+# EWMA latency tracking for every stream; drives provider: "auto" routing and hedging
+provider_router = ProviderRouter(
+    alpha=float(os.getenv('LLM_ROUTER_ALPHA', DEFAULT_ALPHA)),
+    min_hedge_delay=float(os.getenv('LLM_HEDGE_MIN_DELAY_MS', MIN_HEDGE_DELAY * 1000)) / 1000,
+    max_hedge_delay=float(os.getenv('LLM_HEDGE_MAX_DELAY_MS', MAX_HEDGE_DELAY * 1000)) / 1000
+)
+
+# Concurrent identical /generate-app requests share one generation
+generation_flights = SingleFlight(max_wait=float(os.getenv('SINGLE_FLIGHT_MAX_WAIT', DEFAULT_MAX_WAIT)))
+
+# Replay buffers that let dropped chat streams resume via Last-Event-ID
+stream_registry = StreamRegistry(
+    retention=float(os.getenv('LLM_STREAM_RETENTION', DEFAULT_RETENTION)),
+    max_stream_bytes=int(os.getenv('LLM_STREAM_MAX_BYTES', DEFAULT_MAX_STREAM_BYTES)),
+    cancel_grace=float(os.getenv('LLM_STREAM_CANCEL_GRACE', DEFAULT_CANCEL_GRACE))
+)
+
+DATA_DIR = os.getenv(
+    'MOBILEFORGE_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database')
+)
+
+# Server-side chat history, one append-only log per conversation id
+conversation_store = ConversationStore(os.getenv('CONVERSATION_DIR', os.path.join(DATA_DIR, 'conversations')))
+
+# Shared worker pool for /generate-app/batch; each batch also caps its own concurrency
+BATCH_MAX_ITEMS = 200
+BATCH_DEFAULT_CONCURRENCY = 4
+BATCH_MAX_CONCURRENCY = int(os.getenv('LLM_BATCH_MAX_CONCURRENCY', 16))
+batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('LLM_BATCH_WORKERS', 32)),
+    thread_name_prefix='generate-batch'
+)
+
+# Generations started from partial descriptions, claimed by the final /generate-app
+app_prefetches = PrefetchRegistry(
+    workers=int(os.getenv('PREFETCH_WORKERS', prefetch.DEFAULT_WORKERS)),
+    max_per_session=int(os.getenv('PREFETCH_MAX_PER_SESSION', prefetch.DEFAULT_MAX_PER_SESSION)),
+    ttl=float(os.getenv('PREFETCH_TTL', prefetch.DEFAULT_TTL))
+)
+# A provider call can't be taken back, so a prefetch waits this long for the
+# user to stop typing; a newer prefetch in the meantime cancels it for free
+PREFETCH_SETTLE = float(os.getenv('PREFETCH_SETTLE_MS', 300)) / 1000
+
+def provider_available(provider_id: str) -> bool:
+    """A provider is called for real only when its API key is configured"""
+    return os.getenv(LLM_PROVIDERS[provider_id]['api_key_env']) is not None
+
+def provider_token_stream(provider_id: str, message: str,
+                          messages: Optional[List[Dict[str, str]]] = None) -> Generator[str, None, None]:
+    """Stream tokens from the provider, or the simulation when no API key is set
+    
+    messages is the full context (e.g. from a stored conversation); without it
+    the message is sent as a single user turn.
+    """
+    if provider_available(provider_id):
+        return llm_client.stream_chat(provider_pools, provider_id,
+                                      messages or [{'role': 'user', 'content': message}])
+    return simulate_streaming_response(provider_id, message)
+
+def metered(provider_id: str, tokens: Iterator[str]) -> Generator[str, None, None]:
+    """Relay tokens and charge the completion to the provider's token bucket"""
+    chars = 0
+    try:
+        for token in tokens:
+            chars += len(token)
+            yield token
+    finally:
+        if chars:
+            rate_limiters.get(provider_id).consume(tokens_for_chars(chars))
+
+def rate_limited_stream(provider_id: str, prompt_tokens: int,
+                        open_stream: Callable[[], Iterator[str]]) -> Generator[str, None, None]:
+    """Wait for admission when first iterated, then stream metered tokens
+    
+    Used for auto routing, where RateLimited from one candidate fails over to the next.
+    """
+    waited = rate_limiters.get(provider_id).acquire(prompt_tokens)
+    llm_metrics.queue_time.labels(provider_id, 'chat').observe(waited)
+    yield from metered(provider_id, open_stream())
+
+def rate_limited_response(error: RateLimited):
+    response = jsonify({'error': str(error), 'retry_after': round(error.retry_after, 3)})
+    response.status_code = 429
+    response.headers['Retry-After'] = error.retry_after_header
+    return response
+
+def auto_candidates() -> list:
+    """Providers eligible for auto routing: those with API keys, else all simulated ones"""
+    return [provider_id for provider_id in LLM_PROVIDERS if provider_available(provider_id)] or list(LLM_PROVIDERS)
+
 def simulate_streaming_response(provider_id: str, message: str) -> Generator[str, None, None]:
-    """Simulate streaming response from LLM provider"""
+    """Simulate streaming tokens from LLM provider
+
+    The typing delay uses time.sleep, which the gevent worker (gunicorn.conf.py)
+    monkey-patches into a cooperative yield, so an idle stream costs a greenlet
+    rather than a worker thread.
+    """
     provider = LLM_PROVIDERS.get(provider_id, LLM_PROVIDERS['gpt4'])
     
     # Generate a realistic response based on the provider
@@ -57,11 +228,8 @@ def simulate_streaming_response(provider_id: str, message: str) -> Generator[str
     words = response_text.split()
     
     for i, word in enumerate(words):
-        chunk = word + (' ' if i < len(words) - 1 else '')
-        yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
+        yield word + (' ' if i < len(words) - 1 else '')
         time.sleep(0.05)  # Simulate typing delay
-    
-    yield f"data: {json.dumps({'content': '', 'done': True})}\n\n"
 
 @llm_bp.route('/providers', methods=['GET'])
 def get_providers():
@@ -72,15 +240,57 @@ def get_providers():
                 'id': provider_id,
                 'name': config['name'],
                 'description': config['description'],
-                'available': os.getenv(config['api_key_env']) is not None
+                'available': provider_available(provider_id),
+                'streaming': {
+                    'flush_interval_ms': config['sse_flush_interval_ms'],
+                    'max_event_bytes': config['sse_max_event_bytes']
+                },
+                'rate_limit': config['rate_limit']
             }
             for provider_id, config in LLM_PROVIDERS.items()
         ]
     })
 
+def tail_events(events: Iterator[str]) -> Generator[str, None, None]:
+    """Relay buffered events, ending with an error event if the buffer overran the reader"""
+    try:
+        for event in events:
+            yield event
+    except StreamGone as e:
+        yield sse_event({'error': str(e), 'done': True})
+
+def sse_response(events: Iterator[str], headers: Dict[str, str]) -> Response:
+    return Response(
+        events,
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'X-Accel-Buffering': 'no',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type, Last-Event-ID',
+            'Access-Control-Allow-Methods': 'POST, GET, OPTIONS',
+            'Access-Control-Expose-Headers': 'X-Cache, X-Stream-Id, X-Conversation-Id, Retry-After',
+            **headers
+        }
+    )
+
 @llm_bp.route('/chat', methods=['POST'])
 def chat():
-    """Handle chat requests with streaming response"""
+    """Handle chat requests with streaming response
+    
+    A request carrying Last-Event-ID resumes the buffered stream it names
+    instead of starting a new generation.
+    """
+    last_event_id = request.headers.get('Last-Event-ID')
+    if last_event_id:
+        try:
+            events = stream_registry.resume(last_event_id)
+        except StreamGone as e:
+            return jsonify({'error': str(e)}), 410
+        return sse_response(tail_events(events), {'X-Stream-Id': parse_event_id(last_event_id)[0]})
+    
+    started = time.monotonic()
     data = request.get_json()
     
     if not data or 'message' not in data or 'provider' not in data:
@@ -89,53 +299,170 @@ def chat():
     message = data['message']
     provider_id = data['provider']
     
-    if provider_id not in LLM_PROVIDERS:
+    if provider_id != 'auto' and provider_id not in LLM_PROVIDERS:
         return jsonify({'error': 'Invalid provider'}), 400
     
-    def generate():
-        yield "data: {\"status\": \"started\"}\n\n"
+    try:
+        settings = framer_settings(LLM_PROVIDERS.get(provider_id, {}), data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    cache_mode = data.get('cache', 'default')
+    if cache_mode not in CACHE_MODES:
+        return jsonify({'error': f"cache must be one of: {', '.join(CACHE_MODES)}"}), 400
+    
+    conversation = None
+    if data.get('conversation_id') is not None:
+        try:
+            conversation = conversation_store.get(str(data['conversation_id']))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        context_tokens = data.get('context_tokens', DEFAULT_CONTEXT_BUDGET)
+        if not isinstance(context_tokens, int) or isinstance(context_tokens, bool) or context_tokens < 1:
+            return jsonify({'error': 'context_tokens must be a positive integer'}), 400
+        # Answers depend on the stored history, so they are never served from cache
+        cache_mode = 'bypass'
+    
+    framer = SSEFramer(**settings)
+    routed = None
+    
+    def provider_label():
+        if routed is None:
+            return provider_id
+        return routed.provider or 'auto'
+    
+    key = cache_key('chat', provider_id, normalize_text(message))
+    cached = response_cache.lookup(key, cache_mode)
+    if cached is not None:
+        cache_status = 'HIT'
+        max_bytes = settings['max_bytes']
+        tokens = (cached[i:i + max_bytes] for i in range(0, len(cached), max_bytes))
+    else:
+        cache_status = 'BYPASS' if cache_mode == 'bypass' else 'MISS'
+        prompt_tokens = estimate_tokens(message)
+        if provider_id != 'auto':
+            # Admit before recording the turn so a 429 leaves no trace in the history
+            try:
+                waited = rate_limiters.get(provider_id).acquire(prompt_tokens)
+            except RateLimited as e:
+                return rate_limited_response(e)
+            llm_metrics.queue_time.labels(provider_id, 'chat').observe(waited)
+        messages = None
+        if conversation is not None:
+            # The message is logged with its reply once the stream completes
+            messages = conversation_store.build_context(conversation, context_tokens, pending=message)
+            context_extra = sum(estimate_tokens(m['content']) for m in messages) - prompt_tokens
+            if provider_id != 'auto' and context_extra > 0:
+                rate_limiters.get(provider_id).consume(context_extra)
+            prompt_tokens += max(context_extra, 0)
+        if provider_id == 'auto':
+            routed = provider_router.route(
+                auto_candidates(),
+                lambda candidate: rate_limited_stream(
+                    candidate, prompt_tokens,
+                    lambda: provider_token_stream(candidate, message, messages)
+                ),
+                hedge=data.get('hedge', True) is not False
+            )
+            tokens = iter(routed)
+        else:
+            tokens = provider_router.track(
+                provider_id, metered(provider_id, provider_token_stream(provider_id, message, messages))
+            )
+        tokens = llm_metrics.observe_stream(tokens, started, provider_label, tokens_for_chars,
+                                            llm_client.DEFAULT_MAX_TOKENS)
+    
+    def record(tokens):
+        # Only a stream that ran to completion is cached or added to the history
+        parts = []
+        for token in tokens:
+            parts.append(token)
+            yield token
+        reply = ''.join(parts)
+        if cache_status == 'MISS':
+            response_cache.set(key, reply)
+        if conversation is not None:
+            conversation.append_exchange(message, reply,
+                                         provider=routed.provider if provider_id == 'auto' else provider_id)
+    
+    if cache_status == 'MISS' or conversation is not None:
+        tokens = record(tokens)
+    
+    def generate(stream_id):
+        yield sse_event({'status': 'started', 'stream_id': stream_id})
         
         try:
-            for chunk in simulate_streaming_response(provider_id, message):
-                yield chunk
+            # Provider streams flush on a timer so tokens are not held through a
+            # pause; the framer closes the token chain on cancellation, which
+            # aborts the upstream request
+            for event in framer.frame(tokens, timed=cache_status != 'HIT'):
+                yield event
         except Exception as e:
-            yield f"data: {json.dumps({'error': str(e), 'done': True})}\n\n"
+            yield sse_event({'error': str(e), 'done': True})
     
-    return Response(
-        generate(),
-        mimetype='text/event-stream',
-        headers={
-            'Cache-Control': 'no-cache',
-            'Connection': 'keep-alive',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Allow-Methods': 'POST, GET, OPTIONS'
-        }
-    )
+    # The producer runs detached so a dropped connection can resume from the buffer
+    stream = stream_registry.create(generate)
+    headers = {
+        'X-Cache': cache_status,
+        'X-Stream-Id': stream.stream_id
+    }
+    if conversation is not None:
+        headers['X-Conversation-Id'] = conversation.conversation_id
+    return sse_response(llm_metrics.watch_client(tail_events(stream.tail()), started, provider_label), headers)
 
-@llm_bp.route('/generate-app', methods=['POST'])
-def generate_app():
-    """Generate mobile app code based on requirements"""
-    data = request.get_json()
-    
-    if not data or 'description' not in data:
-        return jsonify({'error': 'Missing app description'}), 400
+@llm_bp.route('/streams/<stream_id>', methods=['GET'])
+def watch_stream(stream_id):
+    """Subscribe to a chat stream started by another client
     
-    description = data['description']
-    framework = data.get('framework', 'react-native')
-    provider = data.get('provider', 'gpt4')
+    All subscribers share the one upstream provider stream. Late joiners
+    replay from the oldest buffered event; Last-Event-ID starts after a
+    given event instead.
+    """
+    after_seq = None
+    last_event_id = request.headers.get('Last-Event-ID')
+    try:
+        if last_event_id:
+            event_stream_id, after_seq = parse_event_id(last_event_id)
+            if event_stream_id != stream_id:
+                return jsonify({'error': 'Last-Event-ID belongs to a different stream'}), 400
+        events = stream_registry.subscribe(stream_id, after_seq)
+    except StreamGone as e:
+        return jsonify({'error': str(e)}), 410
+    return sse_response(tail_events(events), {'X-Stream-Id': stream_id})
+
+@llm_bp.route('/conversations', methods=['POST'])
+def create_conversation():
+    """Start a server-side conversation; pass its id to /chat as conversation_id"""
+    return jsonify({'conversation_id': uuid.uuid4().hex}), 201
+
+@llm_bp.route('/conversations/<conversation_id>', methods=['GET'])
+def get_conversation(conversation_id):
+    """Get the stored history of a conversation"""
+    if not conversation_store.exists(conversation_id):
+        return jsonify({'error': 'Conversation not found'}), 404
+    return jsonify(conversation_store.history(conversation_store.get(conversation_id)))
+
+def build_generated_app(description: str, framework: str, provider: str) -> Dict[str, Any]:
+    """Generate app content; the caller adds id and timestamps"""
+    app_name = description.split()[0].capitalize() + 'App'
+    app_js = None
+    if provider_available(provider):
+        app_js = llm_client.complete(
+            provider_pools,
+            provider,
+            f"Write a single {framework} App.js file named {app_name} for this app: {description}. "
+            "Reply with the code only."
+        )
     
-    # Mock app generation response
-    generated_app = {
-        'id': f"app_{int(time.time())}",
-        'name': description.split()[0].capitalize() + 'App',
+    return {
+        'name': app_name,
         'description': description,
         'framework': framework,
         'provider': provider,
         'files': [
             {
                 'path': 'App.js',
-                'content': f"""import React from 'react';
+                'content': app_js or f"""import React from 'react';
 import {{ View, Text, StyleSheet }} from 'react-native';
 
 export default function App() {{
@@ -177,12 +504,269 @@ const styles = StyleSheet.create({{
                     }
                 }, indent=2)
             }
-        ],
-        'preview_url': f'/api/preview/{int(time.time())}',
-        'created_at': time.time()
+        ]
     }
+
+def cached_generated_app(data: Dict[str, Any], description: str, framework: str,
+                         provider: str, cache_mode: str, cancelled: Optional[threading.Event] = None):
+    """Return (app, cache_status) through the response cache and single-flight
+    
+    Raises RateLimited, SingleFlightTimeout, or the generation error, on failure;
+    PrefetchCancelled if cancelled is set before the provider is called.
+    """
+    key = cache_key('generate-app', provider, framework, normalize_text(description))
+    generated_app = response_cache.lookup(key, cache_mode)
+    if generated_app is not None:
+        return generated_app, 'HIT'
+    
+    def generate():
+        limiter = rate_limiters.get(provider)
+        llm_metrics.queue_time.labels(provider, 'generate-app').observe(limiter.acquire(estimate_tokens(description)))
+        if cancelled is not None and cancelled.is_set():
+            raise PrefetchCancelled('Prefetch superseded while waiting for the rate limiter')
+        started = time.monotonic()
+        app = build_generated_app(description, framework, provider)
+        produced = sum(estimate_tokens(f['content']) for f in app['files'])
+        limiter.consume(produced)
+        llm_metrics.duration.labels(provider, 'generate-app').observe(time.monotonic() - started)
+        llm_metrics.tokens.labels(provider, 'generate-app').observe(produced)
+        if cache_mode != 'bypass':
+            response_cache.set(key, app)
+        return app
+    
+    generated_app, _ = generation_flights.do(request_key('generate-app', data), generate)
+    return generated_app, 'BYPASS' if cache_mode == 'bypass' else 'MISS'
+
+def stamp_generated_app(generated_app: Dict[str, Any], description: str) -> Dict[str, Any]:
+    """Copy a (possibly shared) generated app and add its id and timestamps"""
+    generated_app = dict(generated_app, description=description)
+    generated_app['id'] = f"app_{uuid.uuid4().hex}"
+    generated_app['preview_url'] = f'/api/preview/{int(time.time())}'
+    generated_app['created_at'] = time.time()
+    return generated_app
+
+def app_prefetch_key(description: str, framework: str, provider: str, cache_mode: str) -> str:
+    """Key shared by a prefetch and the /generate-app request it anticipates"""
+    return request_key('generate-app', normalize_text(description), framework, provider, cache_mode)
+
+@llm_bp.route('/generate-app', methods=['POST'])
+def generate_app():
+    """Generate mobile app code based on requirements"""
+    data = request.get_json()
+    
+    if not data or 'description' not in data:
+        return jsonify({'error': 'Missing app description'}), 400
+    
+    description = data['description']
+    framework = data.get('framework', 'react-native')
+    provider = data.get('provider', 'gpt4')
+    cache_mode = data.get('cache', 'default')
+    
+    if provider not in LLM_PROVIDERS:
+        return jsonify({'error': 'Invalid provider'}), 400
+    if cache_mode not in CACHE_MODES:
+        return jsonify({'error': f"cache must be one of: {', '.join(CACHE_MODES)}"}), 400
+    
+    token = session_token(request.headers.get('X-Session-Token'), data)
+    prefetched = None
+    if token:
+        prefetched = app_prefetches.claim(
+            token, app_prefetch_key(description, framework, provider, cache_mode),
+            timeout=generation_flights.max_wait
+        )
+    
+    try:
+        if prefetched is not None:
+            (generated_app, cache_status), prefetch_status = prefetched
+        else:
+            prefetch_status = 'MISS'
+            generated_app, cache_status = cached_generated_app(
+                {k: v for k, v in data.items() if k != 'session_token'},
+                description, framework, provider, cache_mode
+            )
+    except RateLimited as e:
+        return rate_limited_response(e)
+    except SingleFlightTimeout as e:
+        return jsonify({'error': str(e)}), 504
+    except Exception as e:
+        return jsonify({'error': f'Generation failed: {str(e)}'}), 502
+    
+    response = jsonify(stamp_generated_app(generated_app, description))
+    response.headers['X-Cache'] = cache_status
+    response.headers['X-Prefetch'] = prefetch_status
+    return response
+
+@llm_bp.route('/generate-app/prefetch', methods=['POST'])
+def prefetch_app():
+    """Start generating from a partial description before the user submits
     
-    return jsonify(generated_app)
+    Takes the /generate-app body plus a session token (X-Session-Token or
+    session_token). A newer prefetch cancels the session's older ones; the
+    submit with the same token and fields reuses the result.
+    """
+    data = request.get_json()
+    token = session_token(request.headers.get('X-Session-Token'), data)
+    if not token:
+        return jsonify({'error': 'Missing session token'}), 400
+    description = (data or {}).get('description')
+    if not isinstance(description, str) or not description.strip():
+        return jsonify({'error': 'Missing app description'}), 400
+    
+    framework = data.get('framework', 'react-native')
+    provider = data.get('provider', 'gpt4')
+    cache_mode = data.get('cache', 'default')
+    if provider not in LLM_PROVIDERS:
+        return jsonify({'error': 'Invalid provider'}), 400
+    if cache_mode not in CACHE_MODES:
+        return jsonify({'error': f"cache must be one of: {', '.join(CACHE_MODES)}"}), 400
+    
+    # A separate single-flight key, so a cancelled prefetch never fails a real request
+    flight = {'prefetch': True, 'description': description, 'framework': framework,
+              'provider': provider, 'cache': cache_mode}
+    
+    def generate(cancelled):
+        if cancelled.wait(PREFETCH_SETTLE):
+            raise PrefetchCancelled('Prefetch superseded before it reached the provider')
+        return cached_generated_app(flight, description, framework, provider, cache_mode, cancelled)
+    
+    entry, reused = app_prefetches.start(
+        token, app_prefetch_key(description, framework, provider, cache_mode), generate
+    )
+    return jsonify({'status': entry.status, 'reused': reused}), 202
+
+@llm_bp.route('/generate-app/prefetch', methods=['DELETE'])
+def cancel_prefetch():
+    """Cancel every prefetch of the session (e.g. when the input is cleared)"""
+    token = session_token(request.headers.get('X-Session-Token'), request.get_json(silent=True))
+    if not token:
+        return jsonify({'error': 'Missing session token'}), 400
+    return jsonify({'cancelled': app_prefetches.cancel(token)})
+
+def generate_batch_item(index: int, item: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate one batch entry; failures become an error record instead of raising"""
+    data = dict(defaults, **item)
+    description = data.get('description')
+    provider = data.get('provider', 'gpt4')
+    cache_mode = data.get('cache', 'default')
+    started = time.monotonic()
+    
+    if not isinstance(description, str) or not description.strip():
+        return {'index': index, 'ok': False, 'error': 'Missing app description'}
+    if provider not in LLM_PROVIDERS:
+        return {'index': index, 'ok': False, 'error': 'Invalid provider'}
+    if cache_mode not in CACHE_MODES:
+        return {'index': index, 'ok': False, 'error': f"cache must be one of: {', '.join(CACHE_MODES)}"}
+    
+    try:
+        generated_app, cache_status = cached_generated_app(
+            data, description, data.get('framework', 'react-native'), provider, cache_mode
+        )
+    except RateLimited as e:
+        return {'index': index, 'ok': False, 'error': str(e), 'retry_after': round(e.retry_after, 3),
+                'elapsed': round(time.monotonic() - started, 3)}
+    except Exception as e:
+        return {'index': index, 'ok': False, 'error': f'Generation failed: {str(e)}',
+                'elapsed': round(time.monotonic() - started, 3)}
+    return {'index': index, 'ok': True, 'cache': cache_status,
+            'elapsed': round(time.monotonic() - started, 3),
+            'app': stamp_generated_app(generated_app, description)}
+
+def run_batch(items: List[Dict[str, Any]], defaults: Dict[str, Any],
+              concurrency: int) -> Generator[str, None, None]:
+    """Yield one NDJSON line per item in completion order, then a summary line
+    
+    At most `concurrency` items of this batch occupy the shared worker pool at
+    a time; the next item is submitted as soon as one finishes.
+    """
+    started = time.monotonic()
+    pending = set()
+    queued = iter(enumerate(items))
+    succeeded = failed = 0
+    
+    def submit_next():
+        for index, item in queued:
+            pending.add(batch_executor.submit(generate_batch_item, index, item, defaults))
+            return
+    
+    try:
+        for _ in range(concurrency):
+            submit_next()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                pending.discard(future)
+                submit_next()
+                result = future.result()
+                if result['ok']:
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield json.dumps(result) + '\n'
+        yield json.dumps({
+            'done': True,
+            'total': len(items),
+            'succeeded': succeeded,
+            'failed': failed,
+            'concurrency': concurrency,
+            'elapsed': round(time.monotonic() - started, 3)
+        }) + '\n'
+    finally:
+        # Client went away: stop feeding the pool; running items finish into the cache
+        for future in pending:
+            future.cancel()
+
+@llm_bp.route('/generate-app/batch', methods=['POST'])
+def generate_app_batch():
+    """Generate many apps with bounded concurrency, streaming NDJSON results as they finish
+    
+    Body: {"items": [{"description": ...}, ...]} or {"descriptions": [...]};
+    framework, provider and cache at the top level apply to every item unless
+    the item overrides them.
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'Missing items'}), 400
+    
+    if 'items' in data:
+        items = data['items']
+    else:
+        items = [{'description': description} for description in data.get('descriptions') or []]
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'items or descriptions must be a non-empty list'}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f'A batch may contain at most {BATCH_MAX_ITEMS} items'}), 400
+    if not all(isinstance(item, dict) for item in items):
+        return jsonify({'error': 'Each item must be an object'}), 400
+    
+    concurrency = data.get('concurrency', BATCH_DEFAULT_CONCURRENCY)
+    if not isinstance(concurrency, int) or isinstance(concurrency, bool) or not 1 <= concurrency <= BATCH_MAX_CONCURRENCY:
+        return jsonify({'error': f'concurrency must be an integer between 1 and {BATCH_MAX_CONCURRENCY}'}), 400
+    
+    defaults = {name: data[name] for name in ('framework', 'provider', 'cache') if name in data}
+    return Response(
+        run_batch(items, defaults, concurrency),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@llm_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Get LLM client metrics"""
+    return jsonify({
+        'pools': provider_pools.stats(),
+        'rate_limits': rate_limiters.stats(),
+        'cache': response_cache.stats(),
+        'routing': provider_router.stats(),
+        'single_flight': generation_flights.stats(),
+        'streams': stream_registry.stats(),
+        'prefetch': app_prefetches.stats(),
+        'latency': llm_metrics.summary()
+    })
+
+@llm_bp.route('/metrics/prometheus', methods=['GET'])
+def get_prometheus_metrics():
+    """Latency and throughput histograms in the Prometheus text format"""
+    return Response(llm_metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 @llm_bp.route('/preview/<app_id>', methods=['GET'])
 def preview_app(app_id):
@@ -0,0 +1,112 @@
+"""
+App categories detected from a description in one pass.
+
+Categories are data (src/app_categories.json): each has weighted keywords,
+synonyms that count as one of its keywords, and the actions its generated
+home screen offers. All keywords of all categories are compiled into one
+regular expression shaped like a trie (alternatives sharing a prefix share
+one branch), so the regex engine tries at most one keyword path per position
+and a scan costs time linear in the description, however many categories
+there are.
+
+Matching is case-insensitive, on whole words, leftmost-longest and
+non-overlapping ("work out plan" counts "work out", not also "work"), and
+any run of whitespace matches a space in a keyword. A category's score is
+the sum of the weights of its keyword occurrences; ties keep the order of
+the data file.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+def normalize_keyword(keyword: str) -> str:
+    return ' '.join(keyword.lower().split())
+
+
+class AppCategory:
+    """One category: its id, display name, weighted keywords and screen actions"""
+
+    def __init__(self, data: Dict):
+        self.id: str = data['id']
+        self.name: str = data.get('name', self.id)
+        self.actions: List[str] = data.get('actions', [])
+        self.keywords: Dict[str, float] = {
+            normalize_keyword(keyword): float(weight) for keyword, weight in data.get('keywords', {}).items()
+        }
+        for keyword, synonyms in data.get('synonyms', {}).items():
+            weight = self.keywords.get(normalize_keyword(keyword))
+            if weight is None:
+                raise ValueError(f'Synonyms of {self.id} for unknown keyword: {keyword}')
+            for synonym in synonyms:
+                self.keywords.setdefault(normalize_keyword(synonym), weight)
+
+
+def trie_pattern(keywords: List[str]) -> str:
+    """Regex alternation of keywords, factored by common prefix"""
+    root: Dict = {}
+    for keyword in keywords:
+        node = root
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def pattern(node: Dict) -> str:
+        branches = [(r'\s+' if char == ' ' else re.escape(char)) + pattern(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # A keyword ends here; the greedy group prefers the longer one
+            return ('(?:' + body + ')?') if len(branches) == 1 else body + '?'
+        return body
+
+    return pattern(root)
+
+
+class CategoryMatcher:
+    """Ranks categories for a description with one precompiled regex"""
+
+    def __init__(self, categories: List[AppCategory], default: str = 'default'):
+        self.categories: Dict[str, AppCategory] = {category.id: category for category in categories}
+        if default not in self.categories:
+            raise ValueError(f'Default category {default} is not defined')
+        self.default = default
+        self._order = {category_id: index for index, category_id in enumerate(self.categories)}
+        # keyword -> [(category, weight)]; a keyword may belong to several
+        self._weights: Dict[str, List[Tuple[str, float]]] = {}
+        for category in categories:
+            for keyword, weight in category.keywords.items():
+                if keyword:
+                    self._weights.setdefault(keyword, []).append((category.id, weight))
+        self._regex = None
+        if self._weights:
+            self._regex = re.compile(r'(?<!\w)' + trie_pattern(list(self._weights)) + r'(?!\w)')
+
+    def rank(self, description: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Categories with a positive score, best first"""
+        scores: Dict[str, float] = {}
+        if self._regex is not None:
+            weights = self._weights
+            for match in self._regex.finditer(description.lower()):
+                text = match.group()
+                for category_id, weight in weights[text if text in weights else normalize_keyword(text)]:
+                    scores[category_id] = scores.get(category_id, 0.0) + weight
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self._order[item[0]]))
+        return ranked[:limit] if limit is not None else ranked
+
+    def detect(self, description: str) -> str:
+        """Best category for a description, or the default when nothing matches"""
+        ranked = self.rank(description, limit=1)
+        return ranked[0][0] if ranked else self.default
+
+    def get(self, category_id: str) -> AppCategory:
+        return self.categories.get(category_id) or self.categories[self.default]
+
+
+def load_categories(path: str) -> CategoryMatcher:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return CategoryMatcher([AppCategory(item) for item in data['categories']], data.get('default', 'default'))
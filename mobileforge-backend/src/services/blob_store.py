@@ -0,0 +1,349 @@
+"""
+Content-addressed storage for generated project files.
+
+Every file is stored once as a blob named by the sha256 of its bytes; an app
+is a manifest mapping path -> hash. Boilerplate that is byte-identical across
+apps (App.css, AndroidManifest.xml, Info.plist, ...) therefore takes the
+space of one copy however many apps reference it.
+
+Layout under root:
+
+    blobs/<hash[:2]>/<hash>        file contents
+    manifests/<app_id>.json        {"<path>": "<hash>", ...}
+
+Blob paths are derived from the hash, and manifests are read from disk on
+demand and kept in a bounded LRU, so startup reads nothing and memory does not
+grow with the number of apps. Reference counts (for report()) are built by one
+scan of the manifests the first time a report is asked for, then kept up to
+date; the scan does not hold the lock, so stores and lookups proceed while it
+runs, and only referenced blobs have their size kept. Writes go through a temporary file and os.replace, and a blob that
+already exists is never rewritten, so processes sharing root cannot corrupt
+each other. Without a root everything stays in memory.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Optional, Set
+
+APP_ID_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+DEFAULT_MAX_MANIFESTS = 1024
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    """sha256-addressed blobs plus per-app path -> hash manifests"""
+
+    def __init__(self, root: Optional[str] = None, max_manifests: int = DEFAULT_MAX_MANIFESTS):
+        self.root = root
+        self.max_manifests = max_manifests
+        self._lock = threading.Lock()
+        # Held by the one report() that runs the first scan
+        self._scan_lock = threading.Lock()
+        # Recently used manifests; without a root, every manifest
+        self._manifests: 'OrderedDict[str, Dict[str, str]]' = OrderedDict()
+        # hash -> size of referenced blobs
+        self._sizes: Dict[str, int] = {}
+        # hash -> number of manifest entries referencing it, and the apps
+        # counted; on disk these are built on the first report()
+        self._refs: Optional[Dict[str, int]] = None if root else {}
+        self._counted: Optional[Set[str]] = None if root else set()
+        self._scanned = not root
+        # app id -> put_app/delete_app calls in progress, and while the scan
+        # runs, every app written or deleted since it started; the scan
+        # leaves those to the writer
+        self._writing: Dict[str, int] = {}
+        self._touched: Optional[Set[str]] = None
+        self._memory: Dict[str, bytes] = {}
+        if root:
+            os.makedirs(os.path.join(root, 'blobs'), exist_ok=True)
+            os.makedirs(os.path.join(root, 'manifests'), exist_ok=True)
+
+    def put_app(self, app_id: str, files: Dict[str, str],
+                unchanged: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Store an app's files, replacing any previous manifest; returns path -> hash
+
+        unchanged maps further paths to hashes of blobs already stored (files
+        carried over from an earlier version), which are referenced, not rewritten.
+        """
+        if not APP_ID_RE.match(app_id):
+            raise ValueError(f'Invalid app id: {app_id}')
+        manifest = {}
+        for path, digest in (unchanged or {}).items():
+            if not HASH_RE.match(digest) or (digest not in self._memory and not (
+                    self.root and os.path.exists(self._blob_path(digest)))):
+                raise ValueError(f'Unknown blob for {path}: {digest}')
+            manifest[path] = digest
+        blobs = {}
+        for path, content in files.items():
+            data = content.encode('utf-8')
+            digest = content_hash(data)
+            manifest[path] = digest
+            blobs[digest] = data
+
+        with self._lock:
+            counting = self._begin_write(app_id)
+        try:
+            # Only needed to release its references, once they are counted
+            previous = self.manifest(app_id) if counting else None
+            if self.root:
+                for digest, data in blobs.items():
+                    path = self._blob_path(digest)
+                    if not os.path.exists(path):
+                        self._write(path, data)
+                self._write(self._manifest_path(app_id), json.dumps(manifest, separators=(',', ':')).encode('utf-8'))
+            with self._lock:
+                if not self.root:
+                    for digest, data in blobs.items():
+                        self._memory.setdefault(digest, data)
+                self._cache(app_id, manifest)
+                if self._refs is not None:
+                    if app_id in self._counted and previous:
+                        for digest in previous.values():
+                            self._release(digest)
+                    self._count(app_id, manifest, {digest: len(data) for digest, data in blobs.items()})
+        finally:
+            with self._lock:
+                self._end_write(app_id)
+        return manifest
+
+    def put_blob(self, data: bytes) -> str:
+        """Store one blob ahead of the manifest that will reference it; returns its hash
+
+        Used to write files as they are produced; until put_app references it
+        (through unchanged) the blob is not counted in report().
+        """
+        digest = content_hash(data)
+        if self.root:
+            path = self._blob_path(digest)
+            if not os.path.exists(path):
+                self._write(path, data)
+        else:
+            with self._lock:
+                self._memory.setdefault(digest, data)
+        return digest
+
+    def manifest(self, app_id: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            manifest = self._manifests.get(app_id)
+            if manifest is not None:
+                self._manifests.move_to_end(app_id)
+                return manifest
+        if not self.root or not APP_ID_RE.match(app_id):
+            return None
+        manifest = self._read_manifest(app_id)
+        if manifest is not None:
+            with self._lock:
+                self._cache(app_id, manifest)
+                if (self._refs is not None and app_id not in self._counted
+                        and app_id not in self._writing):
+                    # Written by another process sharing root
+                    self._count(app_id, manifest)
+        return manifest
+
+    def get_blob(self, digest: str) -> Optional[bytes]:
+        data = self._memory.get(digest)
+        if data is not None or not self.root or not HASH_RE.match(digest):
+            return data
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def open_blob(self, digest: str) -> BinaryIO:
+        """Binary file object over a blob, for reading it in pieces; KeyError if unknown"""
+        data = self._memory.get(digest)
+        if data is not None:
+            return io.BytesIO(data)
+        if not self.root or not HASH_RE.match(digest):
+            raise KeyError(digest)
+        try:
+            return open(self._blob_path(digest), 'rb')
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+
+    def get_file(self, app_id: str, path: str) -> Optional[str]:
+        manifest = self.manifest(app_id)
+        if manifest is None or path not in manifest:
+            return None
+        data = self.get_blob(manifest[path])
+        return data.decode('utf-8') if data is not None else None
+
+    def get_files(self, app_id: str) -> Optional[Dict[str, str]]:
+        manifest = self.manifest(app_id)
+        if manifest is None:
+            return None
+        return {path: self.get_blob(digest).decode('utf-8') for path, digest in manifest.items()}
+
+    def delete_app(self, app_id: str) -> bool:
+        with self._lock:
+            self._begin_write(app_id)
+        try:
+            manifest = self.manifest(app_id)
+            if manifest is None:
+                return False
+            with self._lock:
+                self._manifests.pop(app_id, None)
+                if self._refs is not None and app_id in self._counted:
+                    self._counted.discard(app_id)
+                    for digest in manifest.values():
+                        self._release(digest)
+            if self.root:
+                try:
+                    os.remove(self._manifest_path(app_id))
+                except FileNotFoundError:
+                    pass
+            return True
+        finally:
+            with self._lock:
+                self._end_write(app_id)
+
+    def report(self) -> Dict[str, float]:
+        """Logical bytes (every app's full copy) against bytes actually stored"""
+        if not self._scanned:
+            with self._scan_lock:
+                if not self._scanned:
+                    self._scan()
+        with self._lock:
+            logical = sum(self._sizes[digest] * refs for digest, refs in self._refs.items())
+            stored = sum(self._sizes[digest] for digest in self._refs)
+            return {
+                'apps': len(self._counted),
+                'files': sum(self._refs.values()),
+                'blobs': len(self._refs),
+                'logical_bytes': logical,
+                'stored_bytes': stored,
+                'dedup_ratio': round(logical / stored, 2) if stored else 1.0,
+                'disk_enabled': bool(self.root)
+            }
+
+    def _release(self, digest: str):
+        """Drop one reference (caller holds the lock); unreferenced blobs leave memory.
+
+        Blob files are left on disk: another process sharing root may still
+        reference them without this one knowing.
+        """
+        refs = self._refs.get(digest, 0) - 1
+        if refs > 0:
+            self._refs[digest] = refs
+            return
+        self._refs.pop(digest, None)
+        self._sizes.pop(digest, None)
+        self._memory.pop(digest, None)
+
+    def _cache(self, app_id: str, manifest: Dict[str, str]):
+        """Remember a manifest (caller holds the lock), evicting the least recently used"""
+        self._manifests[app_id] = manifest
+        self._manifests.move_to_end(app_id)
+        if self.root:
+            while len(self._manifests) > self.max_manifests:
+                self._manifests.popitem(last=False)
+
+    def _begin_write(self, app_id: str) -> bool:
+        """Mark a put/delete of app_id in progress (caller holds the lock);
+        returns whether references are being counted
+        """
+        self._writing[app_id] = self._writing.get(app_id, 0) + 1
+        if self._touched is not None:
+            self._touched.add(app_id)
+        return self._refs is not None
+
+    def _end_write(self, app_id: str):
+        """Caller holds the lock"""
+        writes = self._writing.pop(app_id) - 1
+        if writes:
+            self._writing[app_id] = writes
+
+    def _count(self, app_id: str, manifest: Dict[str, str], sizes: Optional[Dict[str, int]] = None):
+        """Add an app's references (caller holds the lock).
+
+        sizes holds known blob sizes; others are taken from memory or stat'ed.
+        """
+        self._counted.add(app_id)
+        for digest in manifest.values():
+            self._refs[digest] = self._refs.get(digest, 0) + 1
+            if digest not in self._sizes:
+                size = sizes.get(digest) if sizes else None
+                self._sizes[digest] = size if size is not None else self._blob_size(digest)
+
+    def _blob_size(self, digest: str) -> int:
+        data = self._memory.get(digest)
+        if data is not None:
+            return len(data)
+        try:
+            return os.path.getsize(self._blob_path(digest))
+        except OSError:
+            return 0
+
+    def _scan(self):
+        """Count references from every manifest on disk (caller holds _scan_lock).
+
+        Manifests are read and their blobs stat'ed without the lock, one at a
+        time, and not kept. Counting starts empty, so put_app/delete_app keep
+        it current meanwhile; the scan skips apps they have touched.
+        """
+        with self._lock:
+            self._refs = {}
+            self._counted = set()
+            # A put/delete already under way may have read its previous
+            # manifest before counting started
+            self._touched = set(self._writing)
+        try:
+            directory = os.path.join(self.root, 'manifests')
+            for name in os.listdir(directory):
+                if not name.endswith('.json'):
+                    continue
+                app_id = name[:-5]
+                manifest = self._read_manifest(app_id)
+                if manifest is None:
+                    continue
+                sizes = {digest: self._blob_size(digest) for digest in set(manifest.values())
+                         if digest not in self._sizes}
+                with self._lock:
+                    if app_id not in self._counted and app_id not in self._touched:
+                        self._count(app_id, manifest, sizes)
+            self._scanned = True
+        except BaseException:
+            with self._lock:
+                self._refs = None
+                self._counted = None
+                self._sizes.clear()
+            raise
+        finally:
+            with self._lock:
+                self._touched = None
+
+    def _read_manifest(self, app_id: str) -> Optional[Dict[str, str]]:
+        try:
+            with open(self._manifest_path(app_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'blobs', digest[:2], digest)
+
+    def _manifest_path(self, app_id: str) -> str:
+        return os.path.join(self.root, 'manifests', app_id + '.json')
+
+    def _write(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,250 @@
+"""
+Persistent per-conversation chat history with token-budgeted context windows.
+
+Each conversation is an append-only JSON-lines file of compact records:
+
+    {"r": "u", "c": "<text>", "t": 12}               user turn
+    {"r": "a", "c": "<text>", "t": 80, "p": "gpt4"}  assistant turn
+    {"s": "<summary>", "u": 140, "t": 300}           summary of turns [0, u)
+
+Context building keeps token prefix sums per conversation, so finding the
+newest turns that fit the budget is a binary search. Turns that fall out of
+the window are folded into a running summary incrementally; only turns not
+yet summarized are processed. The summary is checkpointed to the log every
+SUMMARY_CHECKPOINT_TURNS folded turns; after a reload the turns past the last
+checkpoint are simply folded again on the next build.
+
+A user turn is only written together with the assistant reply it got, so a
+failed or cancelled stream leaves no unanswered turn in the history.
+
+Loaded conversations remember how far into their log they have read, and
+pick up records appended since (by another process or replica sharing the
+directory) with one stat call whenever they are fetched. Replicas must share
+the directory (e.g. a ReadWriteMany volume) for a conversation to follow a
+client across them.
+"""
+
+import json
+import os
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_CONTEXT_BUDGET = 4096
+# Share of the budget the running summary may use
+SUMMARY_BUDGET_RATIO = 0.25
+DEFAULT_MAX_LOADED = 256
+SUMMARY_LINE_CHARS = 160
+SUMMARY_CHECKPOINT_TURNS = 32
+
+CONVERSATION_ID_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+ROLES = {'u': 'user', 'a': 'assistant'}
+ROLE_CODES = {'user': 'u', 'assistant': 'a'}
+
+_encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return tokens_for_chars(len(text))
+
+
+def tokens_for_chars(chars: int) -> int:
+    """estimate_tokens for text of the given length"""
+    return max(1, (chars + 3) // 4)
+
+
+def extractive_summary(previous: str, turns: List[Dict[str, Any]], max_tokens: int) -> str:
+    """Fold turns into the previous summary, one clipped line per turn.
+
+    Oldest lines are dropped once the summary exceeds max_tokens.
+    """
+    lines = previous.split('\n') if previous else []
+    for turn in turns:
+        text = ' '.join(turn['content'].split())
+        if len(text) > SUMMARY_LINE_CHARS:
+            text = text[:SUMMARY_LINE_CHARS - 3] + '...'
+        lines.append(f"{turn['role']}: {text}")
+
+    total = sum(estimate_tokens(line) for line in lines)
+    start = 0
+    while total > max_tokens and start < len(lines) - 1:
+        total -= estimate_tokens(lines[start])
+        start += 1
+    return '\n'.join(lines[start:])
+
+
+def _turn_record(role: str, content: str, provider: Optional[str] = None) -> Dict[str, Any]:
+    record = {'r': ROLE_CODES[role], 'c': content, 't': estimate_tokens(content)}
+    if provider:
+        record['p'] = provider
+    return record
+
+
+class Conversation:
+    """In-memory view of one conversation log"""
+
+    def __init__(self, conversation_id: str, path: str):
+        self.conversation_id = conversation_id
+        self.path = path
+        self.turns = []
+        # prefix[i] = tokens of turns[0:i]
+        self.prefix = [0]
+        self.summary = ''
+        self.summary_upto = 0
+        self.summary_tokens = 0
+        self.checkpoint_upto = 0
+        # Bytes of the log applied so far
+        self.offset = 0
+        self.lock = threading.Lock()
+
+    def _apply(self, record: Dict[str, Any]):
+        if 's' in record:
+            self.summary = record['s']
+            self.summary_upto = record['u']
+            self.summary_tokens = record['t']
+            self.checkpoint_upto = record['u']
+        else:
+            turn = {'role': ROLES[record['r']], 'content': record['c'], 'tokens': record['t']}
+            if 'p' in record:
+                turn['provider'] = record['p']
+            self.turns.append(turn)
+            self.prefix.append(self.prefix[-1] + record['t'])
+
+    def load(self):
+        self.sync()
+
+    def sync(self):
+        """Apply records appended to the log since it was last read.
+
+        Callers other than load hold self.lock. A trailing partial line (a
+        write still in progress elsewhere) is left for the next sync.
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size <= self.offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+        self.offset += end
+
+    def _write(self, *records: Dict[str, Any]):
+        if not self.offset:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # One write, so records appended together stay adjacent in the log
+        with open(self.path, 'ab') as f:
+            f.write(''.join(_encode(record) + '\n' for record in records).encode('utf-8'))
+        # Reads back anything appended elsewhere since the last sync, then ours
+        self.sync()
+
+    def append(self, role: str, content: str, provider: Optional[str] = None) -> Dict[str, Any]:
+        with self.lock:
+            self._write(_turn_record(role, content, provider))
+            return self.turns[-1]
+
+    def append_exchange(self, message: str, reply: str, provider: Optional[str] = None):
+        """Record a user message and the reply it got as one write"""
+        with self.lock:
+            self._write(_turn_record('user', message), _turn_record('assistant', reply, provider))
+
+
+class ConversationStore:
+    """Conversation logs on disk with a bounded LRU of loaded conversations"""
+
+    def __init__(self, directory: str, max_loaded: int = DEFAULT_MAX_LOADED,
+                 summarize: Callable[[str, List[Dict[str, Any]], int], str] = extractive_summary):
+        self.directory = directory
+        self.max_loaded = max_loaded
+        self.summarize = summarize
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id: str) -> Conversation:
+        """Return the conversation, loading it from disk or creating it empty.
+
+        Raises ValueError for ids that are not safe file names.
+        """
+        if not CONVERSATION_ID_RE.match(conversation_id):
+            raise ValueError('conversation_id must be 1-64 characters of letters, digits, _ or -')
+        with self._lock:
+            conversation = self._loaded.get(conversation_id)
+            if conversation is not None:
+                self._loaded.move_to_end(conversation_id)
+                with conversation.lock:
+                    conversation.sync()
+                return conversation
+            conversation = Conversation(conversation_id, os.path.join(self.directory, conversation_id + '.jsonl'))
+            conversation.load()
+            self._loaded[conversation_id] = conversation
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+            return conversation
+
+    def exists(self, conversation_id: str) -> bool:
+        return (CONVERSATION_ID_RE.match(conversation_id) is not None
+                and (conversation_id in self._loaded
+                     or os.path.exists(os.path.join(self.directory, conversation_id + '.jsonl'))))
+
+    def build_context(self, conversation: Conversation, budget: int = DEFAULT_CONTEXT_BUDGET,
+                      pending: Optional[str] = None) -> List[Dict[str, str]]:
+        """Provider messages for the conversation within a token budget.
+
+        The newest turns that fit are sent verbatim; everything older is
+        represented by the running summary as a leading system message.
+        pending is a user message not yet in the log, sent as the last turn.
+        """
+        summary_budget = int(budget * SUMMARY_BUDGET_RATIO)
+        pending_tokens = 0 if pending is None else estimate_tokens(pending)
+        with conversation.lock:
+            total = conversation.prefix[-1] + pending_tokens
+            count = len(conversation.turns) + (pending is not None)
+            logged = len(conversation.prefix)
+            reserve = conversation.summary_tokens if conversation.summary_upto else 0
+            # First turn index whose suffix fits in the remaining budget
+            start = bisect_left(conversation.prefix, total - (budget - reserve), 0, logged)
+            # The newest turn is always sent, even if it alone exceeds the budget
+            start = min(max(start, conversation.summary_upto), max(count - 1, 0))
+
+            if start > conversation.summary_upto:
+                # Reserve the full summary share once older turns start falling out
+                start = max(start, bisect_left(conversation.prefix, total - (budget - summary_budget), 0, logged))
+                start = min(start, count - 1)
+                folded = conversation.turns[conversation.summary_upto:start]
+                summary = self.summarize(conversation.summary, folded, summary_budget)
+                record = {'s': summary, 'u': start, 't': estimate_tokens(summary)}
+                if start - conversation.checkpoint_upto >= SUMMARY_CHECKPOINT_TURNS:
+                    conversation._write(record)
+                else:
+                    conversation.summary = summary
+                    conversation.summary_upto = start
+                    conversation.summary_tokens = record['t']
+
+            messages = []
+            if conversation.summary_upto:
+                messages.append({'role': 'system',
+                                 'content': 'Summary of the earlier conversation:\n' + conversation.summary})
+            messages.extend({'role': turn['role'], 'content': turn['content']}
+                            for turn in conversation.turns[start:])
+            if pending is not None:
+                messages.append({'role': 'user', 'content': pending})
+            return messages
+
+    def history(self, conversation: Conversation) -> Dict[str, Any]:
+        with conversation.lock:
+            return {
+                'conversation_id': conversation.conversation_id,
+                'turns': list(conversation.turns),
+                'total_tokens': conversation.prefix[-1],
+                'summary': conversation.summary,
+                'summarized_turns': conversation.summary_upto,
+            }
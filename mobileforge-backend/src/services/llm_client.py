@@ -0,0 +1,96 @@
+"""
+Provider API clients for the LLM routes.
+
+Builds chat requests for the two wire formats used by LLM_PROVIDERS entries
+(``openai``-compatible chat completions and ``anthropic`` messages) and sends
+them over the shared ProviderPools so /chat and /generate-app reuse the same
+keep-alive connections.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterator, List, Tuple
+
+from services.provider_pool import ProviderPools
+from services.sse_parser import StreamEventError, StreamParser, extract_delta  # noqa: F401
+
+ANTHROPIC_VERSION = '2023-06-01'
+DEFAULT_MAX_TOKENS = 1024
+READ_CHUNK_BYTES = 64 * 1024
+
+
+class ProviderError(Exception):
+    """Raised when a provider returns a non-success response"""
+
+
+def build_request(config: Dict[str, Any], messages: List[Dict[str, str]],
+                  stream: bool) -> Tuple[str, bytes, Dict[str, str]]:
+    """Return (path, body, headers) for a chat request in the provider's format"""
+    api_key = os.getenv(config['api_key_env'], '')
+    payload = {
+        'model': config['model'],
+        'messages': messages,
+        'stream': stream,
+        'max_tokens': config.get('max_tokens', DEFAULT_MAX_TOKENS),
+    }
+    headers = {'Content-Type': 'application/json'}
+
+    if config.get('api') == 'anthropic':
+        # Anthropic takes system prompts as a top-level field, not a message role
+        system = [m['content'] for m in messages if m['role'] == 'system']
+        if system:
+            payload['system'] = '\n\n'.join(system)
+            payload['messages'] = [m for m in messages if m['role'] != 'system']
+        headers['x-api-key'] = api_key
+        headers['anthropic-version'] = ANTHROPIC_VERSION
+        path = '/messages'
+    else:
+        headers['Authorization'] = f'Bearer {api_key}'
+        path = '/chat/completions'
+
+    return path, json.dumps(payload).encode(), headers
+
+
+def extract_text(api: str, body: Dict[str, Any]) -> str:
+    """Pull the full text out of a non-streamed provider response"""
+    if api == 'anthropic':
+        return ''.join(block.get('text', '') for block in body.get('content', []))
+    return body['choices'][0]['message']['content']
+
+
+def _check_status(provider_id: str, response):
+    if response.status != 200:
+        detail = response.read()[:500].decode('utf-8', 'replace')
+        raise ProviderError(f'{provider_id} returned HTTP {response.status}: {detail}')
+
+
+def stream_chat(pools: ProviderPools, provider_id: str, messages: List[Dict[str, str]]) -> Iterator[str]:
+    """Stream text deltas for a chat given its context messages"""
+    config = pools.providers[provider_id]
+    api = config.get('api', 'openai')
+    path, body, headers = build_request(config, messages, stream=True)
+
+    parser = StreamParser(api)
+    with pools.get(provider_id).request('POST', path, body, headers) as response:
+        _check_status(provider_id, response)
+        while not parser.done:
+            chunk = response.read1(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            try:
+                deltas = parser.feed(chunk)
+            except StreamEventError as e:
+                raise ProviderError(f'{provider_id} stream error: {e}')
+            yield from deltas
+        # Drain the trailer so the connection can go back to the pool
+        response.read()
+
+
+def complete(pools: ProviderPools, provider_id: str, prompt: str) -> str:
+    """Return the full completion for a single-turn prompt"""
+    config = pools.providers[provider_id]
+    path, body, headers = build_request(config, [{'role': 'user', 'content': prompt}], stream=False)
+
+    with pools.get(provider_id).request('POST', path, body, headers) as response:
+        _check_status(provider_id, response)
+        return extract_text(config.get('api', 'openai'), json.loads(response.read()))
@@ -0,0 +1,219 @@
+"""
+Latency and throughput histograms for the LLM routes.
+
+Histograms use fixed bucket bounds so recording is a bisect and an increment.
+Per-token observations (inter-token gaps) are accumulated in stream-local
+bucket counts and merged into the shared histogram once when the stream ends,
+so the hot path takes no locks. Everything is labeled by provider and can be
+rendered in the Prometheus text exposition format.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+GAP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed set of upper bounds"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count', 'lock')
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        # counts[i] holds observations <= bounds[i]; the last slot is +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def merge(self, counts: List[int], total: float):
+        with self.lock:
+            for index, count in enumerate(counts):
+                self.counts[index] += count
+            self.sum += total
+            self.count += sum(counts)
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self.lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q: float, counts: List[int], count: int) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None past the last bound)"""
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket in enumerate(counts):
+            seen += bucket
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else None
+        return None
+
+
+class HistogramFamily:
+    """Histograms sharing a name and bounds, one per label value tuple"""
+
+    def __init__(self, name: str, help_text: str, bounds: Sequence[float], label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.bounds = tuple(bounds)
+        self.label_names = tuple(label_names)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.bounds))
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for values, child in sorted(self._children.items()):
+            counts, total, count = child.snapshot()
+            labels = ','.join(f'{name}="{value}"' for name, value in zip(self.label_names, values))
+            prefix = labels + ',' if labels else ''
+            cumulative = 0
+            for bound, bucket in zip(self.bounds + (float('inf'),), counts):
+                cumulative += bucket
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for values, child in sorted(self._children.items()):
+            counts, total, count = child.snapshot()
+            result[','.join(values)] = {
+                'count': count,
+                'avg': total / count if count else None,
+                'p50': child.quantile(0.5, counts, count),
+                'p95': child.quantile(0.95, counts, count),
+                'p99': child.quantile(0.99, counts, count),
+            }
+        return result
+
+
+class LLMMetrics:
+    """Histogram families recorded by /chat and /generate-app"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.queue_time = HistogramFamily(
+            'llm_queue_seconds', 'Time spent waiting for rate limit admission',
+            LATENCY_BUCKETS, ('provider', 'route'))
+        self.ttft = HistogramFamily(
+            'llm_ttft_seconds', 'Time from request to the first provider token',
+            LATENCY_BUCKETS, ('provider',))
+        self.token_gap = HistogramFamily(
+            'llm_inter_token_gap_seconds', 'Time between consecutive provider tokens',
+            GAP_BUCKETS, ('provider',))
+        self.tokens = HistogramFamily(
+            'llm_tokens', 'Estimated tokens produced per request',
+            TOKEN_BUCKETS, ('provider', 'route'))
+        self.tokens_per_second = HistogramFamily(
+            'llm_tokens_per_second', 'Estimated token rate after the first token',
+            RATE_BUCKETS, ('provider',))
+        self.duration = HistogramFamily(
+            'llm_request_seconds', 'Time from request to the last token or generated app',
+            LATENCY_BUCKETS, ('provider', 'route'))
+        self.disconnect = HistogramFamily(
+            'llm_client_disconnect_seconds', 'Time into the stream at which the client went away',
+            LATENCY_BUCKETS, ('provider',))
+        self.tokens_saved = HistogramFamily(
+            'llm_cancelled_tokens_saved', 'Estimated tokens not generated because an abandoned stream was cancelled',
+            TOKEN_BUCKETS, ('provider',))
+        self.families = [self.queue_time, self.ttft, self.token_gap, self.tokens,
+                         self.tokens_per_second, self.duration, self.disconnect, self.tokens_saved]
+
+    def expected_tokens(self, provider: str, default: int) -> float:
+        """Average tokens of completed chats for the provider, or default before any"""
+        _, total, count = self.tokens.labels(provider, 'chat').snapshot()
+        return total / count if count else default
+
+    def observe_stream(self, tokens: Iterator[str], started: float,
+                       provider: Callable[[], str],
+                       count_tokens: Callable[[int], int],
+                       max_tokens: int) -> Iterator[str]:
+        """Relay tokens while timing them; observations are recorded when the stream ends.
+
+        provider is called at the first token so auto-routed streams are
+        labeled with the provider that won. Only completed streams count
+        towards tokens, duration and rate; a stream closed early (cancelled)
+        records its estimated savings against the provider's average reply,
+        or max_tokens before any reply has completed.
+        """
+        clock = self.clock
+        gap_bounds = self.token_gap.bounds
+        gap_counts = [0] * (len(gap_bounds) + 1)
+        gap_total = 0.0
+        chars = 0
+        first = last = None
+        label = None
+        completed = cancelled = False
+        try:
+            for token in tokens:
+                now = clock()
+                if first is None:
+                    first = now
+                    label = provider()
+                else:
+                    gap = now - last
+                    gap_counts[bisect_left(gap_bounds, gap)] += 1
+                    gap_total += gap
+                last = now
+                chars += len(token)
+                yield token
+            completed = True
+        except GeneratorExit:
+            cancelled = True
+            raise
+        finally:
+            produced = count_tokens(chars) if chars else 0
+            if first is not None:
+                self.ttft.labels(label).observe(first - started)
+                self.token_gap.labels(label).merge(gap_counts, gap_total)
+            if completed and first is not None:
+                self.tokens.labels(label, 'chat').observe(produced)
+                self.duration.labels(label, 'chat').observe(last - started)
+                if last > first:
+                    self.tokens_per_second.labels(label).observe(produced / (last - first))
+            if cancelled:
+                label = label or provider()
+                self.tokens_saved.labels(label).observe(max(0.0, self.expected_tokens(label, max_tokens) - produced))
+
+    def watch_client(self, events: Iterator[str], started: float,
+                     provider: Callable[[], str]) -> Iterator[str]:
+        """Relay response events, recording when the client disconnects before the end"""
+        completed = False
+        try:
+            yield from events
+            completed = True
+        finally:
+            if not completed:
+                self.disconnect.labels(provider()).observe(self.clock() - started)
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for family in self.families:
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict[str, Any]:
+        return {family.name: family.summary() for family in self.families}
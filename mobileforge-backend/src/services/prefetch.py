@@ -0,0 +1,186 @@
+"""
+Speculative app generation started while the user is still typing.
+
+The UI posts the partial description under a session token; the work runs on
+a small pool and its result is kept in one of that session's slots, keyed by
+the request the final submit would make. Starting a prefetch for a new key
+cancels the session's other in-flight prefetches (they were started for a
+description that has since been edited) and drops them; finished results are
+kept, up to max_per_session slots per session. The final submit claims its slot and gets the finished
+result, or waits for the in-flight one, instead of starting over.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_WORKERS = 32
+DEFAULT_MAX_PER_SESSION = 3
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_TTL = 120.0
+MAX_TOKEN_LENGTH = 128
+
+
+class PrefetchCancelled(Exception):
+    """Raised inside a prefetch whose result is no longer wanted"""
+
+
+def session_token(header: Optional[str], data: Optional[Dict[str, Any]]) -> Optional[str]:
+    """The X-Session-Token header or session_token field, if it is a usable token"""
+    token = header or (data or {}).get('session_token')
+    if isinstance(token, str) and 0 < len(token) <= MAX_TOKEN_LENGTH:
+        return token
+    return None
+
+
+class Prefetch:
+    __slots__ = ('key', 'future', 'cancelled', 'touched')
+
+    def __init__(self, key: str, touched: float):
+        self.key = key
+        self.future = None
+        self.cancelled = threading.Event()
+        self.touched = touched
+
+    @property
+    def status(self) -> str:
+        if not self.future.done():
+            return 'running'
+        return 'failed' if self.future.cancelled() or self.future.exception() else 'ready'
+
+
+class PrefetchRegistry:
+    """Per-session prefetch slots with cancellation of stale work"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS,
+                 max_per_session: int = DEFAULT_MAX_PER_SESSION,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 ttl: float = DEFAULT_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_per_session = max_per_session
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch')
+        # session token -> OrderedDict of key -> Prefetch, both least recently used first
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'started': 0, 'reused': 0, 'hits': 0, 'inflight_hits': 0, 'misses': 0,
+                       'cancelled': 0, 'evicted': 0, 'expired': 0, 'failed': 0}
+
+    def start(self, session: str, key: str, fn: Callable[[threading.Event], Any]) -> Tuple[Prefetch, bool]:
+        """Run fn(cancelled) for key unless the session already has it.
+
+        Returns (prefetch, reused). fn should check the cancelled event before
+        any expensive step and raise PrefetchCancelled when it is set.
+        """
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            slots = self._sessions.get(session)
+            if slots is None:
+                slots = self._sessions[session] = OrderedDict()
+            self._sessions.move_to_end(session)
+
+            existing = slots.get(key)
+            if existing is not None and existing.status != 'failed':
+                existing.touched = now
+                slots.move_to_end(key)
+                self._stats['reused'] += 1
+                return existing, True
+            slots.pop(key, None)
+
+            # Keep finished results (the edit may be undone); drop work still running
+            for other in [other for other in slots.values() if not other.future.done()]:
+                self._cancel(other)
+                del slots[other.key]
+            prefetch = slots[key] = Prefetch(key, now)
+            prefetch.future = self._executor.submit(self._run, prefetch, fn)
+            self._stats['started'] += 1
+
+            while len(slots) > self.max_per_session:
+                self._cancel(slots.popitem(last=False)[1])
+                self._stats['evicted'] += 1
+            while len(self._sessions) > self.max_sessions:
+                for old in self._sessions.popitem(last=False)[1].values():
+                    self._cancel(old)
+                    self._stats['evicted'] += 1
+        return prefetch, False
+
+    def claim(self, session: str, key: str, timeout: Optional[float] = None) -> Optional[Tuple[Any, str]]:
+        """Take the session's result for key as (result, 'HIT' | 'INFLIGHT'), or None.
+
+        The session's other prefetches are cancelled: the final request has
+        been made. Failed, cancelled or timed-out prefetches count as misses
+        so the caller simply generates as usual.
+        """
+        with self._lock:
+            slots = self._sessions.pop(session, None) or {}
+            prefetch = slots.pop(key, None)
+            for other in slots.values():
+                self._cancel(other)
+            if prefetch is None or self.clock() - prefetch.touched > self.ttl:
+                self._stats['misses'] += 1
+                return None
+            state = 'HIT' if prefetch.future.done() else 'INFLIGHT'
+
+        try:
+            result = prefetch.future.result(timeout)
+        except (CancelledError, FutureTimeout, Exception):
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+        with self._lock:
+            self._stats['hits' if state == 'HIT' else 'inflight_hits'] += 1
+        return result, state
+
+    def cancel(self, session: str) -> int:
+        """Drop every prefetch of the session; returns how many were still running"""
+        with self._lock:
+            slots = self._sessions.pop(session, None) or {}
+            running = [prefetch for prefetch in slots.values() if not prefetch.future.done()]
+            for prefetch in slots.values():
+                self._cancel(prefetch)
+        return len(running)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats,
+                        sessions=len(self._sessions),
+                        slots=sum(len(slots) for slots in self._sessions.values()),
+                        max_per_session=self.max_per_session,
+                        ttl=self.ttl)
+
+    def _run(self, prefetch: Prefetch, fn: Callable[[threading.Event], Any]) -> Any:
+        if prefetch.cancelled.is_set():
+            raise PrefetchCancelled('Prefetch cancelled before it started')
+        try:
+            return fn(prefetch.cancelled)
+        except PrefetchCancelled:
+            raise
+        except Exception:
+            with self._lock:
+                self._stats['failed'] += 1
+            raise
+
+    def _cancel(self, prefetch: Prefetch):
+        """Stop a prefetch: queued work never runs, running work sees the event"""
+        if prefetch.future.done() or prefetch.cancelled.is_set():
+            return
+        prefetch.cancelled.set()
+        prefetch.future.cancel()
+        self._stats['cancelled'] += 1
+
+    def _expire(self, now: float):
+        """Drop idle sessions from the front of the LRU order"""
+        while self._sessions:
+            session, slots = next(iter(self._sessions.items()))
+            if slots and now - next(reversed(slots.values())).touched <= self.ttl:
+                break
+            del self._sessions[session]
+            for prefetch in slots.values():
+                self._cancel(prefetch)
+                self._stats['expired'] += 1
@@ -0,0 +1,273 @@
+"""
+Keep-alive HTTP connection pools for LLM providers.
+
+One ProviderPool per provider id keeps persistent connections to the
+provider's base URL so chats and app generations reuse TLS sessions instead of
+handshaking per request. Pools enforce a per-provider connection limit,
+connect/read timeouts and a retry budget, and expose hit-rate and
+connection-setup statistics.
+"""
+
+import http.client
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+# A chat stream holds its connection until the last token, so the limit is
+# sized for concurrent streams (a gevent worker holds hundreds), not for the
+# request rate
+DEFAULT_MAX_CONNECTIONS = 256
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_ACQUIRE_TIMEOUT = 10.0
+
+# Retries may use at most this fraction of recent request volume, plus a small
+# fixed reserve so low-traffic providers can still retry.
+RETRY_BUDGET_RATIO = 0.2
+RETRY_BUDGET_RESERVE = 3.0
+
+# Errors raised when a pooled keep-alive connection was closed by the server
+# while idle; these are safe to retry on a fresh connection.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    ConnectionResetError,
+    BrokenPipeError,
+    http.client.CannotSendRequest,
+)
+
+RETRYABLE_STATUSES = {502, 503, 504}
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection slot frees up within the acquire timeout"""
+
+
+class RetryBudget:
+    """Token bucket that caps retries to a fraction of request volume"""
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, reserve: float = RETRY_BUDGET_RESERVE):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.balance = reserve
+        self.lock = threading.Lock()
+
+    def deposit(self):
+        with self.lock:
+            self.balance = min(self.balance + self.ratio, self.reserve + 100 * self.ratio)
+
+    def withdraw(self) -> bool:
+        with self.lock:
+            if self.balance >= 1.0:
+                self.balance -= 1.0
+                return True
+            return False
+
+
+class ProviderPool:
+    """Bounded pool of keep-alive connections to a single provider"""
+
+    def __init__(self, provider_id: str, base_url: str,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT):
+        parts = urlsplit(base_url)
+        self.provider_id = provider_id
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip('/')
+        self.max_connections = max_connections
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.acquire_timeout = acquire_timeout
+        self.retry_budget = RetryBudget()
+
+        self._idle = []
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'requests': 0,
+            'hits': 0,
+            'misses': 0,
+            'connect_time_total': 0.0,
+            'connect_time_max': 0.0,
+            'retries': 0,
+            'retries_denied': 0,
+            'errors': 0,
+        }
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        conn_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        conn = conn_class(self.host, self.port, timeout=self.connect_timeout)
+        started = time.perf_counter()
+        conn.connect()
+        elapsed = time.perf_counter() - started
+        conn.sock.settimeout(self.read_timeout)
+        with self._cond:
+            self._stats['connect_time_total'] += elapsed
+            self._stats['connect_time_max'] = max(self._stats['connect_time_max'], elapsed)
+        return conn
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return a connection and whether it was reused from the idle list"""
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while not self._idle and self._open >= self.max_connections:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f'{self.provider_id}: no free connection after {self.acquire_timeout}s')
+                self._cond.wait(remaining)
+            if self._idle:
+                self._stats['hits'] += 1
+                return self._idle.pop(), True
+            self._open += 1
+            self._stats['misses'] += 1
+        try:
+            return self._new_connection(), False
+        except BaseException:
+            self._discard(None)
+            raise
+
+    def _release(self, conn: http.client.HTTPConnection):
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def _discard(self, conn: Optional[http.client.HTTPConnection]):
+        if conn is not None:
+            conn.close()
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None) -> Iterator[http.client.HTTPResponse]:
+        """Send a request on a pooled connection and yield the response.
+
+        The connection returns to the pool only if the response was read to
+        completion and the server allows keep-alive; a caller that stops
+        reading early (e.g. a cancelled stream) closes it instead. Stale
+        keep-alive connections and 502/503/504 responses are retried while
+        the retry budget allows.
+        """
+        with self._cond:
+            self._stats['requests'] += 1
+        self.retry_budget.deposit()
+
+        while True:
+            conn, reused = self._acquire()
+            try:
+                conn.request(method, self.base_path + path, body=body, headers=headers or {})
+                response = conn.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                self._discard(conn)
+                if reused and self._retry():
+                    continue
+                self._count_error()
+                raise
+            except Exception:
+                self._discard(conn)
+                self._count_error()
+                raise
+            except BaseException:
+                # Interrupted, e.g. a cancelled stream's greenlet was killed
+                self._discard(conn)
+                raise
+
+            if response.status in RETRYABLE_STATUSES and self._retry():
+                response.read()
+                self._finish(conn, response)
+                continue
+            break
+
+        try:
+            yield response
+        finally:
+            self._finish(conn, response)
+
+    def _retry(self) -> bool:
+        allowed = self.retry_budget.withdraw()
+        with self._cond:
+            self._stats['retries' if allowed else 'retries_denied'] += 1
+        return allowed
+
+    def _count_error(self):
+        with self._cond:
+            self._stats['errors'] += 1
+
+    def _finish(self, conn: http.client.HTTPConnection, response: http.client.HTTPResponse):
+        if response.isclosed() and not response.will_close:
+            self._release(conn)
+        else:
+            self._discard(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self._stats)
+            stats['open'] = self._open
+            stats['idle'] = len(self._idle)
+        acquired = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / acquired if acquired else 0.0
+        stats['connect_time_avg_ms'] = stats.pop('connect_time_total') / stats['misses'] * 1000 if stats['misses'] else 0.0
+        stats['connect_time_max_ms'] = stats.pop('connect_time_max') * 1000
+        stats['max_connections'] = self.max_connections
+        return stats
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn in idle:
+            conn.close()
+
+
+class ProviderPools:
+    """Registry of ProviderPool instances keyed by provider id.
+
+    Pools are created lazily from the provider config. ``<PROVIDER_ID>_BASE_URL``
+    (e.g. ``GPT4_BASE_URL``) overrides the configured base URL, which is how the
+    pools are pointed at a local stand-in server. ``<PROVIDER_ID>_MAX_CONNECTIONS``
+    overrides the connection limit and ``LLM_POOL_ACQUIRE_TIMEOUT`` how long a
+    request waits for a free connection.
+    """
+
+    def __init__(self, providers: Dict[str, Dict[str, Any]]):
+        self.providers = providers
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def base_url(self, provider_id: str) -> str:
+        return os.getenv(f'{provider_id.upper()}_BASE_URL', self.providers[provider_id]['base_url'])
+
+    def get(self, provider_id: str) -> ProviderPool:
+        pool = self._pools.get(provider_id)
+        if pool is not None:
+            return pool
+        with self._lock:
+            if provider_id not in self._pools:
+                config = self.providers[provider_id]
+                self._pools[provider_id] = ProviderPool(
+                    provider_id,
+                    self.base_url(provider_id),
+                    max_connections=int(os.getenv(f'{provider_id.upper()}_MAX_CONNECTIONS',
+                                                  config.get('max_connections', DEFAULT_MAX_CONNECTIONS))),
+                    connect_timeout=config.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT),
+                    read_timeout=config.get('read_timeout', DEFAULT_READ_TIMEOUT),
+                    acquire_timeout=float(os.getenv('LLM_POOL_ACQUIRE_TIMEOUT',
+                                                    config.get('acquire_timeout', DEFAULT_ACQUIRE_TIMEOUT))),
+                )
+            return self._pools[provider_id]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {provider_id: pool.stats() for provider_id, pool in list(self._pools.items())}
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.close()
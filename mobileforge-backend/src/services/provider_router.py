@@ -0,0 +1,310 @@
+"""
+Latency-aware provider routing with hedged requests.
+
+Tracks an EWMA of time-to-first-token (TTFT) and tokens/sec per provider from
+every stream it observes. In ``auto`` mode the fastest provider is tried
+first; if it has produced nothing by its p95 TTFT a hedged request goes to the
+runner-up, the first provider to produce a token wins and the other stream is
+cancelled. Providers whose streams fail rank lower by an EWMA of their error
+rate, weighted as ERROR_PENALTY seconds of TTFT.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from services.pump import Pump
+
+DEFAULT_ALPHA = 0.2
+# TTFT assumed for providers we have not measured yet
+DEFAULT_TTFT = 1.0
+MIN_HEDGE_DELAY = 0.05
+MAX_HEDGE_DELAY = 10.0
+# Below this many samples the p95 is unreliable and the EWMA-based prior is used
+MIN_P95_SAMPLES = 20
+TTFT_WINDOW = 200
+# Seconds added to a provider's ranking TTFT at a 100% error rate; a failed
+# attempt costs a failover on top of the wait
+ERROR_PENALTY = 5.0
+
+_END = object()
+
+
+class ProviderLatency:
+    """Latency statistics for one provider"""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.ewma_ttft = None
+        self.ewma_tps = None
+        self.error_rate = 0.0
+        self.samples = 0
+        self.recent_ttft = deque(maxlen=TTFT_WINDOW)
+
+    def observe_ttft(self, ttft: float):
+        self.samples += 1
+        self.recent_ttft.append(ttft)
+        if self.ewma_ttft is None:
+            self.ewma_ttft = ttft
+        else:
+            self.ewma_ttft += self.alpha * (ttft - self.ewma_ttft)
+
+    def observe_rate(self, tokens_per_sec: float):
+        if self.ewma_tps is None:
+            self.ewma_tps = tokens_per_sec
+        else:
+            self.ewma_tps += self.alpha * (tokens_per_sec - self.ewma_tps)
+
+    def observe_result(self, failed: bool):
+        self.error_rate += self.alpha * ((1.0 if failed else 0.0) - self.error_rate)
+
+    def p95_ttft(self) -> Optional[float]:
+        if len(self.recent_ttft) < MIN_P95_SAMPLES:
+            return None
+        ordered = sorted(self.recent_ttft)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+class ProviderRouter:
+    """Routes ``auto`` requests to the currently fastest provider"""
+
+    def __init__(self, alpha: float = DEFAULT_ALPHA, min_hedge_delay: float = MIN_HEDGE_DELAY,
+                 max_hedge_delay: float = MAX_HEDGE_DELAY):
+        self.alpha = alpha
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self._latency = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'decisions': {},
+            'hedges': 0,
+            'hedge_wins': 0,
+            'primary_wins_after_hedge': 0,
+            'failovers': 0,
+        }
+
+    def _provider(self, provider_id: str) -> ProviderLatency:
+        latency = self._latency.get(provider_id)
+        if latency is None:
+            with self._lock:
+                latency = self._latency.setdefault(provider_id, ProviderLatency(self.alpha))
+        return latency
+
+    def _count(self, name: str, provider_id: Optional[str] = None):
+        with self._lock:
+            if provider_id is None:
+                self._stats[name] += 1
+            else:
+                bucket = self._stats[name]
+                bucket[provider_id] = bucket.get(provider_id, 0) + 1
+
+    def rank(self, candidates: List[str]) -> List[str]:
+        """Order candidates fastest first by EWMA TTFT plus the error penalty,
+        breaking ties on tokens/sec.
+
+        Unmeasured providers rank first so each one gets sampled.
+        """
+        def score(provider_id):
+            latency = self._provider(provider_id)
+            ttft = latency.ewma_ttft if latency.ewma_ttft is not None else 0.0
+            return (ttft + ERROR_PENALTY * latency.error_rate, -(latency.ewma_tps or 0.0))
+        return sorted(candidates, key=score)
+
+    def hedge_delay(self, provider_id: str) -> float:
+        latency = self._provider(provider_id)
+        delay = latency.p95_ttft()
+        if delay is None:
+            delay = 2 * latency.ewma_ttft if latency.ewma_ttft is not None else DEFAULT_TTFT
+        return min(max(delay, self.min_hedge_delay), self.max_hedge_delay)
+
+    def track(self, provider_id: str, tokens: Iterator[str],
+              claim_ttft: Optional[Callable[[], bool]] = None) -> Iterator[str]:
+        """Pass tokens through while recording TTFT, tokens/sec and failures.
+
+        With claim_ttft the TTFT is only recorded if it returns True, so a
+        stream whose wait was already sampled elsewhere is not counted twice.
+        """
+        latency = self._provider(provider_id)
+        started = time.monotonic()
+        first_token_at = None
+        count = 0
+        try:
+            for token in tokens:
+                if first_token_at is None:
+                    first_token_at = time.monotonic()
+                    if claim_ttft is None or claim_ttft():
+                        latency.observe_ttft(first_token_at - started)
+                count += 1
+                yield token
+        except Exception:
+            latency.observe_result(failed=True)
+            raise
+        finally:
+            if hasattr(tokens, 'close'):
+                tokens.close()
+        latency.observe_result(failed=False)
+        if first_token_at is not None and count > 1:
+            elapsed = time.monotonic() - first_token_at
+            if elapsed > 0:
+                latency.observe_rate((count - 1) / elapsed)
+
+    def route(self, candidates: List[str], open_stream: Callable[[str], Iterator[str]],
+              hedge: bool = True) -> 'HedgedStream':
+        ranked = self.rank(candidates)
+        self._count('decisions', ranked[0])
+        return HedgedStream(self, ranked, open_stream, hedge)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                'decisions': dict(self._stats['decisions']),
+                'hedges': self._stats['hedges'],
+                'hedge_wins': self._stats['hedge_wins'],
+                'primary_wins_after_hedge': self._stats['primary_wins_after_hedge'],
+                'failovers': self._stats['failovers'],
+            }
+            latencies = dict(self._latency)
+        stats['hedge_win_rate'] = stats['hedge_wins'] / stats['hedges'] if stats['hedges'] else 0.0
+        stats['providers'] = {
+            provider_id: {
+                'ewma_ttft_ms': latency.ewma_ttft * 1000 if latency.ewma_ttft is not None else None,
+                'ewma_tokens_per_sec': latency.ewma_tps,
+                'error_rate': latency.error_rate,
+                'p95_ttft_ms': latency.p95_ttft() * 1000 if latency.p95_ttft() is not None else None,
+                'hedge_delay_ms': self.hedge_delay(provider_id) * 1000,
+                'samples': latency.samples,
+            }
+            for provider_id, latency in latencies.items()
+        }
+        stats['config'] = {
+            'alpha': self.alpha,
+            'min_hedge_delay_ms': self.min_hedge_delay * 1000,
+            'max_hedge_delay_ms': self.max_hedge_delay * 1000,
+        }
+        return stats
+
+
+class HedgedStream:
+    """Token iterator that races a hedge request against a slow primary.
+
+    Each upstream stream runs in its own (green) thread and pushes tokens onto
+    a shared queue. ``provider`` is set to the winning provider once the first
+    token arrives. Losing streams are stopped, which aborts their upstream
+    request (see services.pump).
+    """
+
+    def __init__(self, router: ProviderRouter, ranked: List[str],
+                 open_stream: Callable[[str], Iterator[str]], hedge: bool):
+        self.router = router
+        self.ranked = ranked
+        self.open_stream = open_stream
+        self.hedge = hedge
+        self.provider = None
+        self._queue = queue.Queue()
+        self._pumps = {}
+        self._started = {}
+        # Providers whose TTFT has been sampled, real or censored
+        self._sampled = set()
+        self._sampled_lock = threading.Lock()
+        # Providers whose stream ended before a winner was picked
+        self._ended = set()
+        self._next = 0
+
+    def _start_next(self) -> Optional[str]:
+        if self._next >= len(self.ranked):
+            return None
+        provider_id = self.ranked[self._next]
+        self._next += 1
+        self._started[provider_id] = time.monotonic()
+        self._pumps[provider_id] = Pump(
+            self._stream(provider_id),
+            lambda token: self._queue.put((provider_id, token, None)),
+            lambda error: self._queue.put((provider_id, _END, error)))
+        return provider_id
+
+    def _stream(self, provider_id: str) -> Iterator[str]:
+        # A generator, so the upstream request is opened on the pump's thread
+        yield from self.router.track(provider_id, self.open_stream(provider_id),
+                                     claim_ttft=lambda: self._claim(provider_id))
+
+    def _claim(self, provider_id: str) -> bool:
+        """Reserve the single TTFT sample of a provider's stream"""
+        with self._sampled_lock:
+            if provider_id in self._sampled:
+                return False
+            self._sampled.add(provider_id)
+            return True
+
+    def _cancel_others(self, winner: str):
+        for provider_id, pump in self._pumps.items():
+            if provider_id != winner:
+                pump.stop()
+                if provider_id not in self._ended and self._claim(provider_id):
+                    # A loser still waiting counts its wait as a (censored) TTFT;
+                    # one that already failed was counted as an error instead
+                    self.router._provider(provider_id).observe_ttft(time.monotonic() - self._started[provider_id])
+
+    def _first_token(self):
+        """Wait for the first token, hedging and failing over as needed"""
+        primary = self._start_next()
+        active = {primary}
+        hedged = False
+        last_error = None
+        deadline = time.monotonic() + self.router.hedge_delay(primary)
+
+        while active:
+            timeout = None
+            if self.hedge and not hedged:
+                timeout = max(deadline - time.monotonic(), 0)
+            try:
+                provider_id, token, error = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                hedged = True
+                secondary = self._start_next()
+                if secondary is not None:
+                    active.add(secondary)
+                    self.router._count('hedges')
+                continue
+
+            if token is _END:
+                active.discard(provider_id)
+                self._ended.add(provider_id)
+                last_error = error or last_error
+                if not active:
+                    replacement = self._start_next()
+                    if replacement is not None:
+                        self.router._count('failovers')
+                        active.add(replacement)
+                        deadline = time.monotonic() + self.router.hedge_delay(replacement)
+                continue
+
+            self.provider = provider_id
+            if hedged:
+                self.router._count('hedge_wins' if provider_id != primary else 'primary_wins_after_hedge')
+            self._cancel_others(provider_id)
+            return token
+
+        if last_error is not None:
+            raise last_error
+        return None
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            token = self._first_token()
+            if token is None:
+                return
+            yield token
+            while True:
+                provider_id, token, error = self._queue.get()
+                if provider_id != self.provider:
+                    continue
+                if token is _END:
+                    if error is not None:
+                        raise error
+                    return
+                yield token
+        finally:
+            for pump in self._pumps.values():
+                pump.stop()
@@ -0,0 +1,75 @@
+"""
+Iterators drained on their own (green) thread.
+
+A provider token stream is read on a separate thread when its consumer must
+not block on it: a hedged request races several streams, and timed SSE
+framing flushes while the provider is silent. Stopping such a reader has to
+abort its upstream request at once, also while it waits for the next token.
+
+Under the gevent worker (gunicorn.conf.py) threads are greenlets, and stop()
+kills the reader where it waits. The exception unwinds the iterator, which
+closes the pooled provider connection, as closing the iterator would. OS
+threads cannot be interrupted in a blocking read, so there the iterator is
+closed when its next item arrives.
+"""
+
+import threading
+from typing import Any, Callable, Iterator, Optional
+
+try:
+    import gevent
+    from gevent import monkey
+except ImportError:
+    gevent = None
+
+
+def _green() -> bool:
+    return gevent is not None and monkey.is_module_patched('threading')
+
+
+class Pump:
+    """Passes each item of an iterator to on_item from a daemon thread.
+
+    on_end is called with None when the iterator is exhausted, or with the
+    exception it raised; neither is called after stop().
+    """
+
+    def __init__(self, items: Iterator[Any], on_item: Callable[[Any], None],
+                 on_end: Callable[[Optional[Exception]], None]):
+        self.items = items
+        self.on_item = on_item
+        self.on_end = on_end
+        self._stopped = threading.Event()
+        self._greenlet = None
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        if _green():
+            self._greenlet = gevent.getcurrent()
+        error = None
+        try:
+            if self._stopped.is_set():
+                return
+            for item in self.items:
+                if self._stopped.is_set():
+                    return
+                self.on_item(item)
+        except Exception as e:
+            error = e
+        except BaseException:
+            if self._stopped.is_set():
+                # Killed by stop(); the iterator has unwound
+                return
+            raise
+        finally:
+            if hasattr(self.items, 'close'):
+                self.items.close()
+        if not self._stopped.is_set():
+            self.on_end(error)
+
+    def stop(self):
+        """Stop reading and close the iterator, interrupting a pending read when possible"""
+        self._stopped.set()
+        greenlet = self._greenlet
+        if greenlet is not None and greenlet is not gevent.getcurrent():
+            gevent.kill(greenlet)
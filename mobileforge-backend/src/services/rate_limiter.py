@@ -0,0 +1,217 @@
+"""
+Per-provider rate limiting with token buckets and a bounded wait queue.
+
+Each provider has two buckets refilled continuously from its per-minute
+limits: one for requests and one for tokens. A request is admitted once both
+buckets cover it. Requests that cannot be admitted immediately wait in a FIFO
+queue of bounded length for at most ``max_queue_time``; when the queue is
+full, or the wait would exceed that bound, ``RateLimited`` is raised at once
+with a ``retry_after`` hint so the caller can answer 429 instead of holding a
+worker.
+
+Prompt tokens are charged on admission. Completion tokens are only known
+afterwards and are charged with ``consume``, which may drive the token bucket
+negative so later requests wait until the debt is repaid.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_MAX_QUEUE_TIME = 10.0
+
+
+class RateLimited(Exception):
+    """Raised when a request cannot be admitted within the queue bounds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    """Continuously refilled bucket; a rate of 0 means unlimited"""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float]):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def refill(self, now: float):
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def cost(self, amount: float) -> float:
+        # A single request larger than the bucket could never be admitted
+        return min(amount, self.capacity)
+
+    def delay(self, amount: float) -> float:
+        """Seconds until the bucket holds amount"""
+        if self.unlimited:
+            return 0.0
+        return max(0.0, (self.cost(amount) - self.level) / self.rate)
+
+    def take(self, amount: float):
+        if not self.unlimited:
+            self.level -= self.cost(amount)
+
+    def charge(self, amount: float):
+        """Debit without clamping to capacity; the level may go negative"""
+        if not self.unlimited:
+            self.level -= amount
+
+
+class ProviderLimiter:
+    """Request and token buckets plus a bounded FIFO wait queue for one provider"""
+
+    def __init__(self, provider_id: str, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_queue: int = DEFAULT_MAX_QUEUE, max_queue_time: float = DEFAULT_MAX_QUEUE_TIME,
+                 clock: Callable[[], float] = time.monotonic):
+        self.provider_id = provider_id
+        self.clock = clock
+        self.requests = TokenBucket(requests_per_minute, clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock)
+        self.max_queue = max_queue
+        self.max_queue_time = max_queue_time
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._stats = {
+            'admitted': 0, 'queued': 0, 'rejected_full': 0, 'rejected_wait': 0,
+            'timeouts': 0, 'wait_total': 0.0, 'wait_max': 0.0, 'tokens_charged': 0,
+        }
+
+    def _refill(self) -> float:
+        now = self.clock()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return now
+
+    def _delay(self, tokens: float) -> float:
+        return max(self.requests.delay(1), self.tokens.delay(tokens))
+
+    def _estimate_wait(self, tokens: float) -> float:
+        """Rough wait for a request joining the back of the queue"""
+        ahead = len(self._queue)
+        request_wait = 0.0 if self.requests.unlimited else (ahead + 1 - self.requests.level) / self.requests.rate
+        return max(0.0, request_wait, self.tokens.delay(tokens))
+
+    def _admit(self, tokens: float, waited: float) -> float:
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self._stats['admitted'] += 1
+        self._stats['tokens_charged'] += int(tokens)
+        self._stats['wait_total'] += waited
+        self._stats['wait_max'] = max(self._stats['wait_max'], waited)
+        return waited
+
+    def acquire(self, tokens: float = 0) -> float:
+        """Block until a request costing tokens is admitted; returns the time waited.
+
+        Raises RateLimited when the queue is full or the wait would exceed
+        max_queue_time.
+        """
+        with self._cond:
+            started = self._refill()
+            if not self._queue and self._delay(tokens) == 0:
+                return self._admit(tokens, 0.0)
+
+            if len(self._queue) >= self.max_queue:
+                self._stats['rejected_full'] += 1
+                raise RateLimited(f'{self.provider_id} rate limit queue is full',
+                                  self._estimate_wait(tokens))
+            estimate = self._estimate_wait(tokens)
+            if estimate > self.max_queue_time:
+                self._stats['rejected_wait'] += 1
+                raise RateLimited(f'{self.provider_id} rate limit wait would exceed '
+                                  f'{self.max_queue_time:g}s', estimate)
+
+            ticket = object()
+            self._queue.append(ticket)
+            self._stats['queued'] += 1
+            deadline = started + self.max_queue_time
+            try:
+                while True:
+                    now = self._refill()
+                    delay = self._delay(tokens)
+                    if self._queue[0] is ticket and delay == 0:
+                        self._queue.popleft()
+                        return self._admit(tokens, now - started)
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise RateLimited(f'Timed out waiting for {self.provider_id} rate limit',
+                                          max(delay, self._estimate_wait(tokens)))
+                    # Only the head can be admitted next; others wait for a notify
+                    self._cond.wait(min(remaining, delay) if self._queue[0] is ticket and delay else remaining)
+            finally:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def consume(self, tokens: float):
+        """Charge tokens used after admission (e.g. the completion)"""
+        with self._cond:
+            self._refill()
+            self.tokens.charge(tokens)
+            self._stats['tokens_charged'] += int(tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            self._refill()
+            stats = dict(self._stats)
+            stats['queue_depth'] = len(self._queue)
+            stats['requests_available'] = None if self.requests.unlimited else round(self.requests.level, 2)
+            stats['tokens_available'] = None if self.tokens.unlimited else round(self.tokens.level, 2)
+        waited = stats['admitted']
+        stats['wait_avg_ms'] = stats.pop('wait_total') / waited * 1000 if waited else 0.0
+        stats['wait_max_ms'] = stats.pop('wait_max') * 1000
+        stats['max_queue'] = self.max_queue
+        stats['max_queue_time'] = self.max_queue_time
+        stats['requests_per_minute'] = self.requests.capacity
+        stats['tokens_per_minute'] = self.tokens.capacity
+        return stats
+
+
+class RateLimiters:
+    """ProviderLimiter per provider id, configured from the provider's ``rate_limit``.
+
+    ``<PROVIDER_ID>_REQUESTS_PER_MINUTE`` and ``<PROVIDER_ID>_TOKENS_PER_MINUTE``
+    (e.g. ``GPT4_TOKENS_PER_MINUTE``) override the configured limits; 0 disables
+    that bucket.
+    """
+
+    def __init__(self, providers: Dict[str, Dict[str, Any]]):
+        self._limiters = {}
+        for provider_id, config in providers.items():
+            limits = config.get('rate_limit', {})
+            prefix = provider_id.upper()
+            self._limiters[provider_id] = ProviderLimiter(
+                provider_id,
+                requests_per_minute=float(os.getenv(f'{prefix}_REQUESTS_PER_MINUTE',
+                                                    limits.get('requests_per_minute', 0))),
+                tokens_per_minute=float(os.getenv(f'{prefix}_TOKENS_PER_MINUTE',
+                                                  limits.get('tokens_per_minute', 0))),
+                max_queue=limits.get('max_queue', DEFAULT_MAX_QUEUE),
+                max_queue_time=limits.get('max_queue_time', DEFAULT_MAX_QUEUE_TIME),
+            )
+
+    def get(self, provider_id: str) -> Optional[ProviderLimiter]:
+        return self._limiters.get(provider_id)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {provider_id: limiter.stats() for provider_id, limiter in self._limiters.items()}
@@ -0,0 +1,152 @@
+"""
+Two-tier response cache for LLM generations.
+
+A bounded in-memory LRU with per-entry TTL sits in front of an optional
+on-disk tier (one JSON file per key) that survives restarts. Disk hits are
+promoted back into memory. Values must be JSON-serializable.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL = 3600.0
+
+# Request-level cache modes: read and write, skip entirely, or recompute and overwrite
+CACHE_MODES = ('default', 'bypass', 'refresh')
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold and collapse whitespace so trivially different inputs share a key"""
+    return ' '.join(text.lower().split())
+
+
+def cache_key(*parts: str) -> str:
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL memory cache with an optional persistent disk tier"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL,
+                 disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'bypasses': 0,
+            'refreshes': 0,
+        }
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + '.json')
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return value
+                del self._entries[key]
+                self._stats['expirations'] += 1
+
+        if self.disk_dir:
+            value = self._disk_get(key, now)
+            if value is not None:
+                self._count('disk_hits')
+                return value
+
+        self._count('misses')
+        return None
+
+    def _disk_get(self, key: str, now: float) -> Optional[Any]:
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if record['expires_at'] <= now:
+            self._count('expirations')
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        self._memory_set(key, record['value'], record['expires_at'])
+        return record['value']
+
+    def _memory_set(self, key: str, value: Any, expires_at: float):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def set(self, key: str, value: Any):
+        expires_at = time.time() + self.ttl
+        self._memory_set(key, value, expires_at)
+        self._count('sets')
+        if self.disk_dir:
+            self._disk_set(key, value, expires_at)
+
+    def _disk_set(self, key: str, value: Any, expires_at: float):
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'expires_at': expires_at, 'value': value}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def lookup(self, key: str, mode: str) -> Optional[Any]:
+        """Read honoring a request cache mode; returns None when the mode skips reads"""
+        if mode == 'bypass':
+            self._count('bypasses')
+            return None
+        if mode == 'refresh':
+            self._count('refreshes')
+            return None
+        return self.get(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['ttl'] = self.ttl
+        stats['disk_enabled'] = bool(self.disk_dir)
+        return stats
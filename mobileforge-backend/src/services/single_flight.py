@@ -0,0 +1,89 @@
+"""
+Single-flight coalescing of identical in-flight requests.
+
+The first caller for a key (the leader) runs the work; concurrent callers with
+the same key wait for the leader and receive its result, or its exception.
+Results are shared between callers and must be treated as read-only.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_MAX_WAIT = 30.0
+
+
+class SingleFlightTimeout(Exception):
+    """Raised when a waiter gives up on the in-flight computation"""
+
+
+def request_key(*parts: Any) -> str:
+    """Canonical hash of JSON-serializable request parts (key order independent)"""
+    canonical = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key"""
+
+    def __init__(self, max_wait: float = DEFAULT_MAX_WAIT):
+        self.max_wait = max_wait
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'executions': 0, 'coalesced': 0, 'timeouts': 0, 'errors': 0}
+
+    def do(self, key: str, fn: Callable[[], Any], max_wait: Optional[float] = None) -> Tuple[Any, bool]:
+        """Run fn once per key among concurrent callers.
+
+        Returns (result, shared) where shared is True for callers that waited
+        on another caller's computation.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats['executions'] += 1
+            else:
+                call.waiters += 1
+                self._stats['coalesced'] += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+                with self._lock:
+                    self._stats['errors'] += 1
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result, False
+
+        if not call.done.wait(self.max_wait if max_wait is None else max_wait):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise SingleFlightTimeout('Timed out waiting for an identical in-flight request')
+        if call.error is not None:
+            raise call.error
+        return call.result, True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        stats['max_wait'] = self.max_wait
+        return stats
@@ -0,0 +1,127 @@
+"""
+Incremental parser for provider SSE byte streams.
+
+Chunks are appended to one bytearray and scanned in place for event
+boundaries, so events split across chunk boundaries need no special handling
+and no per-line strings are created. Token deltas are pulled straight out of
+the buffer for the two wire formats used by LLM_PROVIDERS entries:
+
+    openai     ``data: {..."delta":{..."content":"<token>"}...}``
+    anthropic  ``event: content_block_delta`` / ``data: {..."delta":{..."text":"<token>"}}``
+
+For events carrying a delta only the token string is located (by offsets
+into the buffer) and decoded. Other events are skipped unless they look like
+an error or the ``[DONE]`` marker; those few go through json.loads.
+"""
+
+import json
+import re
+from typing import Any, Dict, List
+
+_QUOTE = 0x22
+
+# Key of the delta's text field per wire format
+DELTA_KEYS = {'openai': b'"content":', 'anthropic': b'"text":'}
+# The key's JSON string value, for escaped or non-compact events; group 1 is the raw body
+DELTA_TEXT = {
+    api: re.compile(re.escape(key) + rb'[ \t]*"((?:[^"\\]|\\.)*)"') for api, key in DELTA_KEYS.items()
+}
+
+
+class StreamEventError(Exception):
+    """Raised when the provider sends an error event mid-stream"""
+
+
+def extract_delta(api: str, event: Dict[str, Any]) -> str:
+    """Pull the text delta out of one parsed provider event"""
+    if 'error' in event or event.get('type') == 'error':
+        error = event.get('error')
+        raise StreamEventError(error.get('message', str(error)) if isinstance(error, dict) else str(error))
+    if api == 'anthropic':
+        if event.get('type') == 'content_block_delta':
+            return event['delta'].get('text', '')
+        return ''
+    choices = event.get('choices') or [{}]
+    return choices[0].get('delta', {}).get('content') or ''
+
+
+class StreamParser:
+    """Turns raw SSE chunks from one provider response into text deltas"""
+
+    def __init__(self, api: str):
+        self.api = api
+        self.done = False
+        self._key = DELTA_KEYS.get(api, DELTA_KEYS['openai'])
+        self._text = DELTA_TEXT.get(api, DELTA_TEXT['openai'])
+        self._buf = bytearray()
+        # Offset below which the buffer is known to hold no event boundary
+        self._scanned = 0
+
+    def feed(self, chunk: bytes) -> List[str]:
+        """Return the deltas of every event completed by chunk"""
+        buf = self._buf
+        start = len(buf)
+        buf += chunk
+        if b'\r' in chunk:
+            # Providers use \n; normalize CRLF, including a pair split across chunks
+            start = max(start - 1, 0)
+            buf[start:] = buf[start:].replace(b'\r\n', b'\n')
+
+        find = buf.find
+        key = self._key
+        value_at = len(key)
+        deltas = []
+        pos = 0
+        scan = max(self._scanned - 1, 0)
+        while True:
+            end = find(b'\n\n', scan)
+            if end < 0:
+                break
+            delta = find(b'"delta":', pos, end)
+            if delta >= 0:
+                at = find(key, delta, end)
+                if at >= 0:
+                    at += value_at
+                    close = find(b'"', at + 1, end) if buf[at] == _QUOTE else -1
+                    if close > at + 1 and find(b'\\', at + 1, close) < 0:
+                        # Compact JSON without escapes: the common case
+                        deltas.append(buf[at + 1:close].decode())
+                    elif close < 0 or find(b'\\', at + 1, close) >= 0:
+                        text = self._decode(buf, at - value_at, end)
+                        if text:
+                            deltas.append(text)
+            else:
+                self._other(buf, pos, end)
+                if self.done:
+                    pos = end + 2
+                    break
+            pos = scan = end + 2
+        if pos:
+            del buf[:pos]
+        self._scanned = len(buf)
+        return deltas
+
+    def _decode(self, buf: bytearray, pos: int, end: int) -> str:
+        """Decode the text value at pos when it has escapes or whitespace (or is null)"""
+        match = self._text.match(buf, pos, end)
+        if match is None:
+            return ''
+        return json.loads(b'"' + match.group(1) + b'"')
+
+    def _other(self, buf: bytearray, pos: int, end: int):
+        """Handle an event without a delta: [DONE], errors; everything else is skipped"""
+        data = []
+        name = None
+        for line in bytes(buf[pos:end]).split(b'\n'):
+            if line.startswith(b'data:'):
+                data.append(line[5:].lstrip(b' '))
+            elif line.startswith(b'event:'):
+                name = line[6:].strip()
+        payload = b'\n'.join(data)
+        if payload == b'[DONE]':
+            self.done = True
+        elif name == b'error' or b'"error"' in payload:
+            event = json.loads(payload)
+            if name == b'error' and 'error' not in event:
+                raise StreamEventError(str(event))
+            extract_delta(self.api, event)
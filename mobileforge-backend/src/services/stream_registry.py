@@ -0,0 +1,249 @@
+"""
+Resumable SSE streams backed by per-stream replay ring buffers.
+
+Each stream's producer runs detached from the HTTP response and appends
+framed events, tagged with ``id: <stream_id>:<seq>``, to a bounded ring
+buffer. Responses tail the buffer, so a client that reconnects with
+``Last-Event-ID`` resumes from the next event without calling the provider
+again, and any number of other clients can subscribe to the same stream by
+id. Finished streams stay buffered for a short retention window.
+
+Buffers count their attached responses. Tailing responses send an SSE comment
+heartbeat while no events arrive, so a closed client surfaces as a failed
+write and detaches promptly. Once a stream has had no subscriber for the
+cancel grace period its producer is closed, which aborts the upstream
+provider request; a client resuming later gets the events buffered so far
+followed by a cancellation error.
+
+Buffers are held in process memory, so with several replicas a watcher or a
+resuming client must be routed to the replica that started the stream (sticky
+sessions); elsewhere the stream id is unknown and the request gets a 410.
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from services.sse import sse_event
+
+DEFAULT_RETENTION = 60.0
+DEFAULT_MAX_STREAM_BYTES = 256 * 1024
+DEFAULT_MAX_STREAMS = 1000
+DEFAULT_CANCEL_GRACE = 3.0
+# How long a tailing response waits for the next event before sending a heartbeat
+HEARTBEAT_INTERVAL = 5.0
+HEARTBEAT = ': keep-alive\n\n'
+
+
+class StreamGone(Exception):
+    """Raised when a stream or the events after a Last-Event-ID are no longer buffered"""
+
+
+def parse_event_id(event_id: str) -> Tuple[str, int]:
+    """Split a ``<stream_id>:<seq>`` event id; raises StreamGone if malformed"""
+    stream_id, _, seq = event_id.strip().rpartition(':')
+    if not stream_id or not seq.isdigit():
+        raise StreamGone(f'Malformed Last-Event-ID: {event_id}')
+    return stream_id, int(seq)
+
+
+class StreamBuffer:
+    """Bounded ring of framed SSE events for one stream
+
+    Events are stored already tagged with their ``id:`` line, so every
+    subscriber yields the same string objects and only keeps a cursor. The
+    producer never waits for subscribers; one that falls behind the ring is
+    dropped with StreamGone instead of holding events for everyone.
+    """
+
+    def __init__(self, stream_id: str, max_bytes: int):
+        self.stream_id = stream_id
+        self.max_bytes = max_bytes
+        self.events = deque()
+        self.bytes = 0
+        self.next_seq = 0
+        self.evicted = 0
+        self.done = False
+        self.cancelled = False
+        self.finished_at = None
+        self.subscribers = 0
+        self.detached_at = None
+        self.cond = threading.Condition()
+
+    def append(self, event: str):
+        event = f'id: {self.stream_id}:{self.next_seq}\n{event}'
+        with self.cond:
+            self.events.append(event)
+            self.next_seq += 1
+            self.bytes += len(event)
+            # Always keep the newest event even if it alone exceeds the cap
+            while self.bytes > self.max_bytes and len(self.events) > 1:
+                dropped = self.events.popleft()
+                self.bytes -= len(dropped)
+                self.evicted += 1
+            self.cond.notify_all()
+
+    def finish(self):
+        with self.cond:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self.cond.notify_all()
+
+    def first_seq(self) -> int:
+        return self.next_seq - len(self.events)
+
+    def abandoned(self, grace: float) -> bool:
+        """True once every subscriber has been gone for longer than grace"""
+        with self.cond:
+            return (self.subscribers == 0 and self.detached_at is not None
+                    and time.monotonic() - self.detached_at > grace)
+
+    def tail(self, after_seq: int = -1) -> Iterator[str]:
+        """Yield events with seq > after_seq as ``id:``-tagged SSE, waiting for new ones"""
+        next_seq = after_seq + 1
+        with self.cond:
+            self.subscribers += 1
+        try:
+            while True:
+                with self.cond:
+                    if next_seq >= self.next_seq and not self.done:
+                        self.cond.wait(HEARTBEAT_INTERVAL)
+                    if next_seq < self.first_seq():
+                        raise StreamGone(f'Events of stream {self.stream_id} before {self.first_seq()} were evicted')
+                    # Index from the right: subscribers near the tip cost O(new events)
+                    behind = self.next_seq - next_seq
+                    pending = [self.events[-i] for i in range(behind, 0, -1)]
+                    done = self.done
+                if not pending and not done:
+                    # Writing to a closed client fails here and detaches this subscriber
+                    yield HEARTBEAT
+                    continue
+                next_seq += len(pending)
+                yield from pending
+                if done and next_seq >= self.next_seq:
+                    return
+        finally:
+            with self.cond:
+                self.subscribers -= 1
+                if not self.subscribers:
+                    self.detached_at = time.monotonic()
+
+
+class StreamRegistry:
+    """Tracks resumable streams and sweeps them after the retention window"""
+
+    def __init__(self, retention: float = DEFAULT_RETENTION,
+                 max_stream_bytes: int = DEFAULT_MAX_STREAM_BYTES,
+                 max_streams: int = DEFAULT_MAX_STREAMS,
+                 cancel_grace: float = DEFAULT_CANCEL_GRACE):
+        self.retention = retention
+        self.max_stream_bytes = max_stream_bytes
+        self.max_streams = max_streams
+        self.cancel_grace = cancel_grace
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._stats = {'created': 0, 'resumed': 0, 'gone': 0, 'expired': 0, 'cancelled': 0, 'subscribed': 0}
+
+    def _sweep(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                stream_id for stream_id, buffer in self._streams.items()
+                if buffer.done and now - buffer.finished_at > self.retention
+            ]
+            # Over capacity: drop the oldest finished streams first
+            overflow = len(self._streams) - len(expired) - self.max_streams
+            if overflow > 0:
+                finished = sorted(
+                    (buffer.finished_at, stream_id) for stream_id, buffer in self._streams.items()
+                    if buffer.done and stream_id not in expired
+                )
+                expired.extend(stream_id for _, stream_id in finished[:overflow])
+            for stream_id in expired:
+                del self._streams[stream_id]
+            self._stats['expired'] += len(expired)
+
+    def create(self, make_events: Callable[[str], Iterator[str]]) -> StreamBuffer:
+        """Start a detached producer that drains make_events(stream_id) into a new buffer.
+
+        make_events should return a generator; it is closed when the stream
+        is abandoned so the upstream request can be aborted.
+        """
+        self._sweep()
+        buffer = StreamBuffer(uuid.uuid4().hex, self.max_stream_bytes)
+        with self._lock:
+            self._streams[buffer.stream_id] = buffer
+            self._stats['created'] += 1
+
+        def produce():
+            events = make_events(buffer.stream_id)
+            try:
+                for event in events:
+                    buffer.append(event)
+                    if buffer.abandoned(self.cancel_grace):
+                        buffer.cancelled = True
+                        break
+            finally:
+                if buffer.cancelled:
+                    events.close()
+                    with self._lock:
+                        self._stats['cancelled'] += 1
+                    buffer.append(sse_event({'error': 'Stream cancelled after the client disconnected',
+                                             'done': True}))
+                buffer.finish()
+
+        threading.Thread(target=produce, daemon=True).start()
+        return buffer
+
+    def resume(self, last_event_id: str) -> Iterator[str]:
+        """Tail a buffered stream from the event after last_event_id.
+
+        Raises StreamGone if the stream expired or the next event was evicted.
+        """
+        self._sweep()
+        stream_id, seq = parse_event_id(last_event_id)
+        with self._lock:
+            buffer = self._streams.get(stream_id)
+        if buffer is None or seq + 1 < buffer.first_seq():
+            with self._lock:
+                self._stats['gone'] += 1
+            raise StreamGone(f'Stream {stream_id} is no longer buffered')
+        with self._lock:
+            self._stats['resumed'] += 1
+        return buffer.tail(seq)
+
+    def subscribe(self, stream_id: str, after_seq: Optional[int] = None) -> Iterator[str]:
+        """Tail a stream as an additional subscriber.
+
+        Without after_seq a late joiner starts from the oldest buffered event.
+        Raises StreamGone if the stream is unknown or expired.
+        """
+        self._sweep()
+        with self._lock:
+            buffer = self._streams.get(stream_id)
+        if buffer is None:
+            with self._lock:
+                self._stats['gone'] += 1
+            raise StreamGone(f'Stream {stream_id} is no longer buffered')
+        with self._lock:
+            self._stats['subscribed'] += 1
+        if after_seq is None:
+            after_seq = buffer.first_seq() - 1
+        return buffer.tail(after_seq)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buffers = list(self._streams.values())
+            stats = dict(self._stats)
+        stats['streams'] = len(buffers)
+        stats['active'] = sum(1 for buffer in buffers if not buffer.done)
+        stats['subscribers'] = sum(buffer.subscribers for buffer in buffers)
+        stats['buffered_bytes'] = sum(buffer.bytes for buffer in buffers)
+        stats['max_stream_bytes_used'] = max((buffer.bytes for buffer in buffers), default=0)
+        stats['evicted_events'] = sum(buffer.evicted for buffer in buffers)
+        stats['max_stream_bytes'] = self.max_stream_bytes
+        stats['retention'] = self.retention
+        stats['cancel_grace'] = self.cancel_grace
+        return stats
@@ -0,0 +1,278 @@
+"""
+Framework template packs, loaded from versioned directories.
+
+Layout under root:
+
+    <framework>/<version>/pack.json     name, description, aliases, dependencies,
+                                        build_commands, deployment_info, ...
+    <framework>/<version>/files/...     template files, at the paths they generate
+
+The index is built from pack.json files only, so listing frameworks reads no
+template contents. The files of a pack are read and compiled the first time
+its framework is used. Files of MMAP_MIN_BYTES or more are copied verbatim
+(they are not scanned for placeholders) and mapped with mmap instead of read,
+so worker processes share them through the page cache. Generated files are
+text, so files that are not valid UTF-8 (images, fonts) are skipped when the
+pack loads and listed in LoadedPack.skipped. The newest version of a
+framework is used unless a version is asked for.
+
+A watcher thread polls the tree every watch_interval seconds (stat calls
+only) and swaps in a new index when anything changed; loaded packs whose
+files changed are dropped and compiled again on next use. Requests already
+holding a LoadedPack finish with it.
+"""
+
+import codecs
+import json
+import mmap
+import os
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from services.template_renderer import CompiledTemplate, compile_files, iter_render_files
+
+DEFAULT_WATCH_INTERVAL = 2.0
+MMAP_MIN_BYTES = 256 * 1024
+# Slice of a mapped asset decoded at a time when checking it is UTF-8
+DECODE_CHECK_BYTES = 1024 * 1024
+PACK_FILE = 'pack.json'
+FILES_DIR = 'files'
+
+
+def is_utf8(data) -> bool:
+    """Whether a bytes-like object decodes as UTF-8, checked a slice at a time"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    view = memoryview(data)
+    try:
+        for start in range(0, len(view), DECODE_CHECK_BYTES):
+            decoder.decode(view[start:start + DECODE_CHECK_BYTES])
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    finally:
+        view.release()
+    return True
+
+
+def version_key(version: str) -> Tuple:
+    """Sort key for versions like 1.10.0, which must sort after 1.9.0"""
+    return tuple((0, int(part), '') if part.isdigit() else (1, 0, part) for part in version.split('.'))
+
+
+class PackInfo:
+    """Metadata of one pack version, from its pack.json"""
+
+    def __init__(self, framework: str, version: str, path: str, meta: Dict, signature: Tuple, files: Tuple):
+        self.framework = framework
+        self.version = version
+        self.path = path
+        self.name = meta.get('name', framework)
+        self.description = meta.get('description', '')
+        self.sort_order = meta.get('sort_order', 0)
+        self.aliases: List[str] = [alias.lower() for alias in meta.get('aliases', [])]
+        self.dependencies: Dict[str, str] = meta.get('dependencies', {})
+        self.build_commands: List[str] = meta.get('build_commands', [])
+        self.deployment_info: Dict = meta.get('deployment_info', {})
+        # Files a client shows first (the main screen), rendered before the rest
+        self.entry_files: List[str] = meta.get('entry_files', [])
+        # (path, size, mtime_ns) of every template file
+        self.files = files
+        # pack.json's (size, mtime_ns) plus files; a change means reload
+        self.signature = signature
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.framework,
+            'version': self.version,
+            'name': self.name,
+            'description': self.description,
+            'platforms': self.deployment_info.get('platforms', [])
+        }
+
+
+class LoadedPack:
+    """A pack's files, compiled for rendering"""
+
+    def __init__(self, info: PackInfo):
+        self.info = info
+        sources: Dict[str, str] = {}
+        # Large verbatim files, mapped rather than read
+        self.assets: Dict[str, mmap.mmap] = {}
+        # path -> why it is not generated
+        self.skipped: Dict[str, str] = {}
+        files_root = os.path.join(info.path, FILES_DIR)
+        for path, size, _ in info.files:
+            full_path = os.path.join(files_root, *path.split('/'))
+            with open(full_path, 'rb') as f:
+                if size >= MMAP_MIN_BYTES:
+                    asset = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    if is_utf8(asset):
+                        self.assets[path] = asset
+                    else:
+                        asset.close()
+                        self.skipped[path] = 'not UTF-8 text'
+                    continue
+                data = f.read()
+            try:
+                sources[path] = data.decode('utf-8')
+            except UnicodeDecodeError:
+                self.skipped[path] = 'not UTF-8 text'
+        # The dependency block is constant per pack and folded in
+        self.compiled: Dict[str, CompiledTemplate] = compile_files(
+            sources, {'DEPENDENCIES': json.dumps(info.dependencies, indent=2)}
+        )
+        # path -> placeholders it renders, so a regeneration knows which files
+        # a changed field can touch
+        self.file_dependencies: Dict[str, FrozenSet[str]] = {
+            path: template.placeholders for path, template in self.compiled.items()
+        }
+        self.file_dependencies.update((path, frozenset()) for path in self.assets)
+
+    @property
+    def paths(self) -> List[str]:
+        """Every file, entry files first and the rest in path order"""
+        entry = [path for path in self.info.entry_files if path in self.file_dependencies]
+        return entry + sorted(path for path in self.file_dependencies if path not in entry)
+
+    def render(self, values: Dict[str, str], paths: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Render files (all of them unless paths is given)"""
+        return dict(self.iter_render(values, paths))
+
+    def iter_render(self, values: Dict[str, str], paths: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, str]]:
+        """Yield (path, text) one file at a time, entry files first"""
+        wanted = None if paths is None else set(paths)
+        order = [path for path in self.paths if wanted is None or path in wanted]
+        templates = iter_render_files(self.compiled, values, [path for path in order if path in self.compiled])
+        for path in order:
+            if path in self.assets:
+                # Decoded straight from the mapping, without an intermediate bytes copy
+                yield path, str(self.assets[path], 'utf-8')
+            else:
+                yield next(templates)
+
+
+class TemplatePackStore:
+    """Index of the packs under root, with lazily loaded packs and a reload watcher"""
+
+    def __init__(self, root: str, watch_interval: float = DEFAULT_WATCH_INTERVAL):
+        self.root = root
+        self._lock = threading.Lock()
+        # framework -> version -> info
+        self._index: Dict[str, Dict[str, PackInfo]] = {}
+        self._loaded: Dict[Tuple[str, str], LoadedPack] = {}
+        self._stats = {'loads': 0, 'reloads': 0}
+        self.errors: Dict[str, str] = {}
+        self.reload()
+        if watch_interval > 0:
+            watcher = threading.Thread(target=self._watch, args=(watch_interval,), daemon=True)
+            watcher.start()
+
+    def frameworks(self) -> Dict[str, PackInfo]:
+        """Newest pack of every framework, in display order"""
+        latest = [max(versions.values(), key=lambda info: version_key(info.version))
+                  for versions in self._index.values()]
+        return {info.framework: info for info in sorted(latest, key=lambda info: (info.sort_order, info.framework))}
+
+    def versions(self, framework: str) -> List[str]:
+        return sorted(self._index.get(framework, {}), key=version_key)
+
+    def get(self, framework: str, version: Optional[str] = None) -> PackInfo:
+        """Pack metadata; KeyError for an unknown framework or version"""
+        versions = self._index.get(framework)
+        if not versions:
+            raise KeyError(framework)
+        if version is None:
+            return max(versions.values(), key=lambda info: version_key(info.version))
+        return versions[version]
+
+    def load(self, framework: str, version: Optional[str] = None) -> LoadedPack:
+        """Compiled pack, loading it on first use; KeyError if unknown"""
+        info = self.get(framework, version)
+        key = (framework, info.version)
+        pack = self._loaded.get(key)
+        if pack is not None and pack.info is info:
+            return pack
+        with self._lock:
+            pack = self._loaded.get(key)
+            if pack is None or pack.info is not info:
+                pack = self._loaded[key] = LoadedPack(info)
+                self._stats['loads'] += 1
+        return pack
+
+    def reload(self) -> bool:
+        """Rescan root; returns whether any pack was added, changed or removed"""
+        scanned = self._scan()
+        with self._lock:
+            current = {(info.framework, info.version): info.signature
+                       for versions in self._index.values() for info in versions.values()}
+            found = {key: info.signature for key, info in scanned.items()}
+            if current == found:
+                return False
+            index: Dict[str, Dict[str, PackInfo]] = {}
+            for (framework, version), info in scanned.items():
+                old = self._index.get(framework, {}).get(version)
+                # Keep unchanged infos so their loaded packs stay valid
+                index.setdefault(framework, {})[version] = old if old and old.signature == info.signature else info
+            self._index = index
+            self._loaded = {key: pack for key, pack in self._loaded.items()
+                            if index.get(key[0], {}).get(key[1]) is pack.info}
+            self._stats['reloads'] += 1
+            return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats, packs=sum(len(versions) for versions in self._index.values()),
+                        loaded=sorted(f'{framework}@{version}' for framework, version in self._loaded),
+                        skipped={f'{framework}@{version}': dict(pack.skipped)
+                                 for (framework, version), pack in self._loaded.items() if pack.skipped},
+                        errors=dict(self.errors))
+
+    def _scan(self) -> Dict[Tuple[str, str], PackInfo]:
+        packs = {}
+        errors = {}
+        if not os.path.isdir(self.root):
+            self.errors = errors
+            return packs
+        for framework in sorted(os.listdir(self.root)):
+            framework_dir = os.path.join(self.root, framework)
+            if not os.path.isdir(framework_dir):
+                continue
+            for version in os.listdir(framework_dir):
+                pack_dir = os.path.join(framework_dir, version)
+                if not os.path.isfile(os.path.join(pack_dir, PACK_FILE)):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(pack_dir, PACK_FILE))
+                    files = self._files(pack_dir)
+                    with open(os.path.join(pack_dir, PACK_FILE), 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                except (OSError, ValueError) as e:
+                    # A pack being edited may be half written; skip it until it parses
+                    errors[f'{framework}@{version}'] = str(e)
+                    continue
+                packs[(framework, version)] = PackInfo(
+                    framework, version, pack_dir, meta, ((stat.st_size, stat.st_mtime_ns), files), files
+                )
+        self.errors = errors
+        return packs
+
+    def _files(self, pack_dir: str) -> Tuple:
+        entries = []
+        files_root = os.path.join(pack_dir, FILES_DIR)
+        for directory, _, names in os.walk(files_root):
+            for name in names:
+                full_path = os.path.join(directory, name)
+                stat = os.stat(full_path)
+                path = os.path.relpath(full_path, files_root).replace(os.sep, '/')
+                entries.append((path, stat.st_size, stat.st_mtime_ns))
+        return tuple(sorted(entries))
+
+    def _watch(self, interval: float):
+        while True:
+            time.sleep(interval)
+            try:
+                self.reload()
+            except OSError:
+                # Directories renamed mid-scan; the next pass sees the result
+                pass
@@ -0,0 +1,144 @@
+"""
+Compiled ``{{PLACEHOLDER}}`` templates for generated project files.
+
+A template is split once into literal segments and placeholder slots, so
+rendering is a single ``''.join`` instead of one ``str.replace`` pass per
+placeholder. Values known at compile time (e.g. a framework's dependency
+block) are folded into the literals.
+
+Each file gets an escaping rule from its extension so user text such as an
+app description stays valid inside JSON strings, plist XML, YAML scalars,
+Dart string literals and JSX text. Placeholders listed in RAW_PLACEHOLDERS
+carry generated code and are inserted unescaped. Plain text (letters, digits,
+spaces and common punctuation) is unchanged by every rule.
+"""
+
+import json
+import os
+import re
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+PLACEHOLDER = re.compile(r'\{\{([A-Z_]+)\}\}')
+RAW_PLACEHOLDERS = frozenset({'DEPENDENCIES', 'MAIN_CONTENT'})
+
+_YAML_PLAIN = re.compile(r'[A-Za-z0-9][A-Za-z0-9 _.,()/+-]*\Z')
+_JSX_SPECIAL = re.compile(r'[{}<>]')
+
+
+def escape_json(value: str) -> str:
+    """Contents of a JSON string literal"""
+    return json.dumps(value, ensure_ascii=False)[1:-1]
+
+
+def escape_xml(value: str) -> str:
+    return (value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            .replace('"', '&quot;').replace("'", '&apos;'))
+
+
+def escape_yaml(value: str) -> str:
+    """A plain scalar when safe, otherwise a double-quoted one (JSON is valid YAML)"""
+    if not value or _YAML_PLAIN.match(value):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def escape_dart(value: str) -> str:
+    """Contents of a single-quoted Dart string literal"""
+    return (value.replace('\\', '\\\\').replace("'", "\\'").replace('$', '\\$')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def escape_jsx(value: str) -> str:
+    """JSX text; anything with braces or angle brackets becomes a string expression"""
+    if not _JSX_SPECIAL.search(value):
+        return value
+    return '{' + json.dumps(value, ensure_ascii=False) + '}'
+
+
+def escape_none(value: str) -> str:
+    return value
+
+
+ESCAPERS: Dict[str, Callable[[str], str]] = {
+    '.json': escape_json,
+    '.xml': escape_xml,
+    '.plist': escape_xml,
+    '.yaml': escape_yaml,
+    '.yml': escape_yaml,
+    '.dart': escape_dart,
+    '.js': escape_jsx,
+    '.jsx': escape_jsx,
+}
+
+
+def escaper_for(path: str) -> Callable[[str], str]:
+    return ESCAPERS.get(os.path.splitext(path)[1].lower(), escape_none)
+
+
+class CompiledTemplate:
+    """Literal segments with placeholder slots, rendered in one pass"""
+
+    __slots__ = ('segments', 'slots', 'placeholders', 'escape')
+
+    def __init__(self, text: str, escape: Callable[[str], str] = escape_none,
+                 constants: Optional[Dict[str, str]] = None):
+        constants = constants or {}
+        segments: List[str] = []
+        slots: List[Tuple[int, str]] = []
+        literal = []
+        pos = 0
+        for match in PLACEHOLDER.finditer(text):
+            name = match.group(1)
+            literal.append(text[pos:match.start()])
+            pos = match.end()
+            if name in constants:
+                literal.append(constants[name])
+                continue
+            segments.append(''.join(literal))
+            literal = []
+            slots.append((len(segments), name))
+            segments.append('')
+        literal.append(text[pos:])
+        segments.append(''.join(literal))
+        self.segments = segments
+        self.slots = slots
+        self.placeholders: FrozenSet[str] = frozenset(name for _, name in slots)
+        self.escape = escape
+
+    def render(self, values: Dict[str, str]) -> str:
+        """values holds already-escaped text for every placeholder"""
+        if not self.slots:
+            return self.segments[0]
+        parts = self.segments[:]
+        for index, name in self.slots:
+            parts[index] = values[name]
+        return ''.join(parts)
+
+
+def compile_files(files: Dict[str, str], constants: Optional[Dict[str, str]] = None) -> Dict[str, CompiledTemplate]:
+    """Compile every file of a template set with the escaping rule of its extension"""
+    return {path: CompiledTemplate(text, escaper_for(path), constants) for path, text in files.items()}
+
+
+def render_files(compiled: Dict[str, CompiledTemplate], values: Dict[str, str],
+                 paths: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """Render files (all of them unless paths is given), escaping each value once per rule"""
+    return dict(iter_render_files(compiled, values, paths))
+
+
+def iter_render_files(compiled: Dict[str, CompiledTemplate], values: Dict[str, str],
+                      paths: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, str]]:
+    """Yield (path, text) one file at a time, for callers that send each file as it is ready"""
+    escaped: Dict[Callable[[str], str], Dict[str, str]] = {}
+    for path in compiled if paths is None else paths:
+        template = compiled[path]
+        if not template.slots:
+            yield path, template.segments[0]
+            continue
+        by_rule = escaped.get(template.escape)
+        if by_rule is None:
+            escape = template.escape
+            by_rule = escaped[template.escape] = {
+                name: value if name in RAW_PLACEHOLDERS else escape(value) for name, value in values.items()
+            }
+        yield path, template.render(by_rule)
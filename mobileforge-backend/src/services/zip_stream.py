@@ -0,0 +1,245 @@
+"""
+Deterministic, streamed ZIP archives of stored apps.
+
+An archive is planned before any byte is sent: entries are sorted by path,
+carry a fixed timestamp, and the CRC and compressed size of every blob are
+known up front (from EntryCache, or by compressing the blob once and keeping
+only those numbers). The archive is therefore byte-identical on every
+request, its total length is known, and any byte range can be produced by
+walking the plan. Nothing is written to a temp file; entry data is
+compressed (or copied from the cache) in CHUNK_SIZE pieces as it is sent, so
+memory does not grow with the size of the project.
+
+Compressed bytes are cached per blob hash for blobs up to
+MAX_CACHED_ENTRY_BYTES: boilerplate shared by many apps is deflated once.
+Archives and entries must stay under 4 GiB (no ZIP64).
+"""
+
+import hashlib
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+CHUNK_SIZE = 64 * 1024
+COMPRESS_LEVEL = 6
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+MAX_CACHED_ENTRY_BYTES = 1024 * 1024
+MAX_CACHE_ENTRIES = 100000
+ZIP32_LIMIT = 0xFFFFFFFF
+
+STORED = 0
+DEFLATED = 8
+# 1980-01-01 00:00:00, the DOS epoch
+DOS_TIME = 0
+DOS_DATE = (1 << 5) | 1
+FLAG_UTF8 = 0x0800
+EXTERNAL_ATTR = 0o100644 << 16
+
+LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+END_RECORD = struct.Struct('<IHHHHIIH')
+
+
+def archive_etag(files: List[Tuple[str, str]]) -> str:
+    """ETag of the archive for (path, hash) pairs, without building its plan"""
+    # Same paths and blobs -> same bytes, so they identify the archive
+    return hashlib.sha256(repr(sorted(files)).encode('utf-8')).hexdigest()[:32]
+
+
+def deflate_chunks(source: BinaryIO) -> Iterator[bytes]:
+    """Raw deflate of a file object, produced CHUNK_SIZE input bytes at a time"""
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15)
+    while True:
+        data = source.read(CHUNK_SIZE)
+        if not data:
+            break
+        out = compressor.compress(data)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def copy_chunks(source: BinaryIO) -> Iterator[bytes]:
+    while True:
+        data = source.read(CHUNK_SIZE)
+        if not data:
+            return
+        yield data
+
+
+class EntryInfo:
+    __slots__ = ('crc', 'size', 'compressed_size', 'method', 'data')
+
+    def __init__(self, crc: int, size: int, compressed_size: int, method: int, data: Optional[bytes]):
+        self.crc = crc
+        self.size = size
+        self.compressed_size = compressed_size
+        self.method = method
+        # Compressed bytes, kept only for cacheable entries
+        self.data = data
+
+
+class EntryCache:
+    """LRU of compressed entries by blob hash, bounded by total compressed bytes.
+
+    Entries too large to keep, and entries evicted to stay under max_bytes,
+    still record their CRC and sizes, which is all planning needs; their data
+    is recompressed (deterministically) on send. Those metadata-only entries
+    are dropped entirely only past MAX_CACHE_ENTRIES.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, EntryInfo]' = OrderedDict()
+        # Digests of the entries still holding compressed bytes, oldest first
+        self._with_data: 'OrderedDict[str, None]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'dropped': 0}
+
+    def get(self, digest: str, open_blob: Callable[[str], BinaryIO]) -> EntryInfo:
+        with self._lock:
+            info = self._entries.get(digest)
+            if info is not None:
+                self._entries.move_to_end(digest)
+                if digest in self._with_data:
+                    self._with_data.move_to_end(digest)
+                self._stats['hits'] += 1
+                return info
+            self._stats['misses'] += 1
+        info = self._compress(open_blob(digest))
+        if info.data is not None and len(info.data) > self.max_bytes:
+            info.data = None
+        with self._lock:
+            if digest in self._entries:
+                return self._entries[digest]
+            self._entries[digest] = info
+            if info.data is not None:
+                self._with_data[digest] = None
+                self._bytes += len(info.data)
+            while self._bytes > self.max_bytes and len(self._with_data) > 1:
+                # Evict the compressed bytes but keep the CRC and sizes
+                old = self._entries[self._with_data.popitem(last=False)[0]]
+                self._bytes -= len(old.data)
+                old.data = None
+                self._stats['evictions'] += 1
+            while len(self._entries) > MAX_CACHE_ENTRIES:
+                old_digest, old = self._entries.popitem(last=False)
+                if old_digest in self._with_data:
+                    del self._with_data[old_digest]
+                    self._bytes -= len(old.data)
+                self._stats['dropped'] += 1
+        return info
+
+    def cached_data(self, digest: str) -> Optional[bytes]:
+        """Compressed bytes of an entry if the cache still holds them"""
+        info = self._entries.get(digest)
+        return info.data if info is not None else None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), data_entries=len(self._with_data),
+                        bytes=self._bytes, max_bytes=self.max_bytes)
+
+    def _compress(self, source: BinaryIO) -> EntryInfo:
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15)
+        crc = 0
+        size = compressed_size = 0
+        kept: Optional[List[bytes]] = []
+        with source:
+            while True:
+                data = source.read(CHUNK_SIZE)
+                if not data:
+                    break
+                crc = zlib.crc32(data, crc)
+                size += len(data)
+                out = compressor.compress(data)
+                compressed_size += len(out)
+                if kept is not None:
+                    kept.append(out)
+                    if compressed_size > MAX_CACHED_ENTRY_BYTES:
+                        kept = None
+            out = compressor.flush()
+        compressed_size += len(out)
+        if size > ZIP32_LIMIT or compressed_size > ZIP32_LIMIT:
+            raise ValueError('Entry too large for a ZIP archive without ZIP64')
+        if compressed_size >= size:
+            # Incompressible: store it; the stored bytes are the blob itself
+            return EntryInfo(crc, size, size, STORED, None)
+        if kept is not None:
+            kept.append(out)
+        return EntryInfo(crc, size, compressed_size, DEFLATED, b''.join(kept) if kept is not None else None)
+
+
+class ZipPlan:
+    """Byte layout of one archive: local headers, entry data, central directory"""
+
+    def __init__(self, files: List[Tuple[str, str]], open_blob: Callable[[str], BinaryIO], cache: EntryCache):
+        self.open_blob = open_blob
+        self.cache = cache
+        # (offset, length, kind, payload) with kind 'bytes' or 'entry'; entry
+        # payloads keep no data, which is taken from the cache or recompressed
+        self.segments = []
+        central = []
+        offset = 0
+        for name, digest in sorted(files):
+            info = cache.get(digest, open_blob)
+            encoded = name.encode('utf-8')
+            header = LOCAL_HEADER.pack(
+                0x04034b50, 20, FLAG_UTF8, info.method, DOS_TIME, DOS_DATE,
+                info.crc, info.compressed_size, info.size, len(encoded), 0
+            ) + encoded
+            central.append(CENTRAL_HEADER.pack(
+                0x02014b50, 20, 20, FLAG_UTF8, info.method, DOS_TIME, DOS_DATE,
+                info.crc, info.compressed_size, info.size, len(encoded), 0, 0, 0, 0,
+                EXTERNAL_ATTR, offset
+            ) + encoded)
+            self.segments.append((offset, len(header), 'bytes', header))
+            offset += len(header)
+            self.segments.append((offset, info.compressed_size, 'entry', (digest, info.method)))
+            offset += info.compressed_size
+
+        directory = b''.join(central)
+        end = END_RECORD.pack(0x06054b50, 0, 0, len(central), len(central), len(directory), offset, 0)
+        if offset + len(directory) > ZIP32_LIMIT or len(central) > 0xFFFF:
+            raise ValueError('Archive too large for ZIP without ZIP64')
+        self.segments.append((offset, len(directory) + len(end), 'bytes', directory + end))
+        self.size = offset + len(directory) + len(end)
+        self.etag = archive_etag(files)
+
+    def iter_bytes(self, start: int = 0, stop: Optional[int] = None) -> Iterator[bytes]:
+        """Yield archive bytes [start, stop) in chunks"""
+        stop = self.size if stop is None else stop
+        for offset, length, kind, payload in self.segments:
+            if offset + length <= start:
+                continue
+            if offset >= stop:
+                break
+            skip = max(0, start - offset)
+            want = min(length, stop - offset) - skip
+            chunks = [payload] if kind == 'bytes' else self._entry_chunks(*payload)
+            for chunk in chunks:
+                if skip >= len(chunk):
+                    skip -= len(chunk)
+                    continue
+                piece = chunk[skip:skip + want]
+                skip = 0
+                want -= len(piece)
+                if piece:
+                    yield piece
+                if not want:
+                    break
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    def _entry_chunks(self, digest: str, method: int) -> Iterator[bytes]:
+        data = self.cache.cached_data(digest) if method == DEFLATED else None
+        if data is not None:
+            view = memoryview(data)
+            for pos in range(0, len(view), CHUNK_SIZE):
+                yield bytes(view[pos:pos + CHUNK_SIZE])
+            return
+        with self.open_blob(digest) as source:
+            yield from (deflate_chunks(source) if method == DEFLATED else copy_chunks(source))
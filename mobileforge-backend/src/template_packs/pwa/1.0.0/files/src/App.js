@@ -0,0 +1,18 @@
+import React from 'react';
+import './App.css';
+
+function App() {
+  return (
+    <div className="App">
+      <header className="App-header">
+        <h1>{{APP_NAME}}</h1>
+        <p>{{APP_DESCRIPTION}}</p>
+      </header>
+      <main className="App-main">
+        {{MAIN_CONTENT}}
+      </main>
+    </div>
+  );
+}
+
+export default App;
\ No newline at end of file
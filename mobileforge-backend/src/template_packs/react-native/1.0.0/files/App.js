@@ -0,0 +1,56 @@
+import React from 'react';
+import {
+  SafeAreaView,
+  ScrollView,
+  StatusBar,
+  StyleSheet,
+  Text,
+  View,
+  TouchableOpacity,
+} from 'react-native';
+
+function App() {
+  return (
+    <SafeAreaView style={styles.container}>
+      <StatusBar barStyle="dark-content" />
+      <ScrollView contentInsetAdjustmentBehavior="automatic">
+        <View style={styles.header}>
+          <Text style={styles.title}>{{APP_NAME}}</Text>
+          <Text style={styles.subtitle}>{{APP_DESCRIPTION}}</Text>
+        </View>
+        
+        <View style={styles.content}>
+          {{MAIN_CONTENT}}
+        </View>
+      </ScrollView>
+    </SafeAreaView>
+  );
+}
+
+const styles = StyleSheet.create({
+  container: {
+    flex: 1,
+    backgroundColor: '#f8f9fa',
+  },
+  header: {
+    padding: 20,
+    alignItems: 'center',
+    backgroundColor: '#007bff',
+  },
+  title: {
+    fontSize: 24,
+    fontWeight: 'bold',
+    color: '#ffffff',
+    marginBottom: 8,
+  },
+  subtitle: {
+    fontSize: 16,
+    color: '#e3f2fd',
+    textAlign: 'center',
+  },
+  content: {
+    padding: 20,
+  },
+});
+
+export default App;
\ No newline at end of file
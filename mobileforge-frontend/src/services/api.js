@@ -43,68 +43,204 @@ class ApiService {
     });
   }
 
-  // Streaming chat method
-  async streamChatMessage(message, provider, onChunk, onComplete, onError) {
+  // Streaming chat method. Dropped connections are resumed with Last-Event-ID
+  // so the backend replays buffered events instead of regenerating the answer.
+  async streamChatMessage(message, provider, onChunk, onComplete, onError, maxReconnects = 3) {
+    let lastEventId = null;
+    let reconnects = 0;
+
+    while (true) {
+      try {
+        const headers = { 'Content-Type': 'application/json' };
+        if (lastEventId) {
+          headers['Last-Event-ID'] = lastEventId;
+        }
+
+        const response = await fetch(`${this.baseURL}/llm/chat`, {
+          method: 'POST',
+          headers,
+          body: JSON.stringify({ message, provider }),
+        });
+
+        if (response.status === 410 && lastEventId) {
+          // Buffer expired; nothing left to resume
+          onError?.('Stream expired before it could be resumed');
+          return;
+        }
+
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+
+        while (true) {
+          const { done, value } = await reader.read();
+          
+          if (done) break;
+
+          buffered += decoder.decode(value, { stream: true });
+          const lines = buffered.split('\n');
+          buffered = lines.pop();
+
+          for (const line of lines) {
+            if (line.startsWith('id: ')) {
+              lastEventId = line.slice(4);
+            } else if (line.startsWith('data: ')) {
+              try {
+                const data = JSON.parse(line.slice(6));
+                
+                if (data.error) {
+                  onError?.(data.error);
+                  return;
+                }
+                
+                if (data.done) {
+                  onComplete?.();
+                  return;
+                }
+                
+                if (data.content) {
+                  onChunk?.(data.content);
+                }
+              } catch (e) {
+                // Ignore malformed JSON
+              }
+            }
+          }
+        }
+
+        throw new Error('Stream ended unexpectedly');
+      } catch (error) {
+        if (!lastEventId || reconnects >= maxReconnects) {
+          onError?.(error.message);
+          return;
+        }
+        reconnects += 1;
+        await new Promise((resolve) => setTimeout(resolve, 250 * reconnects));
+      }
+    }
+  }
+
+  // Watch a chat stream started by another tab or teammate (stream_id from the
+  // 'started' event or the X-Stream-Id header). Late joiners replay from the
+  // buffer; EventSource reconnects with Last-Event-ID on its own.
+  // Returns the EventSource; call close() to stop watching.
+  watchChatStream(streamId, onChunk, onComplete, onError) {
+    const source = new EventSource(`${this.baseURL}/llm/streams/${encodeURIComponent(streamId)}`);
+
+    source.onmessage = (event) => {
+      let data;
+      try {
+        data = JSON.parse(event.data);
+      } catch (e) {
+        return;
+      }
+      if (data.error) {
+        source.close();
+        onError?.(data.error);
+      } else if (data.done) {
+        source.close();
+        onComplete?.();
+      } else if (data.content) {
+        onChunk?.(data.content);
+      }
+    };
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        onError?.('Stream is no longer available');
+      }
+    };
+    return source;
+  }
+
+  async generateApp(description, framework = 'react-native', provider = 'gpt4', sessionToken = null) {
+    return this.request('/llm/generate-app', {
+      method: 'POST',
+      ...(sessionToken && { headers: { 'Content-Type': 'application/json', 'X-Session-Token': sessionToken } }),
+      body: JSON.stringify({ description, framework, provider }),
+    });
+  }
+
+  // Start generating while the user types (call from a debounced input
+  // handler); generateApp with the same session token reuses the result.
+  async prefetchApp(description, framework = 'react-native', provider = 'gpt4', sessionToken) {
+    return this.request('/llm/generate-app/prefetch', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', 'X-Session-Token': sessionToken },
+      body: JSON.stringify({ description, framework, provider }),
+    });
+  }
+
+  async cancelPrefetch(sessionToken) {
+    return this.request('/llm/generate-app/prefetch', {
+      method: 'DELETE',
+      headers: { 'Content-Type': 'application/json', 'X-Session-Token': sessionToken },
+    });
+  }
+
+  // Generate from the code templates, receiving files as they render so the
+  // code tab can show App.js before the rest arrives. onApp gets the app id
+  // and metadata, onFile each { path, hash, content }, onComplete the trailer
+  // with manifest, build_commands and deployment_info.
+  async streamCodegenApp({ framework, appName, description, packageName }, { onApp, onFile, onComplete, onError }) {
     try {
-      const response = await fetch(`${this.baseURL}/llm/chat`, {
+      const response = await fetch(`${this.baseURL}/codegen/generate`, {
         method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ message, provider }),
+        headers: { 'Content-Type': 'application/json', Accept: 'application/x-ndjson' },
+        body: JSON.stringify({
+          framework,
+          app_name: appName,
+          description,
+          package_name: packageName,
+          stream: true,
+        }),
       });
 
       if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
+        const data = await response.json().catch(() => ({}));
+        throw new Error(data.error || `HTTP error! status: ${response.status}`);
       }
 
       const reader = response.body.getReader();
       const decoder = new TextDecoder();
+      let buffered = '';
 
       while (true) {
         const { done, value } = await reader.read();
-        
+
         if (done) break;
 
-        const chunk = decoder.decode(value);
-        const lines = chunk.split('\n');
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
 
         for (const line of lines) {
-          if (line.startsWith('data: ')) {
-            try {
-              const data = JSON.parse(line.slice(6));
-              
-              if (data.error) {
-                onError?.(data.error);
-                return;
-              }
-              
-              if (data.done) {
-                onComplete?.();
-                return;
-              }
-              
-              if (data.content) {
-                onChunk?.(data.content);
-              }
-            } catch (e) {
-              // Ignore malformed JSON
-            }
+          if (!line) continue;
+          const record = JSON.parse(line);
+
+          if (record.type === 'app') {
+            onApp?.(record);
+          } else if (record.type === 'file') {
+            onFile?.(record);
+          } else if (record.type === 'done') {
+            onComplete?.(record);
+            return;
+          } else if (record.type === 'error') {
+            onError?.(record.error);
+            return;
           }
         }
       }
+
+      throw new Error('Stream ended unexpectedly');
     } catch (error) {
       onError?.(error.message);
     }
   }
 
-  async generateApp(description, framework = 'react-native', provider = 'gpt4') {
-    return this.request('/llm/generate-app', {
-      method: 'POST',
-      body: JSON.stringify({ description, framework, provider }),
-    });
-  }
-
   // Apps API methods
   async getApps() {
     return this.request('/apps/list');